@@ -0,0 +1 @@
+"""Benchmarks. Run a benchmark from the repository root with ``python -m benchmarks.<name>``."""
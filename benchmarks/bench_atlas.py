@@ -0,0 +1,149 @@
+"""Compare loading and drawing the game from separate image files and from atlas sheets."""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+import ppb
+from ppb import events
+from ppb.assetlib import AssetLoadingSystem
+from ppb.systemslib import System
+from ppb.systems import EventPoller, SoundController, Updater
+from sdl2 import SDL_FreeSurface
+from sdl2.sdlimage import IMG_Load
+
+from ext import Atlas, AtlasRenderer, MusicController, assets
+from models import FPSScene, LoadingScene
+
+ATLASES = ("assets/atlas/sprites.json", "assets/atlas/background.json")
+
+
+def decode_time(paths, repeat=3):
+    """The best time to decode image files, the way the asset loader does."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for path in paths:
+            SDL_FreeSurface(IMG_Load(path.encode("utf-8")))
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+class TimedRenderer(AtlasRenderer):
+    """An AtlasRenderer that times every frame of the game scene and counts the textures of its images."""
+
+    def __init__(self, **kwargs):
+        super(TimedRenderer, self).__init__(**kwargs)
+        self.frame_times = []
+        self.image_surfaces = set()
+
+    def prepare_resource(self, game_object):
+        texture = super(TimedRenderer, self).prepare_resource(game_object)
+        image = game_object.__image__() if texture is not None else None
+        # Texts get a texture every time they change, they are the same with or without atlases.
+        if image is not None and not isinstance(image, ppb.Text):
+            self.image_surfaces.add(id(image.load()))
+        return texture
+
+    def on_render(self, render_event, signal):
+        started = time.perf_counter()
+        super(TimedRenderer, self).on_render(render_event, signal)
+        if isinstance(render_event.scene, FPSScene):
+            self.frame_times.append(time.perf_counter() - started)
+
+
+class Stopper(System):
+    """Quits after the game scene rendered a number of frames."""
+
+    frames = 300
+
+    def __init__(self, **kwargs):
+        super(Stopper, self).__init__(**kwargs)
+        self.rendered = 0
+
+    def on_render(self, render_event, signal):
+        if isinstance(render_event.scene, FPSScene):
+            self.rendered += 1
+            if self.rendered >= self.frames:
+                signal(events.Quit())
+
+
+def run_game(use_atlas, frames):
+    """Run the game headless and measure it. Runs in its own process, so nothing is cached between modes."""
+    from main import setup  # avoid circular import
+
+    Stopper.frames = frames
+    loading = {}
+
+    class MeasuredLoadingScene(LoadingScene):
+        def on_idle(self, event, signal):
+            super(MeasuredLoadingScene, self).on_idle(event, signal)
+            loading["time_to_playable"] = self.time_to_playable
+
+    with ppb.GameEngine(
+        MeasuredLoadingScene,
+        basic_systems=(TimedRenderer, Updater, EventPoller, SoundController, AssetLoadingSystem),
+        systems=(MusicController, Stopper),
+        scene_kwargs={"set_up": setup, "started": time.perf_counter()},
+        resolution=(1080, 720),
+        target_frame_rate=1000,
+        atlases=ATLASES if use_atlas else (),
+    ) as engine:
+        engine.run()
+        renderer = next(system for system in engine.children if isinstance(system, TimedRenderer))
+    frame_times = sorted(renderer.frame_times)
+    return {
+        "images": sum(1 for kind, *_ in assets._entries if kind is ppb.Image),
+        "textures": len(renderer.image_surfaces),
+        "load_s": round(loading["time_to_playable"], 3),
+        "frame_ms": round(sum(frame_times) / len(frame_times) * 1000, 3),
+        "p95_ms": round(frame_times[int(len(frame_times) * 0.95)] * 1000, 3),
+        "draws_per_frame": round(renderer.draws / renderer.frames, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", type=int, default=1000, help="Frames of the game scene to render.")
+    parser.add_argument("--runs", type=int, default=3, help="Runs of every mode, the fastest is kept.")
+    parser.add_argument("--mode", choices=("files", "atlas"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        logging.disable(logging.WARNING)
+        print(json.dumps(run_game(args.mode == "atlas", args.frames)))
+        return
+
+    if not all(os.path.isfile(index) for index in ATLASES):
+        subprocess.run([sys.executable, "-m", "tools", "atlas"], check=True)
+    atlases = [Atlas(index) for index in ATLASES]
+    files = [path for atlas in atlases for path in atlas.regions]
+    sheets = [sheet for atlas in atlases for sheet in atlas.sheets]
+    print(f"Decoding {len(files)} files: {decode_time(files) * 1000:.1f} ms, "
+          f"{len(sheets)} sheets: {decode_time(sheets) * 1000:.1f} ms")
+
+    print(
+        f"{'mode':>6} {'images':>7} {'textures':>9} {'load s':>7} {'frame ms':>9} {'p95 ms':>7} "
+        f"{'draws':>6}"
+    )
+    for mode in ("files", "atlas"):
+        results = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_atlas", "--mode", mode, "--frames", str(args.frames)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        best = min(results, key=lambda result: result["frame_ms"])
+        best["load_s"] = min(result["load_s"] for result in results)
+        print(
+            f"{mode:>6} {best['images']:>7} {best['textures']:>9} {best['load_s']:>7} "
+            f"{best['frame_ms']:>9} {best['p95_ms']:>7} {best['draws_per_frame']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Report the audio callback timing of every latency profile."""
+import argparse
+import time
+
+import sdl2
+from ppb.systems.sdl_utils import mix_call
+from sdl2.sdlmixer import Mix_CloseAudio
+
+from ext.music import LATENCY_PROFILES, MusicController, post_mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=2.0, help="How long to time every profile.")
+    parser.add_argument("profiles", nargs="*", default=sorted(LATENCY_PROFILES, key=LATENCY_PROFILES.get))
+    args = parser.parse_args()
+
+    sdl2.SDL_Init(sdl2.SDL_INIT_AUDIO)
+    print(f"{'profile':>12} {'chunk':>6} {'chunk ms':>9} {'mean ms':>8} {'jitter ms':>10} {'max ms':>7} {'underruns':>10}")
+    try:
+        for profile in args.profiles:
+            chunk_size = LATENCY_PROFILES[profile]
+            MusicController._open_audio(chunk_size)
+            post_mix.install()
+            time.sleep(args.seconds)
+            stats = post_mix.monitor.stats
+            post_mix.uninstall()
+            mix_call(Mix_CloseAudio)
+            print(
+                f"{profile:>12} {chunk_size:>6} {stats['chunk_ms']:>9} {stats['mean_ms']:>8} "
+                f"{stats['jitter_ms']:>10} {stats['max_ms']:>7} {stats['underruns']:>10}"
+            )
+    finally:
+        sdl2.SDL_Quit()
+
+
+if __name__ == "__main__":
+    main()
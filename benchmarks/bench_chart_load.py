@@ -0,0 +1,69 @@
+"""Compare loading a json song with loading its compiled chart."""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from models.chart import Chart, compile_chart
+
+NOTES = ["blank", "C4", "D4", "E4", "F#4", "G#5", "A5", "B3", "C#5"]
+
+
+def write_synthetic_song(file_location, note_count, seed=0):
+    """Write a json song with ``note_count`` notes spread over chords of one to three notes."""
+    rng = random.Random(seed)
+    tiles = {}
+    beat = 0.0
+    written = 0
+    while written < note_count:
+        beat += rng.choice((0.25, 0.5, 1))
+        chord = [rng.choice(NOTES) for _ in range(min(rng.randint(1, 3), note_count - written))]
+        tiles[f"{beat:g}"] = chord
+        written += len(chord)
+    with open(file_location, "w") as f:
+        json.dump({"song": {"name": "Synthetic", "tiles": tiles}}, f)
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        song = os.path.join(directory, "synthetic.json")
+        write_synthetic_song(song, args.notes)
+        chart = compile_chart(song, bpm=128)
+
+        def load_compiled():
+            Chart.load(chart).close()
+
+        def load_compiled_and_scan():
+            loaded = Chart.load(chart)
+            sum(loaded.seconds)
+            loaded.close()
+
+        results = [
+            ("json", os.path.getsize(song), best_of(args.repeat, lambda: Chart.load(song, bpm=128))),
+            ("compiled", os.path.getsize(chart), best_of(args.repeat, load_compiled)),
+            ("compiled + scan", os.path.getsize(chart), best_of(args.repeat, load_compiled_and_scan)),
+        ]
+
+    print(f"{args.notes} notes, best of {args.repeat}")
+    for name, size, seconds in results:
+        print(f"{name:>16}: {seconds * 1000:9.2f} ms  ({size / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
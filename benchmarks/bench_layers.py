@@ -0,0 +1,108 @@
+"""Compare the frame time of the game with and without the static layer cache."""
+import argparse
+import json
+import logging
+import subprocess
+import sys
+import time
+
+import ppb
+from ppb import events
+from ppb.assetlib import AssetLoadingSystem
+from ppb.systemslib import System
+from ppb.systems import EventPoller, SoundController, Updater
+
+from ext import ImageScaler, LayerCacheRenderer, MusicController
+from models import Conductor, FPSScene, LoadingScene
+
+
+class TimedRenderer(LayerCacheRenderer):
+    """A LayerCacheRenderer that times every frame of the game scene."""
+
+    def __init__(self, **kwargs):
+        super(TimedRenderer, self).__init__(**kwargs)
+        self.frame_times = []
+
+    def on_render(self, render_event, signal):
+        started = time.perf_counter()
+        super(TimedRenderer, self).on_render(render_event, signal)
+        if isinstance(render_event.scene, FPSScene):
+            self.frame_times.append(time.perf_counter() - started)
+
+
+class SongPlayer(System):
+    """Starts the song on the first frame of the game scene, then quits after a number of frames."""
+
+    frames = 1000
+
+    def __init__(self, **kwargs):
+        super(SongPlayer, self).__init__(**kwargs)
+        self.rendered = 0
+
+    def on_render(self, render_event, signal):
+        if not isinstance(render_event.scene, FPSScene):
+            return
+        if not self.rendered:
+            signal(events.KeyPressed(Conductor.PLAY, set()))
+        self.rendered += 1
+        if self.rendered >= self.frames:
+            signal(events.Quit())
+
+
+def run_game(layer_cache, frames):
+    """Run the game headless and measure it. Runs in its own process, so nothing is cached between modes."""
+    from main import RES, setup  # avoid circular import
+
+    SongPlayer.frames = frames
+    with ppb.GameEngine(
+        LoadingScene,
+        basic_systems=(TimedRenderer, Updater, EventPoller, SoundController, AssetLoadingSystem),
+        systems=(ImageScaler, MusicController, SongPlayer),
+        scene_kwargs={"set_up": setup},
+        resolution=RES,
+        target_frame_rate=1000,
+        layer_cache=layer_cache,
+    ) as engine:
+        engine.run()
+        renderer = next(system for system in engine.children if isinstance(system, TimedRenderer))
+    # The first frames wait for textures to be made.
+    frame_times = sorted(renderer.frame_times[10:])
+    return {
+        "frame_ms": round(sum(frame_times) / len(frame_times) * 1000, 3),
+        "p95_ms": round(frame_times[int(len(frame_times) * 0.95)] * 1000, 3),
+        "draws_per_frame": round(renderer.draws / renderer.frames, 1),
+        "layer_renders": renderer.layer_renders,
+        "layer_hits": renderer.layer_hits,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", type=int, default=1000, help="Frames of the game scene to render.")
+    parser.add_argument("--runs", type=int, default=3, help="Runs of every mode, the fastest is kept.")
+    parser.add_argument("--mode", choices=("off", "on"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        logging.disable(logging.WARNING)
+        print(json.dumps(run_game(args.mode == "on", args.frames)))
+        return
+
+    print(f"{'cache':>6} {'frame ms':>9} {'p95 ms':>7} {'draws':>6} {'renders':>8} {'hits':>6}")
+    for mode in ("off", "on"):
+        results = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_layers", "--mode", mode, "--frames", str(args.frames)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        best = min(results, key=lambda result: result["frame_ms"])
+        print(
+            f"{mode:>6} {best['frame_ms']:>9} {best['p95_ms']:>7} {best['draws_per_frame']:>6} "
+            f"{best['layer_renders']:>8} {best['layer_hits']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Compare per-Note updates with the batched NoteField step."""
+import argparse
+import random
+import time
+
+import ppb
+
+from models import Floor, Note, Player, is_colliding
+from models.notefield import NoteField
+
+SPEED = 7
+FRAME = 1 / 60
+
+
+def make_notes(count, seed=0):
+    rng = random.Random(seed)
+    notes = []
+    for _ in range(count):
+        note = Note()
+        note.play_time = rng.uniform(0, 60)
+        note.speed = SPEED
+        note.position = ppb.Vector(rng.choice((-4, -2, 2, 4)), SPEED * note.play_time - 4.5)
+        notes.append(note)
+    return notes
+
+
+def per_note_update(notes, floors, players, time_delta):
+    """The work every Note.on_update did before the NoteField: collide with every floor and player, then move."""
+    for note in notes:
+        for floor in floors:
+            for player in players:
+                is_colliding(note, floor)
+                is_colliding(note, player)
+        note.position += note.direction * note.speed * time_delta
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    floors = [Floor(position=(0, -8), image_location="assets/floor.png", width=30, height=5.5)]
+    players = [Player(position=(-8, -3))]
+
+    print(f"ms per frame, best of {args.repeat} runs of {args.frames} frames")
+    print(f"{'notes':>8} {'per note':>10} {'NoteField':>10} {'speedup':>8}")
+    for count in args.counts:
+        notes = make_notes(count)
+
+        def run_per_note():
+            for _ in range(args.frames):
+                per_note_update(notes, floors, players, FRAME)
+
+        field = NoteField()
+        for note in notes:
+            field.add(note, base_height=-4.5)
+
+        def run_field():
+            for frame in range(args.frames):
+                field.step(frame * FRAME, players=players)
+
+        per_note = best_of(args.repeat, run_per_note) / args.frames * 1000
+        batched = best_of(args.repeat, run_field) / args.frames * 1000
+        print(f"{count:>8} {per_note:>10.3f} {batched:>10.3f} {per_note / batched:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare the time spent in the scene queries of a frame on a plain ppb scene and with the FPSScene query cache."""
+import argparse
+import time
+
+import ppb
+
+from models import BeatTrigger, Conductor, FPSScene, Note, Player, objects, single
+
+
+def make_scene(scene_class, conductor, triggers, notes):
+    scene = scene_class()
+    scene.add(conductor)
+    scene.add(Player(position=(-8, -3)))
+    for index in range(triggers):
+        scene.add(BeatTrigger(position=(index % 10, 0), direction=(1, 0), bpm=128))
+    for index in range(notes):
+        note = Note()
+        note.position = ppb.Vector(index % 10, index)
+        scene.add(note)
+    return scene
+
+
+def frame_queries(scene):
+    """The queries of one frame: every beat trigger, the song and the scene."""
+    for _ in objects(scene, BeatTrigger):
+        single(scene, Conductor)
+        for _ in objects(scene, BeatTrigger):
+            pass
+    list(scene.get(kind=Player))
+    for _ in scene.get(kind=Player):
+        pass
+    for _ in scene.get(kind=Player):
+        pass
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--triggers", type=int, nargs="+", default=[2, 20, 200])
+    parser.add_argument("--notes", type=int, default=500, help="Other sprites in the scene.")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    conductor = Conductor("assets/nekozilla.json", music_name="assets/nekozilla.mp3", bpm=128)
+    print(f"ms per frame, best of {args.repeat} runs of {args.frames} frames, {args.notes} notes")
+    print(f"{'triggers':>9} {'ppb.Scene':>10} {'FPSScene':>9} {'speedup':>8} {'queries':>8} {'misses':>7}")
+    for triggers in args.triggers:
+        plain = make_scene(ppb.Scene, conductor, triggers, args.notes)
+        indexed = make_scene(FPSScene, conductor, triggers, args.notes)
+
+        def run(scene):
+            def frames():
+                for _ in range(args.frames):
+                    frame_queries(scene)
+                    if scene is indexed:
+                        scene.queries.next_frame()
+            return frames
+
+        plain_ms = best_of(args.repeat, run(plain)) / args.frames * 1000
+        indexed_ms = best_of(args.repeat, run(indexed)) / args.frames * 1000
+        stats = indexed.queries.stats
+        print(
+            f"{triggers:>9} {plain_ms:>10.3f} {indexed_ms:>9.3f} {plain_ms / indexed_ms:>7.1f}x "
+            f"{stats['queries']:>8} {stats['misses']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
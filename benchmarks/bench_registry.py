@@ -0,0 +1,47 @@
+"""Check the reference counts of the shared asset registry and the bytes it counts against its budget."""
+import argparse
+import glob
+import os
+
+from ext import AssetRegistry, png_size
+
+
+def check_references(path):
+    """
+    Acquire and release a file with and without a size, with no scaler to shrink it.
+
+    ppb hands out one image per file, so both requests must share one entry and every
+    release must drop a reference of it.
+    """
+    registry = AssetRegistry()
+    plain = registry.acquire(path)
+    sized = registry.acquire(path, size=(1, 1))
+    assert plain is sized, "Both requests should get the image of the file."
+    assert len(registry) == 1, f"Expected one entry, got {len(registry)}."
+    assert registry.references(path) == 2, registry.references(path)
+    registry.release(plain)
+    assert registry.references(path) == registry.references(path, size=(1, 1)) == 1
+    registry.release(sized)
+    assert registry.references(path) == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", default="assets/tiles/*.png", help="The images to load.")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(args.images))
+    check_references(paths[0])
+    print("references: ok")
+
+    registry = AssetRegistry()
+    for path in paths:
+        registry.get(path)
+    file_bytes = sum(os.path.getsize(path) for path in paths)
+    decoded = sum(width * height * 4 for width, height in map(png_size, paths))
+    print(f"{len(paths)} images, {file_bytes / 2 ** 10:.0f} KB on disk, {registry.size / 2 ** 10:.0f} KB counted "
+          f"({decoded / 2 ** 10:.0f} KB decoded)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compare decoding the floor and background at their file size and at the size they are drawn at."""
+import argparse
+import glob
+import tempfile
+import time
+
+from sdl2 import SDL_FreeSurface
+from sdl2.sdlimage import IMG_Load
+
+from ext.scaling import ImageScaler, png_size, scale_image
+
+# The images of main.py and their size in game units, None for the background which fills the window.
+IMAGES = [("assets/floor.png", (30, 5.5))] + [(path, None) for path in sorted(glob.glob("assets/background/*.png"))]
+
+
+def decode(paths, repeat=3):
+    """The best time to decode image files, the way the asset loader does."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for path in paths:
+            SDL_FreeSurface(IMG_Load(path.encode("utf-8")))
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def texture_bytes(paths):
+    """The memory of the 32-bit textures of image files."""
+    return sum(width * height * 4 for width, height in map(png_size, paths))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--resolutions", nargs="+", default=["640x360", "800x600", "1080x720", "2560x1440"],
+        help="Window sizes to compare, WIDTHxHEIGHT.",
+    )
+    args = parser.parse_args()
+
+    originals = [path for path, _ in IMAGES]
+    original_ms = decode(originals) * 1000
+    original_mb = texture_bytes(originals) / 2 ** 20
+    print(f"{'resolution':>11} {'scaled':>7} {'build ms':>9} {'decode ms':>10} {'texture MB':>11}")
+    print(f"{'original':>11} {'':>7} {'':>9} {original_ms:>10.1f} {original_mb:>11.1f}")
+    with tempfile.TemporaryDirectory() as directory:
+        for resolution in args.resolutions:
+            width, height = map(int, resolution.split("x"))
+            scaler = ImageScaler(resolution=(width, height), scaled_cache=directory)
+            window = (width / scaler.pixel_ratio, height / scaler.pixel_ratio)
+            paths = []
+            build = 0.0
+            for path, size in IMAGES:
+                image = scaler.image(path, size or window)
+                if image is None:
+                    paths.append(path)
+                    continue
+                started = time.perf_counter()
+                SDL_FreeSurface(scale_image(image.source, image.pixels, image.name))
+                build += time.perf_counter() - started
+                paths.append(image.name)
+            scaled = sum(path not in originals for path in paths)
+            print(
+                f"{resolution:>11} {scaled:>7} {build * 1000:>9.1f} {decode(paths) * 1000:>10.1f} "
+                f"{texture_bytes(paths) / 2 ** 20:>11.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Find how many voices a chart needs by playing its notes through the voice allocator."""
+import argparse
+import wave
+
+import numpy as np
+
+from ext.music import VoiceAllocator, _Voice
+from models.chart import Chart
+
+FREQUENCY = 44100
+CHUNK = 4096
+
+
+def sample_frames(note_name, directory):
+    """The length of a note sample in frames at the mixer frequency."""
+    if note_name == "blank":
+        return 0
+    for name in (note_name, note_name.lower()):
+        try:
+            with wave.open(f"{directory}/{name}.wav") as f:
+                return f.getnframes() * FREQUENCY // f.getframerate()
+        except FileNotFoundError:
+            continue
+    # Missing samples play nothing in game either.
+    return 0
+
+
+def simulate(chart, max_voices, directory):
+    """Run every note of a chart through an allocator, chunk by chunk like the post mixer."""
+    allocator = VoiceAllocator(max_voices)
+    lengths = {}
+    starts = np.round(np.asarray(chart.seconds) * FREQUENCY).astype(np.int64)
+    next_note = 0
+    chunk_start = 0
+    while next_note < len(chart) or allocator.voices:
+        chunk_end = chunk_start + CHUNK
+        while next_note < len(chart) and starts[next_note] < chunk_end:
+            name = chart.note_name(next_note)
+            if name not in lengths:
+                lengths[name] = sample_frames(name, directory)
+            if lengths[name]:
+                # Only the length matters here, so the samples are a length-sized placeholder.
+                voice = _Voice(range(lengths[name]), int(starts[next_note]), 1.0, VoiceAllocator.NORMAL, next_note)
+                allocator.allocate(voice)
+            next_note += 1
+        allocator.retain([
+            voice for voice in allocator.voices
+            if voice.start + len(voice.samples) > chunk_end
+        ])
+        chunk_start = chunk_end
+    return allocator.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("song", help="A json song file or compiled chart.")
+    parser.add_argument("--bpm", type=float, default=128, help="Tempo of songs without a tempo map.")
+    parser.add_argument("--notes", default="assets/notes", help="The directory of the note samples.")
+    parser.add_argument("--voices", type=int, nargs="+", default=[8, 16, 32, 64])
+    args = parser.parse_args()
+
+    chart = Chart.load(args.song, bpm=args.bpm)
+    print(f"{chart.name}: {len(chart)} notes")
+    print(f"{'voices':>8} {'peak':>6} {'steals':>8} {'drops':>7}")
+    for max_voices in args.voices:
+        stats = simulate(chart, max_voices, args.notes)
+        print(f"{max_voices:>8} {stats['peak']:>6} {stats['steals']:>8} {stats['drops']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,20 @@
-from .music import Music, MusicController
+from .music import (
+    Music,
+    MusicController,
+    PostMixer,
+    ReadySound,
+    VoiceAllocator,
+    decode_sample,
+    mixer_ready,
+    post_mix,
+)
+from .samples import SampleBank, sample_bank
+from .clock import SongClock
+from .mixdown import MixdownRenderer, PcmReader, load_note_samples
+from .analysis import OnsetDetector, TempoCache, TempoEstimate, available_notes, tempo_cache
+from .registry import AssetRegistry, SharedAnimation, assets
+from .atlas import Atlas, AtlasImage, AtlasRenderer, build_atlas
+from .scaling import ImageScaler, ScaledImage, png_size
+from .culling import Cullable, CullingRenderer, cull_stats, in_view
+from .layers import LayerCacheRenderer
 from . import ext_events
@@ -0,0 +1,524 @@
+import hashlib
+import itertools
+import json
+import logging
+import os
+import re
+import time
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .mixdown import BLOCK_SIZE, ArrayReader, PcmReader
+
+logger = logging.getLogger(__name__)
+
+NOTE_NAMES = ("C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B")
+_NOTE_FILE = re.compile(r"^([a-g]#?)(\d)\.wav$", re.IGNORECASE)
+
+
+def note_name(midi: int) -> str:
+    """The name of a MIDI note as used by charts, such as "C#4"."""
+    return f"{NOTE_NAMES[midi % 12]}{midi // 12 - 1}"
+
+
+def available_notes(directory: str = "assets/notes") -> np.ndarray:
+    """
+    The MIDI numbers of the notes that have a sample in a directory.
+
+    :param directory: str
+        The directory of the note samples.
+    :return: np.ndarray
+        The sorted MIDI numbers.
+    """
+    notes = set()
+    for name in os.listdir(directory):
+        match = _NOTE_FILE.match(name)
+        if match:
+            pitch, octave = match.groups()
+            notes.add(NOTE_NAMES.index(pitch.upper()) + (int(octave) + 1) * 12)
+    return np.array(sorted(notes), dtype=np.int64)
+
+
+class Spectra(NamedTuple):
+    """The magnitude spectra of consecutive frames."""
+
+    first: int
+    magnitudes: np.ndarray
+
+
+def stream_spectra(reader: PcmReader, n_fft: int = 2048, hop: int = 512,
+                   block_size: int = BLOCK_SIZE) -> Iterator[Spectra]:
+    """
+    Compute the short-time Fourier transform of audio, block by block.
+
+    Only the overlap between blocks is carried over, so memory does not grow with the
+    length of the audio.
+
+    :param reader: :ref:`PcmReader`
+        The audio to transform. Mixed down to mono.
+    :param n_fft: int
+        The window length in frames.
+    :param hop: int
+        The frames between windows.
+    :param block_size: int
+        The frames read at once.
+    :return: Iterator[:ref:`Spectra`]
+        The magnitude spectra of every block, one row per window.
+    """
+    window = np.hanning(n_fft).astype(np.float32)
+    carried = np.zeros(0, dtype=np.float32)
+    first = 0
+    while True:
+        block = reader.read(block_size)
+        if not len(block):
+            break
+        mono = block.mean(axis=1, dtype=np.float32) / 32768
+        samples = np.concatenate((carried, mono))
+        if len(samples) < n_fft:
+            carried = samples
+            continue
+        frames = sliding_window_view(samples, n_fft)[::hop]
+        magnitudes = np.abs(np.fft.rfft(frames * window, axis=1)).astype(np.float32)
+        yield Spectra(first, magnitudes)
+        first += len(frames)
+        carried = samples[len(frames) * hop:]
+
+
+def spectral_flux(magnitudes: np.ndarray, previous: Optional[np.ndarray] = None,
+                  compression: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The mean increase of the log-compressed spectrum from one window to the next.
+
+    :param magnitudes: np.ndarray
+        The magnitude spectra, one row per window.
+    :param previous: Optional[np.ndarray]
+        The compressed spectrum of the window before, as returned for the last block.
+        The first window has no flux if None.
+    :param compression: float
+        The gain of the log compression.
+    :return: Tuple[np.ndarray, np.ndarray]
+        The flux of every window, and the compressed spectrum to pass with the next block.
+    """
+    compressed = np.log1p(compression * magnitudes)
+    if previous is None:
+        previous = compressed[:1]
+    flux = np.maximum(np.diff(np.concatenate((previous, compressed)), axis=0), 0).mean(axis=1)
+    return flux, compressed[-1:]
+
+
+class Onset(NamedTuple):
+    """A detected onset and the pitches sounding at it."""
+
+    time: float
+    strength: float
+    pitches: Tuple[int, ...]
+
+
+class OnsetDetector:
+    """
+    Finds note onsets in audio with spectral flux.
+
+    The flux is the mean increase of the log-compressed spectrum from one window
+    to the next. A window is an onset when its flux is the largest around it and
+    clears the mean around it by ``delta``. Peaks are picked block by block, keeping
+    only the flux needed for the neighbourhood of the next block.
+
+    Parameters
+    ----------
+    n_fft: int
+        The window length in frames.
+    hop: int
+        The frames between windows.
+    delta: float
+        How far the flux must clear its local mean, relative to the largest flux so far.
+    pre_max, post_max: float
+        Seconds before and after an onset its flux must be the largest in.
+    pre_avg, post_avg: float
+        Seconds before and after an onset the mean flux is taken over.
+    wait: float
+        The least seconds between onsets.
+    notes: np.ndarray
+        The MIDI numbers pitches are snapped to, see :func:`available_notes`.
+    max_pitches: int
+        The most pitches reported per onset.
+    compression: float
+        The gain of the log compression. Higher evens out loud and quiet parts, but
+        also lifts noise.
+    """
+
+    # Pitches are looked for between these frequencies.
+    MIN_FREQUENCY = 80.0
+    MAX_FREQUENCY = 2000.0
+
+    def __init__(self, n_fft: int = 2048, hop: int = 512, delta: float = 0.07, pre_max: float = 0.03,
+                 post_max: float = 0.03, pre_avg: float = 0.1, post_avg: float = 0.1, wait: float = 0.1,
+                 notes: Optional[np.ndarray] = None, max_pitches: int = 2,
+                 compression: float = 1.0):
+        self.n_fft = n_fft
+        self.hop = hop
+        self.delta = delta
+        self.pre_max, self.post_max = pre_max, post_max
+        self.pre_avg, self.post_avg = pre_avg, post_avg
+        self.wait = wait
+        self.notes = notes
+        self.max_pitches = max_pitches
+        self.compression = compression
+
+    def _frames(self, seconds: float, frequency: int) -> int:
+        return max(int(round(seconds * frequency / self.hop)), 1)
+
+    def _pitches(self, magnitudes: np.ndarray, frequency: int) -> np.ndarray:
+        """The MIDI numbers of the strongest spectral peaks of every window, -1 for none."""
+        bins = np.fft.rfftfreq(self.n_fft, 1 / frequency)
+        low, high = np.searchsorted(bins, (self.MIN_FREQUENCY, self.MAX_FREQUENCY))
+        band = magnitudes[:, low:high]
+        # Local maxima only, so one wide peak is not reported twice.
+        peaks = np.zeros_like(band)
+        is_peak = (band[:, 1:-1] > band[:, :-2]) & (band[:, 1:-1] >= band[:, 2:])
+        peaks[:, 1:-1][is_peak] = band[:, 1:-1][is_peak]
+        count = min(self.max_pitches, peaks.shape[1])
+        strongest = np.argsort(-peaks, axis=1)[:, :count]
+        strength = np.take_along_axis(peaks, strongest, axis=1)
+        # Weaker peaks than half the strongest are overtones or noise.
+        keep = (strength > 0) & (strength >= strength[:, :1] * 0.5)
+        midi = np.round(69 + 12 * np.log2(bins[low + strongest] / 440.0)).astype(np.int64)
+        if self.notes is not None and len(self.notes):
+            midi = self._snap(midi)
+        return np.where(keep, midi, -1)
+
+    def _snap(self, midi: np.ndarray) -> np.ndarray:
+        """Move pitches by octaves into the range of the notes, then to the nearest note."""
+        notes = self.notes
+        low, high = notes[0], notes[-1]
+        midi = np.where(midi < low, midi + 12 * np.ceil((low - midi) / 12).astype(np.int64), midi)
+        midi = np.where(midi > high, midi - 12 * np.ceil((midi - high) / 12).astype(np.int64), midi)
+        idx = np.clip(np.searchsorted(notes, midi), 1, len(notes) - 1)
+        below, above = notes[idx - 1], notes[idx]
+        return np.where(midi - below <= above - midi, below, above)
+
+    def detect(self, reader: PcmReader, block_size: int = BLOCK_SIZE) -> Iterator[Onset]:
+        """
+        Find the onsets of audio, in order.
+
+        :param reader: :ref:`PcmReader`
+            The audio to analyse.
+        :param block_size: int
+            The frames read at once.
+        :return: Iterator[:ref:`Onset`]
+            The onsets, with their time in seconds from the start of the audio.
+        """
+        frequency = reader.frequency
+        pre_max, post_max = self._frames(self.pre_max, frequency), self._frames(self.post_max, frequency)
+        pre_avg, post_avg = self._frames(self.pre_avg, frequency), self._frames(self.post_avg, frequency)
+        wait = self._frames(self.wait, frequency)
+        before, after = max(pre_max, pre_avg), max(post_max, post_avg)
+        # The flux of an onset peaks in the window it is three quarters into, where the
+        # window rises the steepest.
+        latency = self.n_fft * 3 / 4 / frequency
+
+        previous = None
+        # Flux and pitches of the windows not judged yet plus their neighbourhood, from
+        # window `base` on. Silence is assumed before the first window.
+        flux = np.zeros(before, dtype=np.float32)
+        pitches = np.full((before, self.max_pitches), -1, dtype=np.int64)
+        base = -before
+        largest = 0.0
+        last_onset = -wait - 1
+        spectra = stream_spectra(reader, self.n_fft, self.hop, block_size)
+        for block in itertools.chain(spectra, [None]):
+            if block is None:
+                # Silence after the last window, so the last windows are judged too.
+                block_flux = np.zeros(after, dtype=np.float32)
+                block_pitches = np.full((after, self.max_pitches), -1, dtype=np.int64)
+            else:
+                block_flux, previous = spectral_flux(block.magnitudes, previous, self.compression)
+                block_pitches = self._pitches(block.magnitudes, frequency)
+                largest = max(largest, float(block_flux.max(initial=0.0)))
+            flux = np.concatenate((flux, block_flux))
+            pitches = np.concatenate((pitches, block_pitches))
+
+            judged = len(flux) - before - after
+            if judged <= 0:
+                continue
+            for position in self._pick(flux, judged, before, pre_max, post_max, pre_avg, post_avg, largest):
+                window = base + position
+                if window - last_onset <= wait:
+                    continue
+                last_onset = window
+                yield Onset(
+                    window * self.hop / frequency + latency,
+                    float(flux[position]),
+                    # Pitched a little later, once the new note fills the window.
+                    tuple(int(pitch) for pitch in pitches[position + post_max] if pitch >= 0),
+                )
+            # Keep the neighbourhood of the windows still to judge.
+            flux = flux[judged:]
+            pitches = pitches[judged:]
+            base += judged
+
+    def _pick(self, flux, judged, before, pre_max, post_max, pre_avg, post_avg, largest):
+        """Yield the position of every peak among the `judged` windows after `before`."""
+        if largest <= 0:
+            return
+        candidates = flux[before:before + judged]
+        end = before + judged
+        maxima = sliding_window_view(flux[before - pre_max:end + post_max], pre_max + post_max + 1).max(axis=1)
+        means = sliding_window_view(flux[before - pre_avg:end + post_avg], pre_avg + post_avg + 1).mean(axis=1)
+        peaks = (candidates == maxima) & (candidates >= means + self.delta * largest) & (candidates > 0)
+        for idx in np.flatnonzero(peaks):
+            yield before + idx
+
+
+class _Downsampled:
+    """Reads audio at a fraction of its sample rate by averaging consecutive frames."""
+
+    def __init__(self, reader, factor: int):
+        self._reader = reader
+        self._factor = factor
+        self.frequency = reader.frequency / factor
+        self.channels = reader.channels
+
+    def read(self, frames: int) -> np.ndarray:
+        block = self._reader.read(frames * self._factor)
+        usable = len(block) - len(block) % self._factor
+        return block[:usable].reshape(-1, self._factor, self.channels).mean(axis=1, dtype=np.float32)
+
+
+class Envelope(NamedTuple):
+    """An onset strength envelope."""
+
+    values: np.ndarray
+    frame_rate: float
+    # The time in seconds of the first value.
+    start: float
+
+
+def onset_envelope(reader, downsample: int = 4, n_fft: int = 512, hop: int = 128,
+                   compression: float = 1.0, block_size: int = BLOCK_SIZE) -> Envelope:
+    """
+    Compute the spectral flux of audio at a reduced sample rate.
+
+    The audio is read block by block and downsampled before the transform, so only
+    the envelope, a few values per second, is kept in memory.
+
+    :param reader: :ref:`PcmReader`
+        The audio to analyse.
+    :param downsample: int
+        The factor to reduce the sample rate by.
+    :param n_fft: int
+        The window length in downsampled frames.
+    :param hop: int
+        The downsampled frames between windows.
+    :param compression: float
+        The gain of the log compression.
+    :param block_size: int
+        The downsampled frames read at once.
+    :return: :ref:`Envelope`
+        The flux of every window.
+    """
+    downsampled = _Downsampled(reader, downsample)
+    blocks = []
+    previous = None
+    for spectra in stream_spectra(downsampled, n_fft, hop, block_size):
+        flux, previous = spectral_flux(spectra.magnitudes, previous, compression)
+        blocks.append(flux)
+    values = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+    frequency = downsampled.frequency
+    # Timed like the onsets of :ref:`OnsetDetector`, three quarters into the window.
+    return Envelope(values, frequency / hop, n_fft * 3 / 4 / frequency)
+
+
+class TempoEstimate(NamedTuple):
+    """The tempo of a song and the time of its first beat."""
+
+    bpm: float
+    offset: float
+    # How regular the beats are, the autocorrelation at the beat period from 0 to 1.
+    confidence: float
+
+
+def estimate_tempo(envelope: Envelope, min_bpm: float = 60.0, max_bpm: float = 200.0,
+                   prior_bpm: float = 120.0, resolution: float = 0.01) -> TempoEstimate:
+    """
+    Estimate the tempo and beat phase of an onset envelope.
+
+    The tempo is the comb over the autocorrelation of the envelope that scores the
+    highest, weighted towards ``prior_bpm`` so a tempo is not mistaken for its half or
+    double. The phase is the comb over the envelope itself, at that tempo, that lines
+    up with the most onsets.
+
+    :param envelope: :ref:`Envelope`
+        The onset envelope of the song, see :func:`onset_envelope`.
+    :param min_bpm: float
+        The slowest tempo considered.
+    :param max_bpm: float
+        The fastest tempo considered.
+    :param prior_bpm: float
+        The most likely tempo.
+    :param resolution: float
+        The step between the tempos tried, in beats per minute.
+    :return: :ref:`TempoEstimate`
+        The estimated tempo.
+    """
+    values = envelope.values.astype(np.float64)
+    frame_rate = envelope.frame_rate
+    longest = 60 * frame_rate / min_bpm
+    if len(values) < 4 * longest:
+        raise ValueError("The audio is too short to estimate its tempo.")
+    # Only rises above the local mean count as onsets.
+    width = max(int(frame_rate / 2), 1)
+    local = np.convolve(values, np.ones(width) / width, mode="same")
+    onsets = np.maximum(values - local, 0)
+
+    # Autocorrelation through the FFT.
+    size = 1 << int(np.ceil(np.log2(2 * len(onsets))))
+    spectrum = np.fft.rfft(onsets, size)
+    correlation = np.fft.irfft(spectrum * np.conj(spectrum), size)[:len(onsets)]
+    if correlation[0] <= 0:
+        raise ValueError("The audio has no onsets to estimate its tempo from.")
+    correlation /= correlation[0]
+
+    # Comb: the mean autocorrelation at the first multiples of every candidate period.
+    bpms = np.arange(min_bpm, max_bpm + resolution, resolution)
+    periods = 60 * frame_rate / bpms
+    multiples = np.arange(1, 9)
+    lags = periods[:, None] * multiples[None, :]
+    lags = np.where(lags < len(correlation) - 1, lags, np.nan)
+    comb = np.nanmean(
+        np.interp(np.nan_to_num(lags, nan=0.0), np.arange(len(correlation)), correlation)
+        * np.where(np.isnan(lags), np.nan, 1.0),
+        axis=1,
+    )
+    prior = np.exp(-0.5 * np.log2(bpms / prior_bpm) ** 2)
+    best = int(np.argmax(comb * prior))
+    bpm = float(bpms[best])
+    period = float(periods[best])
+
+    # Phase: the offset within a beat whose comb lands on the strongest onsets.
+    phases = np.arange(0, period, 0.25)
+    beats = np.arange(int((len(onsets) - 1) // period))
+    positions = phases[:, None] + beats[None, :] * period
+    strength = np.interp(positions, np.arange(len(onsets)), onsets).sum(axis=1)
+    phase = float(phases[int(np.argmax(strength))])
+    offset = (envelope.start + phase / frame_rate) % (60 / bpm)
+    return TempoEstimate(round(bpm, 2), round(offset, 4), round(float(comb[best]), 3))
+
+
+# Bump when the analysis changes, so cached estimates are redone.
+ANALYSIS_VERSION = 1
+# Files read by PcmReader. Anything else is decoded by the mixer.
+_PCM_EXTENSIONS = (".wav", ".pcm", ".raw")
+
+
+def _open_audio(file_location):
+    if file_location.lower().endswith(_PCM_EXTENSIONS):
+        return PcmReader(file_location)
+    # Compressed music is decoded by SDL_mixer, which needs the mixer to be open.
+    from .music import FREQUENCY, decode_sample, wait_for_mixer  # avoid circular import
+
+    wait_for_mixer()
+    return ArrayReader(decode_sample(file_location), FREQUENCY)
+
+
+def analyze_tempo(file_location) -> TempoEstimate:
+    """
+    Estimate the tempo and first beat of a music file.
+
+    :param file_location: str
+        A WAV or raw PCM file, or music the mixer can decode once it is open.
+    :return: :ref:`TempoEstimate`
+        The estimated tempo.
+    """
+    with _open_audio(str(file_location)) as reader:
+        return estimate_tempo(onset_envelope(reader))
+
+
+class TempoCache:
+    """
+    Estimated tempos of music files, stored by the hash of their content.
+
+    Estimating the tempo decodes the whole song, so it is done once per file and kept
+    on disk. Renamed or copied files hit the cache, edited files do not.
+
+    Parameters
+    ----------
+    file_location: str
+        The JSON file the estimates are kept in.
+
+    Attributes
+    ----------
+    hits: int
+        How many estimates came from the cache.
+    misses: int
+        How many estimates had to be computed.
+    """
+
+    def __init__(self, file_location: str = ".cache/tempo.json"):
+        self.file_location = file_location
+        self.hits = 0
+        self.misses = 0
+        self._entries = None
+
+    @staticmethod
+    def file_hash(file_location) -> str:
+        """The hash of the content of a file."""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_location, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return f"{digest.hexdigest()}-{ANALYSIS_VERSION}"
+
+    def _read(self) -> dict:
+        try:
+            with open(self.file_location) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def _save(self):
+        directory = os.path.dirname(self.file_location)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Other processes, such as chart generation workers, may have added estimates.
+        self._entries = {**self._read(), **self._entries}
+        temporary = f"{self.file_location}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(temporary, self.file_location)
+
+    def get(self, file_location) -> TempoEstimate:
+        """
+        Get the tempo of a music file, estimating it if it is not cached.
+
+        :param file_location: str
+            The music file.
+        :return: :ref:`TempoEstimate`
+            The estimated tempo.
+        """
+        key = self.file_hash(file_location)
+        entries = self._load()
+        entry = entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            return TempoEstimate(**entry)
+        self.misses += 1
+        started = time.perf_counter()
+        estimate = analyze_tempo(file_location)
+        logger.info(
+            "Estimated %s at %s bpm, first beat at %.3f s (confidence %s) in %.2f s.",
+            file_location, estimate.bpm, estimate.offset, estimate.confidence, time.perf_counter() - started,
+        )
+        entries[key] = estimate._asdict()
+        self._save()
+        return estimate
+
+
+# The tempo cache shared by the game and the tools.
+tempo_cache = TempoCache()
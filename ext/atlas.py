@@ -0,0 +1,314 @@
+import ctypes
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import ppb
+from ppb.systems import Renderer
+from ppb.systems.sdl_utils import img_call, sdl_call
+from sdl2 import (
+    SDL_BLENDMODE_NONE,
+    SDL_PIXELFORMAT_ARGB8888,
+    SDL_BlitSurface,
+    SDL_ConvertSurfaceFormat,
+    SDL_CreateRGBSurfaceWithFormat,
+    SDL_FreeSurface,
+    SDL_Rect,
+    SDL_SetSurfaceBlendMode,
+)
+from sdl2.sdlimage import IMG_Load, IMG_SavePNG
+
+logger = logging.getLogger(__name__)
+
+# Transparent pixels between packed images, so scaled drawing does not bleed in neighbours.
+PADDING = 1
+
+
+class AtlasRegion(NamedTuple):
+    """Where an image is within the sheets of an atlas."""
+
+    sheet: int
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+def _normalize(path) -> str:
+    # "/assets/a.png" and "assets/a.png" are the same file to ppb.
+    return str(path).lstrip("/").replace(os.sep, "/")
+
+
+def _file_hash(path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+
+
+def pack(sizes: List[Tuple[int, int]], max_size: int = 2048, padding: int = PADDING) -> List[Tuple[int, int, int]]:
+    """
+    Pack rectangles into as few square sheets as possible, in shelves.
+
+    Rectangles are placed tallest first, left to right, starting a new shelf when
+    a row is full and a new sheet when a sheet is full.
+
+    :param sizes: List[Tuple[int, int]]
+        The (width, height) of every rectangle.
+    :param max_size: int
+        The width and height of a sheet.
+    :param padding: int
+        The empty pixels around every rectangle.
+    :return: List[Tuple[int, int, int]]
+        The (sheet, x, y) of every rectangle, in the order of ``sizes``.
+    """
+    placements = [None] * len(sizes)
+    order = sorted(range(len(sizes)), key=lambda idx: (-sizes[idx][1], -sizes[idx][0]))
+    sheet = x = y = shelf_height = 0
+    for idx in order:
+        width, height = sizes[idx][0] + 2 * padding, sizes[idx][1] + 2 * padding
+        if width > max_size or height > max_size:
+            raise ValueError(f"A {sizes[idx][0]}x{sizes[idx][1]} image does not fit in a {max_size} sheet.")
+        if x + width > max_size:
+            x, y, shelf_height = 0, y + shelf_height, 0
+        if y + height > max_size:
+            sheet, x, y, shelf_height = sheet + 1, 0, 0, 0
+        placements[idx] = (sheet, x + padding, y + padding)
+        x += width
+        shelf_height = max(shelf_height, height)
+    return placements
+
+
+def build_atlas(name: str, paths: Iterable[str], directory: str = "assets/atlas", max_size: int = 2048) -> dict:
+    """
+    Pack images into sheets and write them with their region index.
+
+    The index is written to ``<directory>/<name>.json`` and the sheets to
+    ``<directory>/<name>-<n>.png``. The directory is relative to the game, like every
+    asset, and needs to be within a package such as ``assets``.
+
+    :param name: str
+        The name of the atlas.
+    :param paths: Iterable[str]
+        The image files to pack.
+    :param directory: str
+        The directory to write the atlas to.
+    :param max_size: int
+        The largest width and height of a sheet.
+    :return: dict
+        The region index.
+    """
+    paths = [_normalize(path) for path in paths]
+    surfaces = []
+    try:
+        for path in paths:
+            loaded = img_call(IMG_Load, path.encode("utf-8"), _check_error=lambda rv: not rv)
+            # One pixel format for every image, so they can be copied as they are.
+            surfaces.append(sdl_call(
+                SDL_ConvertSurfaceFormat, loaded, SDL_PIXELFORMAT_ARGB8888, 0, _check_error=lambda rv: not rv
+            ))
+            SDL_FreeSurface(loaded)
+        sizes = [(surface.contents.w, surface.contents.h) for surface in surfaces]
+        placements = pack(sizes, max_size)
+
+        sheet_count = max((sheet for sheet, _, _ in placements), default=-1) + 1
+        extents = [[0, 0] for _ in range(sheet_count)]
+        for (sheet, x, y), (width, height) in zip(placements, sizes):
+            extents[sheet][0] = max(extents[sheet][0], x + width + PADDING)
+            extents[sheet][1] = max(extents[sheet][1], y + height + PADDING)
+
+        os.makedirs(directory, exist_ok=True)
+        # ppb loads files through the import system, so the directory has to be a package.
+        package = os.path.join(directory, "__init__.py")
+        if not os.path.isfile(package):
+            open(package, "w").close()
+        sheets = []
+        for sheet, (width, height) in enumerate(extents):
+            target = sdl_call(
+                SDL_CreateRGBSurfaceWithFormat, 0, width, height, 32, SDL_PIXELFORMAT_ARGB8888,
+                _check_error=lambda rv: not rv,
+            )
+            try:
+                for surface, (image_sheet, x, y), (image_width, image_height) in zip(surfaces, placements, sizes):
+                    if image_sheet != sheet:
+                        continue
+                    # Copy the pixels, alpha included, instead of blending them onto the sheet.
+                    SDL_SetSurfaceBlendMode(surface, SDL_BLENDMODE_NONE)
+                    rect = SDL_Rect(x, y, image_width, image_height)
+                    sdl_call(SDL_BlitSurface, surface, None, target, ctypes.byref(rect), _check_error=lambda rv: rv < 0)
+                sheet_path = os.path.join(directory, f"{name}-{sheet}.png")
+                img_call(IMG_SavePNG, target, sheet_path.encode("utf-8"), _check_error=lambda rv: rv < 0)
+            finally:
+                SDL_FreeSurface(target)
+            sheets.append(_normalize(sheet_path))
+    finally:
+        for surface in surfaces:
+            SDL_FreeSurface(surface)
+
+    index = {
+        "sheets": sheets,
+        "regions": {
+            path: [sheet, x, y, width, height, _file_hash(path)]
+            for path, (sheet, x, y), (width, height) in zip(paths, placements, sizes)
+        },
+    }
+    with open(os.path.join(directory, f"{name}.json"), "w") as f:
+        json.dump(index, f)
+    return index
+
+
+class AtlasImage:
+    """
+    An image that is a region of an atlas sheet. Used by sprites in place of ``ppb.Image``.
+
+    Every image of a sheet loads the same surface, so the renderer makes one texture
+    for all of them and draws only the region. Needs the :ref:`AtlasRenderer`.
+
+    Parameters
+    ----------
+    name: str
+        The file the image was packed from.
+    sheet: ppb.Image
+        The sheet the image is on.
+    region: :ref:`AtlasRegion`
+        Where the image is on the sheet.
+    """
+
+    def __init__(self, name: str, sheet: ppb.Image, region: AtlasRegion):
+        self.name = name
+        self.sheet = sheet
+        self.region = region
+
+    def __repr__(self):
+        return f"<{type(self).__name__} name={self.name!r} sheet={self.sheet.name!r} region={tuple(self.region)}>"
+
+    def load(self, timeout: float = None):
+        """Get the surface of the sheet. Blocks until it is loaded."""
+        return self.sheet.load(timeout)
+
+    def is_loaded(self) -> bool:
+        return self.sheet.is_loaded()
+
+
+class Atlas:
+    """
+    The region index of packed images, see :func:`build_atlas`.
+
+    Images that changed since they were packed are left out, so they load from their
+    own file until the atlas is built again.
+
+    Parameters
+    ----------
+    index_location: str
+        The index file of the atlas.
+
+    Attributes
+    ----------
+    sheets: List[str]
+        The sheet files.
+    regions: Dict[str, :ref:`AtlasRegion`]
+        The region of every packed file that did not change.
+    """
+
+    def __init__(self, index_location: str):
+        self.index_location = index_location
+        with open(index_location) as f:
+            index = json.load(f)
+        self.sheets: List[str] = index["sheets"]
+        self._sheets: Dict[int, ppb.Image] = {}
+        self.regions: Dict[str, AtlasRegion] = {}
+        stale = 0
+        for path, (sheet, x, y, width, height, digest) in index["regions"].items():
+            if not os.path.isfile(path) or _file_hash(path) != digest:
+                stale += 1
+                continue
+            self.regions[path] = AtlasRegion(sheet, x, y, width, height)
+        if stale:
+            logger.warning(
+                "%s images of %s changed since it was built, run python -m tools atlas.", stale, index_location
+            )
+
+    def __contains__(self, path):
+        return _normalize(path) in self.regions
+
+    def __len__(self):
+        return len(self.regions)
+
+    def image(self, path) -> Optional[AtlasImage]:
+        """
+        Get the atlas image of a packed file.
+
+        :param path: str
+            The file the image was packed from.
+        :return: Optional[:ref:`AtlasImage`]
+            The image, or None if the file is not in the atlas.
+        """
+        path = _normalize(path)
+        region = self.regions.get(path)
+        if region is None:
+            return None
+        sheet = self._sheets.get(region.sheet)
+        if sheet is None:
+            sheet = self._sheets[region.sheet] = ppb.Image(self.sheets[region.sheet])
+        return AtlasImage(path, sheet, region)
+
+
+class AtlasRenderer(Renderer):
+    """
+    A ppb Renderer that draws :ref:`AtlasImage` regions of a shared sheet texture.
+
+    Replaces ``ppb.systems.Renderer`` in the basic systems. Loads the atlases into the
+    shared :ref:`AssetRegistry`, so images of packed files are handed out as atlas
+    images. Draws like the default renderer if there are no atlases.
+
+    Parameters
+    ----------
+    atlases: Iterable[str]
+        The atlas index files. Missing ones are skipped.
+
+    Attributes
+    ----------
+    draws: int
+        The amount of sprites drawn.
+    frames: int
+        The amount of frames rendered.
+    """
+
+    def __init__(self, atlases: Iterable[str] = ("assets/atlas/sprites.json", "assets/atlas/background.json"),
+                 **kwargs):
+        super(AtlasRenderer, self).__init__(**kwargs)
+        self.draws = 0
+        self.frames = 0
+        from .registry import assets  # avoid circular import
+
+        for index_location in atlases:
+            if os.path.isfile(index_location):
+                atlas = Atlas(index_location)
+                assets.add_atlas(atlas)
+                logger.info("Atlas %s: %s images on %s sheets.", index_location, len(atlas), len(atlas.sheets))
+
+    @property
+    def texture_count(self) -> int:
+        """The amount of textures made."""
+        return len(self._texture_cache)
+
+    def on_render(self, render_event, signal):
+        self.frames += 1
+        super(AtlasRenderer, self).on_render(render_event, signal)
+
+    def compute_rectangles(self, texture, game_object, camera):
+        self.draws += 1
+        region = getattr(game_object.__image__(), "region", None)
+        if region is None:
+            return super(AtlasRenderer, self).compute_rectangles(texture, game_object, camera)
+
+        # The size of the region is known, so the texture is not queried like the default renderer does.
+        if hasattr(game_object, "width"):
+            obj_w, obj_h = game_object.width, game_object.height
+        else:
+            obj_w, obj_h = game_object.size
+        win_w, win_h = self.target_resolution(region.width, region.height, obj_w, obj_h, camera.pixel_ratio)
+        center = camera.translate_point_to_screen(game_object.position)
+        src_rect = SDL_Rect(x=region.x, y=region.y, w=region.width, h=region.height)
+        dest_rect = SDL_Rect(x=int(center.x - win_w / 2), y=int(center.y - win_h / 2), w=win_w, h=win_h)
+        return src_rect, dest_rect, ctypes.c_double(-game_object.rotation)
@@ -0,0 +1,127 @@
+from time import perf_counter
+from typing import Callable
+
+
+class SongClock:
+    """
+    A smooth song clock driven by the position reported by the mixer.
+
+    The mixer position is sampled once per frame with :meth:`sample`. In between,
+    :meth:`now` extrapolates from the last sample with ``perf_counter``, so every reader
+    gets sub-frame time without calling into the mixer. The mixer position is coarse
+    (especially for MP3), so drift between the clock and the mixer is corrected by
+    running the clock slightly faster or slower instead of snapping, unless the drift
+    is too large to be jitter.
+
+    Parameters
+    ----------
+    source: Callable[[], float]
+        Returns the position of the music in seconds. Called once per :meth:`sample`.
+    max_slew: float
+        How much faster or slower than real time the clock may run to correct drift.
+    catch_up: float
+        Seconds over which drift is corrected, as long as the slew allows it.
+    snap_threshold: float
+        Drift in seconds beyond which the clock jumps straight to the mixer position,
+        such as after a seek or a restart.
+    stall_after: float
+        Seconds without the mixer position moving after which the music is taken as
+        paused or finished, and the clock stops.
+    timer: Callable[[], float]
+        The high resolution timer to interpolate with.
+
+    Attributes
+    ----------
+    drift: float
+        The difference between the mixer and the clock at the last sample, in seconds.
+    samples: int
+        The amount of times the mixer was sampled.
+    snaps: int
+        The amount of times the clock jumped instead of being corrected gradually.
+    """
+
+    def __init__(
+        self,
+        source: Callable[[], float],
+        max_slew: float = 0.05,
+        catch_up: float = 0.5,
+        snap_threshold: float = 0.25,
+        stall_after: float = 0.25,
+        timer: Callable[[], float] = perf_counter,
+    ):
+        self.source = source
+        self.max_slew = max_slew
+        self.catch_up = catch_up
+        self.snap_threshold = snap_threshold
+        self.stall_after = stall_after
+        self._timer = timer
+        self.drift = 0.0
+        self.samples = 0
+        self.snaps = 0
+        self.reset()
+
+    def reset(self, position: float = 0.0):
+        """
+        Stop the clock at a position.
+
+        :param position: float
+            The position in seconds to stop at.
+        """
+        self._base = position
+        self._anchor = self._timer()
+        self._rate = 1.0
+        self._running = False
+        self._last_raw = None
+        self._raw_since = self._anchor
+
+    @property
+    def running(self) -> bool:
+        """Whether the clock is moving."""
+        return self._running
+
+    def now(self) -> float:
+        """The current position of the song in seconds. Does not call into the mixer."""
+        if not self._running:
+            return self._base
+        return self._base + (self._timer() - self._anchor) * self._rate
+
+    def sample(self) -> float:
+        """
+        Read the mixer position and steer the clock towards it. Call once per frame.
+
+        :return: float
+            The current position of the song in seconds.
+        """
+        raw = self.source()
+        moment = self._timer()
+        self.samples += 1
+
+        moved = raw != self._last_raw
+        if moved:
+            self._last_raw = raw
+            self._raw_since = moment
+
+        if not self._running:
+            if moved and raw > self._base:
+                # The mixer started moving past the position the clock was reset to.
+                self._base, self._anchor, self._rate, self._running = raw, moment, 1.0, True
+            return self._base
+
+        if moment - self._raw_since > self.stall_after:
+            # The mixer is not moving, so the music is paused or over.
+            self._base, self._anchor, self._running = raw, moment, False
+            self.drift = 0.0
+            return raw
+
+        position = self._base + (moment - self._anchor) * self._rate
+        drift = self.drift = raw - position
+        if abs(drift) > self.snap_threshold:
+            self.snaps += 1
+            position, rate = raw, 1.0
+        else:
+            # Run slightly fast or slow until the drift is gone, so the clock never jumps
+            # and never goes backwards.
+            slew = max(-self.max_slew, min(self.max_slew, drift / self.catch_up))
+            rate = 1.0 + slew
+        self._base, self._anchor, self._rate = position, moment, rate
+        return position
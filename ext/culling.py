@@ -0,0 +1,169 @@
+import functools
+import logging
+
+from .atlas import AtlasRenderer
+
+logger = logging.getLogger(__name__)
+
+
+def _has_image(game_object) -> bool:
+    # Objects without an image, such as the camera, are never drawn.
+    return hasattr(game_object, "__image__") and game_object.__image__() is not None
+
+
+def in_view(game_object, camera, margin: float = 0.0) -> bool:
+    """
+    Whether a sprite overlaps the view of a camera grown by a margin.
+
+    Sprites without sides are treated as points. Rotation is ignored, the margin
+    covers the corners of rotated sprites.
+
+    :param game_object: ppb.Sprite
+        The sprite to test.
+    :param camera: ppb.Camera
+        The camera to test against.
+    :param margin: float
+        How many game units outside the view still count as in view.
+    :return: bool
+        Whether the sprite is in view.
+    """
+    try:
+        left, right = game_object.left, game_object.right
+        top, bottom = game_object.top, game_object.bottom
+    except AttributeError:
+        position = getattr(game_object, "position", None)
+        if position is None:
+            return True
+        left = right = position.x
+        top = bottom = position.y
+    return (
+        right >= camera.left - margin
+        and left <= camera.right + margin
+        and top >= camera.bottom - margin
+        and bottom <= camera.top + margin
+    )
+
+
+class CullStats:
+    """
+    Counts the sprites drawn and culled every frame.
+
+    Attributes
+    ----------
+    drawn: int
+        Sprites drawn in the last frame.
+    culled: int
+        Sprites not drawn in the last frame because they were out of view.
+    skipped_updates: int
+        Updates of out of view :ref:`Cullable` sprites skipped in the last frame.
+    frames: int
+        The amount of frames counted.
+    """
+
+    def __init__(self):
+        self.drawn = self.culled = self.skipped_updates = 0
+        self.total_drawn = self.total_culled = self.total_skipped_updates = 0
+        self.frames = 0
+        self._drawn = self._culled = self._skipped_updates = 0
+
+    def next_frame(self):
+        """Finish counting a frame and start counting the next one."""
+        self.drawn, self.culled, self.skipped_updates = self._drawn, self._culled, self._skipped_updates
+        self.total_drawn += self._drawn
+        self.total_culled += self._culled
+        self.total_skipped_updates += self._skipped_updates
+        self._drawn = self._culled = self._skipped_updates = 0
+        self.frames += 1
+
+    @property
+    def stats(self) -> dict:
+        """The culling statistics, of the last frame and on average."""
+        frames = self.frames or 1
+        return {
+            "drawn": self.drawn,
+            "culled": self.culled,
+            "skipped_updates": self.skipped_updates,
+            "avg_drawn": round(self.total_drawn / frames, 1),
+            "avg_culled": round(self.total_culled / frames, 1),
+            "avg_skipped_updates": round(self.total_skipped_updates / frames, 1),
+        }
+
+
+# The counters of the culling renderer and of every Cullable sprite.
+cull_stats = CullStats()
+
+
+class Cullable:
+    """
+    A mixin for sprites whose ``on_update`` can be skipped while they are out of view.
+
+    Only for sprites whose update does nothing that matters off screen, such as
+    animating. Sprites moved by their own update would never come back into view.
+
+    Attributes
+    ----------
+    cull_updates: bool
+        Whether updates are skipped while out of view.
+    cull_margin: float
+        How many game units outside the view the sprite still gets updates.
+    """
+
+    cull_updates = True
+    cull_margin = 1.0
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        on_update = cls.__dict__.get("on_update")
+        if on_update is None:
+            return
+
+        @functools.wraps(on_update)
+        def culled_update(self, update_event, signal):
+            scene = update_event.scene
+            camera = getattr(scene, "main_camera", None)
+            if self.cull_updates and camera is not None and not in_view(self, camera, self.cull_margin):
+                cull_stats._skipped_updates += 1
+                return
+            return on_update(self, update_event, signal)
+
+        cls.on_update = culled_update
+
+
+class CullingRenderer(AtlasRenderer):
+    """
+    An :ref:`AtlasRenderer` that does not draw sprites outside the view of the camera.
+
+    Drawn and culled sprites are counted in ``cull_stats``.
+
+    Parameters
+    ----------
+    culling: bool
+        Whether to cull sprites out of view.
+    cull_margin: float
+        How many game units outside the view sprites are still drawn.
+    """
+
+    def __init__(self, culling: bool = True, cull_margin: float = 1.0, **kwargs):
+        super(CullingRenderer, self).__init__(**kwargs)
+        self.culling = culling
+        self.cull_margin = cull_margin
+        self._camera = None
+
+    def start_frame(self, scene):
+        """Start counting a frame drawn with the camera of a scene."""
+        cull_stats.next_frame()
+        self._camera = scene.main_camera
+
+    def on_render(self, render_event, signal):
+        self.start_frame(render_event.scene)
+        super(CullingRenderer, self).on_render(render_event, signal)
+
+    def prepare_resource(self, game_object):
+        if self.culling and self._camera is not None and not in_view(game_object, self._camera, self.cull_margin):
+            if _has_image(game_object):
+                cull_stats._culled += 1
+            return None
+        texture = super(CullingRenderer, self).prepare_resource(game_object)
+        if texture is not None:
+            cull_stats._drawn += 1
+        return texture
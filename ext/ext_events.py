@@ -18,3 +18,39 @@ class PauseMusic:
 @dataclass
 class StartVis:
     sound: "ppb.assetlib.Asset" = None
+
+
+@dataclass
+class Beat:
+    """A beat of the playing song was reached."""
+    number: int
+    beat: float
+    time: float
+    scene: "ppb.Scene" = None
+
+
+@dataclass
+class Bar:
+    """A bar of the playing song was reached."""
+    number: int
+    beat: float
+    time: float
+    scene: "ppb.Scene" = None
+
+
+@dataclass
+class Subdivision:
+    """A subdivision of a beat of the playing song was reached."""
+    number: int
+    beat: float
+    time: float
+    scene: "ppb.Scene" = None
+
+
+@dataclass
+class AudioLatency:
+    """The buffer latency of the audio output, in seconds."""
+    latency: float
+    chunk_size: int
+    frequency: int
+    scene: "ppb.Scene" = None
@@ -0,0 +1,223 @@
+import ctypes
+import logging
+from itertools import groupby
+
+from ppb.systems.renderer import SmartPointer
+from ppb.systems.sdl_utils import sdl_call
+from sdl2 import (
+    SDL_BLENDFACTOR_ONE,
+    SDL_BLENDFACTOR_ONE_MINUS_SRC_ALPHA,
+    SDL_BLENDMODE_NONE,
+    SDL_BLENDOPERATION_ADD,
+    SDL_FLIP_NONE,
+    SDL_PIXELFORMAT_ARGB8888,
+    SDL_TEXTUREACCESS_TARGET,
+    SDL_ComposeCustomBlendMode,
+    SDL_CreateTexture,
+    SDL_DestroyTexture,
+    SDL_GetRendererOutputSize,
+    SDL_RenderClear,
+    SDL_RenderCopy,
+    SDL_RenderCopyEx,
+    SDL_RenderPresent,
+    SDL_RenderTargetSupported,
+    SDL_SetRenderDrawColor,
+    SDL_SetRenderTarget,
+    SDL_SetTextureBlendMode,
+)
+
+from .culling import CullingRenderer, _has_image
+
+logger = logging.getLogger(__name__)
+
+# Sprites drawn onto a transparent target leave premultiplied colors, which are drawn with this.
+PREMULTIPLIED_BLEND = SDL_ComposeCustomBlendMode(
+    SDL_BLENDFACTOR_ONE, SDL_BLENDFACTOR_ONE_MINUS_SRC_ALPHA, SDL_BLENDOPERATION_ADD,
+    SDL_BLENDFACTOR_ONE, SDL_BLENDFACTOR_ONE_MINUS_SRC_ALPHA, SDL_BLENDOPERATION_ADD,
+)
+
+
+def _is_static(game_object) -> bool:
+    return bool(getattr(game_object, "static", False))
+
+
+class _CachedLayer:
+    __slots__ = ("texture", "signature")
+
+    def __init__(self, texture):
+        self.texture = texture
+        self.signature = None
+
+
+class LayerCacheRenderer(CullingRenderer):
+    """
+    A :ref:`CullingRenderer` that draws static sprites once into offscreen layers.
+
+    Sprites with a true ``static`` attribute that follow each other in the drawing order
+    form a layer. A layer is drawn into its own texture, and copied to the window every
+    frame until a sprite of it moves, resizes or shows another image (such as the next
+    frame of an animation), the camera moves or zooms, or sprites join or leave it.
+    The bottom layer is drawn onto the background color, so it is copied as it is.
+    Layers above other sprites are only cached by renderers with custom blend modes,
+    which are needed to draw them exactly.
+
+    Parameters
+    ----------
+    layer_cache: bool
+        Whether to cache static layers. Everything is drawn every frame if False, or
+        if the renderer can not draw into textures.
+
+    Attributes
+    ----------
+    layer_renders: int
+        How many times a layer was drawn into its texture.
+    layer_hits: int
+        How many times a layer was copied without drawing its sprites.
+    """
+
+    def __init__(self, layer_cache: bool = True, **kwargs):
+        super(LayerCacheRenderer, self).__init__(**kwargs)
+        self.layer_cache = layer_cache
+        self.layer_renders = 0
+        self.layer_hits = 0
+        self._layers = []
+        self._size = None
+        self._premultiplied = False
+
+    def __enter__(self):
+        super(LayerCacheRenderer, self).__enter__()
+        if self.layer_cache and not SDL_RenderTargetSupported(self.renderer):
+            logger.warning("The renderer can not draw into textures, static layers are not cached.")
+            self.layer_cache = False
+        elif self.layer_cache:
+            # Layers above other sprites are transparent, they are only cached if they can be drawn exactly.
+            probe = SmartPointer(sdl_call(
+                SDL_CreateTexture, self.renderer, SDL_PIXELFORMAT_ARGB8888, SDL_TEXTUREACCESS_TARGET, 1, 1,
+                _check_error=lambda rv: not rv
+            ), SDL_DestroyTexture)
+            self._premultiplied = SDL_SetTextureBlendMode(probe.inner, PREMULTIPLIED_BLEND) == 0
+            if not self._premultiplied:
+                logger.info("The renderer has no premultiplied blending, only the bottom layer is cached.")
+
+    def __exit__(self, *exc):
+        # The textures belong to the renderer, they go before it.
+        self._layers.clear()
+        super(LayerCacheRenderer, self).__exit__(*exc)
+
+    @property
+    def stats(self) -> dict:
+        """The layer cache statistics."""
+        return {
+            "layers": len(self._layers),
+            "layer_renders": self.layer_renders,
+            "layer_hits": self.layer_hits,
+            "draws": self.draws,
+            "frames": self.frames,
+        }
+
+    def on_render(self, render_event, signal):
+        if not self.layer_cache:
+            return super(LayerCacheRenderer, self).on_render(render_event, signal)
+        self.frames += 1
+        scene = render_event.scene
+        camera = scene.main_camera
+        self.start_frame(scene)
+        # Objects without an image are not drawn and do not split layers.
+        runs = [
+            (static, list(sprites))
+            for static, sprites in groupby(filter(_has_image, scene.sprite_layers()), key=_is_static)
+        ]
+        if not runs or not runs[0][0]:
+            # The bottom layer clears the window itself.
+            self.render_background(scene)
+
+        layer = 0
+        for position, (static, sprites) in enumerate(runs):
+            bottom = position == 0
+            if not static or not (bottom or self._premultiplied):
+                for game_object in sprites:
+                    self._draw(game_object, camera)
+                continue
+            self._draw_layer(layer, sprites, scene, camera, bottom)
+            layer += 1
+        sdl_call(SDL_RenderPresent, self.renderer)
+
+    def _draw(self, game_object, camera):
+        """Draw a sprite onto the current target, like the default renderer."""
+        texture = self.prepare_resource(game_object)
+        if texture is None:
+            return
+        src_rect, dest_rect, angle = self.compute_rectangles(texture.inner, game_object, camera)
+        sdl_call(
+            SDL_RenderCopyEx, self.renderer, texture.inner,
+            ctypes.byref(src_rect), ctypes.byref(dest_rect),
+            angle, None, SDL_FLIP_NONE,
+            _check_error=lambda rv: rv < 0
+        )
+
+    @staticmethod
+    def _signature(game_object):
+        """What a static sprite looks like. The layer is drawn again when it changes."""
+        image = game_object.__image__() if hasattr(game_object, "__image__") else None
+        surface = image.load() if image is not None else None
+        return (
+            id(game_object),
+            id(surface),
+            getattr(image, "region", None),
+            tuple(game_object.position),
+            getattr(game_object, "width", None),
+            getattr(game_object, "height", None),
+            getattr(game_object, "size", None),
+            game_object.rotation,
+            getattr(game_object, "opacity", 255),
+            tuple(getattr(game_object, "tint", (255, 255, 255))),
+        )
+
+    def _layer(self, index):
+        """Get the texture of a layer, made the size of the window."""
+        width, height = ctypes.c_int(), ctypes.c_int()
+        sdl_call(
+            SDL_GetRendererOutputSize, self.renderer, ctypes.byref(width), ctypes.byref(height),
+            _check_error=lambda rv: rv < 0
+        )
+        size = (width.value, height.value)
+        if size != self._size:
+            self._layers.clear()
+            self._size = size
+        while len(self._layers) <= index:
+            self._layers.append(_CachedLayer(SmartPointer(sdl_call(
+                SDL_CreateTexture, self.renderer, SDL_PIXELFORMAT_ARGB8888, SDL_TEXTUREACCESS_TARGET, *size,
+                _check_error=lambda rv: not rv
+            ), SDL_DestroyTexture)))
+        return self._layers[index]
+
+    def _draw_layer(self, index, sprites, scene, camera, bottom):
+        """Copy a layer of static sprites to the window, drawing it again if it changed."""
+        cached = self._layer(index)
+        signature = (
+            bottom,
+            tuple(scene.background_color) if bottom else None,
+            tuple(camera.position),
+            camera.width,
+            camera.height,
+            tuple(map(self._signature, sprites)),
+        )
+        texture = cached.texture.inner
+        if signature == cached.signature:
+            self.layer_hits += 1
+        else:
+            self.layer_renders += 1
+            sdl_call(SDL_SetRenderTarget, self.renderer, texture, _check_error=lambda rv: rv < 0)
+            if bottom:
+                self.render_background(scene)
+            else:
+                sdl_call(SDL_SetRenderDrawColor, self.renderer, 0, 0, 0, 0, _check_error=lambda rv: rv < 0)
+                sdl_call(SDL_RenderClear, self.renderer, _check_error=lambda rv: rv < 0)
+            for game_object in sprites:
+                self._draw(game_object, camera)
+            sdl_call(SDL_SetRenderTarget, self.renderer, None, _check_error=lambda rv: rv < 0)
+            cached.signature = signature
+
+        blend_mode = SDL_BLENDMODE_NONE if bottom else PREMULTIPLIED_BLEND
+        sdl_call(SDL_SetTextureBlendMode, texture, blend_mode, _check_error=lambda rv: rv < 0)
+        sdl_call(SDL_RenderCopy, self.renderer, texture, None, None, _check_error=lambda rv: rv < 0)
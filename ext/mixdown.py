@@ -0,0 +1,347 @@
+import logging
+import os
+import time
+import wave
+from typing import Dict, Iterable, Iterator, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Frames mixed at once. Memory stays at a few blocks whatever the length of the song.
+BLOCK_SIZE = 1 << 16
+
+
+def _to_channels(samples: np.ndarray, channels: int) -> np.ndarray:
+    """Up or down mix interleaved-frame samples to a channel count."""
+    if samples.shape[1] == channels:
+        return samples
+    if samples.shape[1] == 1:
+        return np.repeat(samples, channels, axis=1)
+    return np.repeat(samples.mean(axis=1, keepdims=True), channels, axis=1)
+
+
+def _resample(samples: np.ndarray, rate: int, frequency: int) -> np.ndarray:
+    """Linearly resample float samples from one rate to another."""
+    if rate == frequency or not len(samples):
+        return samples
+    length = int(round(len(samples) * frequency / rate))
+    source = np.arange(len(samples), dtype=np.float64)
+    target = np.arange(length, dtype=np.float64) * (rate / frequency)
+    return np.stack(
+        [np.interp(target, source, samples[:, channel]) for channel in range(samples.shape[1])], axis=1
+    ).astype(np.float32)
+
+
+def read_sample(file_location, frequency: int = 44100, channels: int = 2) -> np.ndarray:
+    """
+    Read a 16-bit WAV file as float samples in the int16 range.
+
+    :param file_location: str
+        The WAV file to read.
+    :param frequency: int
+        The sample rate to convert to.
+    :param channels: int
+        The channel count to convert to.
+    :return: np.ndarray
+        The float32 samples, one row per frame and one column per channel.
+    """
+    with wave.open(str(file_location)) as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{file_location} is not 16-bit PCM.")
+        raw = f.readframes(f.getnframes())
+        samples = np.frombuffer(raw, dtype="<i2").reshape(-1, f.getnchannels()).astype(np.float32)
+        rate = f.getframerate()
+    return _resample(_to_channels(samples, channels), rate, frequency)
+
+
+def load_note_samples(names: Iterable[str], directory: str = "assets/notes", frequency: int = 44100,
+                      channels: int = 2) -> Dict[str, np.ndarray]:
+    """
+    Read the sample of every note name from a directory.
+
+    Charts name notes "C#4" while the files are "c#4.wav", so files are matched
+    case-insensitively. Notes without a file map to an empty sample, as they play
+    nothing in game either.
+
+    :param names: Iterable[str]
+        The note names.
+    :param directory: str
+        The directory of the note samples.
+    :param frequency: int
+        The sample rate to convert to.
+    :param channels: int
+        The channel count to convert to.
+    :return: Dict[str, np.ndarray]
+        The samples of every note name.
+    """
+    files = {name.lower(): name for name in os.listdir(directory) if name.lower().endswith(".wav")}
+    samples = {}
+    for name in names:
+        file_name = files.get(f"{name.lower()}.wav")
+        if file_name is None:
+            if name != "blank":
+                logger.warning("No sample for note %r in %s.", name, directory)
+            samples[name] = np.zeros((0, channels), dtype=np.float32)
+        else:
+            samples[name] = read_sample(os.path.join(directory, file_name), frequency, channels)
+    return samples
+
+
+class PcmReader:
+    """
+    Reads decoded audio block by block.
+
+    Reads 16-bit WAV files, or raw signed 16-bit little-endian PCM for anything else,
+    such as the output of ``ffmpeg -i song.mp3 -f s16le -ar 44100 -ac 2 song.pcm``.
+
+    Parameters
+    ----------
+    file_location: str
+        The WAV or raw PCM file.
+    frequency: int
+        The sample rate of raw PCM. WAV files carry their own.
+    channels: int
+        The channel count of raw PCM. WAV files carry their own.
+
+    Attributes
+    ----------
+    frequency: int
+        The sample rate of the audio.
+    channels: int
+        The channel count of the audio.
+    frames: int
+        The length of the audio in frames.
+    """
+
+    def __init__(self, file_location, frequency: int = 44100, channels: int = 2):
+        self.file_location = str(file_location)
+        self._wave = None
+        self._file = None
+        with open(self.file_location, "rb") as f:
+            is_wave = f.read(4) == b"RIFF"
+        if is_wave:
+            self._wave = wave.open(self.file_location)
+            if self._wave.getsampwidth() != 2:
+                self._wave.close()
+                raise ValueError(f"{self.file_location} is not 16-bit PCM.")
+            self.frequency = self._wave.getframerate()
+            self.channels = self._wave.getnchannels()
+            self.frames = self._wave.getnframes()
+        else:
+            self._file = open(self.file_location, "rb")
+            self.frequency = frequency
+            self.channels = channels
+            self.frames = os.path.getsize(self.file_location) // (2 * channels)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read(self, frames: int) -> np.ndarray:
+        """
+        Read the next block.
+
+        :param frames: int
+            The most frames to read.
+        :return: np.ndarray
+            The int16 samples, one row per frame and one column per channel.
+            Shorter than asked at the end of the audio.
+        """
+        if self._wave is not None:
+            raw = self._wave.readframes(frames)
+        else:
+            raw = self._file.read(frames * 2 * self.channels)
+        usable = len(raw) - len(raw) % (2 * self.channels)
+        return np.frombuffer(raw[:usable], dtype="<i2").reshape(-1, self.channels)
+
+    def close(self):
+        if self._wave is not None:
+            self._wave.close()
+        if self._file is not None:
+            self._file.close()
+
+
+class ArrayReader:
+    """
+    Reads decoded audio held in memory block by block, like a :ref:`PcmReader`.
+
+    Parameters
+    ----------
+    samples: np.ndarray
+        The int16 samples, one row per frame and one column per channel.
+    frequency: int
+        The sample rate of the samples.
+    """
+
+    def __init__(self, samples: np.ndarray, frequency: int = 44100):
+        self._samples = samples
+        self._position = 0
+        self.frequency = frequency
+        self.channels = samples.shape[1]
+        self.frames = len(samples)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read(self, frames: int) -> np.ndarray:
+        """Read the next block of at most `frames` frames."""
+        block = self._samples[self._position:self._position + frames]
+        self._position += len(block)
+        return block
+
+    def close(self):
+        self._samples = self._samples[:0]
+
+
+class MixdownRenderer:
+    """
+    Renders the autoplay mix of a chart without a window or an audio device.
+
+    Every note sample is added at the exact frame of its time, the same way the
+    post mixer adds them in game, on top of the music. The song is mixed block by
+    block, so only the notes sounding within a block are touched and memory stays
+    bounded for songs of any length.
+
+    Parameters
+    ----------
+    chart: :ref:`Chart`
+        The chart to render. Its tempo must be known, from a tempo map or a bpm.
+    samples: Dict[str, np.ndarray]
+        The float32 sample of every note name, see :func:`load_note_samples`.
+    frequency: int
+        The sample rate of the samples and the output.
+    channels: int
+        The channel count of the samples and the output.
+    volume: float
+        The volume of the notes, from 0.0 to 1.0.
+    music_volume: float
+        The volume of the music, from 0.0 to 1.0.
+    block_size: int
+        The amount of frames mixed at once.
+    offset: float
+        Seconds into the music of beat 0, like the offset of the :ref:`Conductor`.
+
+    Attributes
+    ----------
+    stats: dict
+        The statistics of the last render.
+    """
+
+    def __init__(self, chart, samples: Dict[str, np.ndarray], frequency: int = 44100, channels: int = 2,
+                 volume: float = 1.0, music_volume: float = 1.0, block_size: int = BLOCK_SIZE,
+                 offset: float = 0.0):
+        if chart.tempo is None and len(chart):
+            # Without a tempo every note time is 0, and every note would be mixed at once.
+            raise ValueError(f"The tempo of {chart.name!r} is unknown, a bpm is needed to render it.")
+        self.chart = chart
+        self.frequency = frequency
+        self.channels = channels
+        self.volume = volume
+        self.music_volume = music_volume
+        self.block_size = block_size
+        self.offset = offset
+        self.stats = {}
+
+        # Only notes with a sound are mixed. Their columns are computed once, vectorized.
+        self._samples = [samples.get(name, np.zeros((0, channels), dtype=np.float32)) for name in chart.strings]
+        sample_lengths = np.array([len(sample) for sample in self._samples], dtype=np.int64)
+        note_ids = np.asarray(chart.note_ids, dtype=np.int64)
+        # Note times are song time, the output is music time.
+        starts = np.round((np.asarray(chart.seconds, dtype=np.float64) + offset) * frequency).astype(np.int64)
+        lengths = sample_lengths[note_ids] if len(note_ids) else np.zeros(0, dtype=np.int64)
+        audible = lengths > 0
+        order = np.argsort(starts[audible], kind="stable")
+        self._starts = starts[audible][order]
+        self._ends = self._starts + lengths[audible][order]
+        self._note_ids = note_ids[audible][order]
+        self._longest = int(lengths.max()) if len(lengths) else 0
+
+    @property
+    def frames(self) -> int:
+        """The frame the last note ends at."""
+        return int(self._ends.max()) if len(self._ends) else 0
+
+    def blocks(self, music: Optional[PcmReader] = None) -> Iterator[np.ndarray]:
+        """
+        Mix the song block by block.
+
+        :param music: Optional[:ref:`PcmReader`]
+            The decoded music to mix the notes onto, at the output frequency.
+        :return: Iterator[np.ndarray]
+            The int16 blocks, one row per frame and one column per channel.
+        """
+        if music is not None and music.frequency != self.frequency:
+            raise ValueError(f"The music is {music.frequency} Hz, expected {self.frequency} Hz.")
+        total = max(self.frames, music.frames if music is not None else 0)
+        starts, ends, note_ids = self._starts, self._ends, self._note_ids
+        mixed_notes = clipped = 0
+        peak = 0.0
+        block_start = 0
+        mixed = np.empty((self.block_size, self.channels), dtype=np.float32)
+        while block_start < total:
+            block_end = min(block_start + self.block_size, total)
+            frames = block_end - block_start
+            block = mixed[:frames]
+            block.fill(0.0)
+            if music is not None:
+                audio = music.read(frames)
+                block[:len(audio)] = _to_channels(audio, self.channels)
+                if self.music_volume != 1.0:
+                    block *= self.music_volume
+
+            # Notes are sorted by start, so the ones sounding in this block are a slice.
+            first = np.searchsorted(starts, block_start - self._longest, side="right")
+            last = np.searchsorted(starts, block_end, side="left")
+            sounding = first + np.flatnonzero(ends[first:last] > block_start)
+            for note in sounding:
+                start = starts[note]
+                sample = self._samples[note_ids[note]]
+                offset = max(start - block_start, 0)
+                position = max(block_start - start, 0)
+                count = min(frames - offset, len(sample) - position)
+                block[offset:offset + count] += sample[position:position + count] * self.volume
+                if start >= block_start:
+                    mixed_notes += 1
+
+            peak = max(peak, float(np.abs(block).max(initial=0.0)))
+            clipped += int(np.count_nonzero((block > 32767) | (block < -32768)))
+            np.clip(block, -32768, 32767, out=block)
+            yield block.astype(np.int16)
+            block_start = block_end
+
+        self.stats = {
+            "notes": mixed_notes,
+            "frames": total,
+            "seconds": round(total / self.frequency, 2),
+            "peak": round(peak / 32768, 3),
+            "clipped": clipped,
+        }
+
+    def render(self, file_location, music: Optional[PcmReader] = None) -> dict:
+        """
+        Render the song to a 16-bit WAV file.
+
+        :param file_location: str
+            The WAV file to write.
+        :param music: Optional[:ref:`PcmReader`]
+            The decoded music to mix the notes onto, at the output frequency.
+        :return: dict
+            The render statistics, also kept in ``stats``.
+        """
+        started = time.perf_counter()
+        with wave.open(str(file_location), "wb") as f:
+            f.setnchannels(self.channels)
+            f.setsampwidth(2)
+            f.setframerate(self.frequency)
+            for block in self.blocks(music):
+                f.writeframes(block.astype("<i2", copy=False).tobytes())
+        render_time = time.perf_counter() - started
+        self.stats["render_time"] = round(render_time, 3)
+        self.stats["speed"] = round(self.stats["seconds"] / render_time, 1) if render_time else 0.0
+        return self.stats
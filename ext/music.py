@@ -1,12 +1,19 @@
 import ctypes
+import os
+import threading
 import time
 import logging
+from collections import deque
+from typing import Optional
+
+import numpy as np
 from ppb import Sound
 from ppb.systems.sdl_utils import SdlSubSystem, mix_call, SdlMixerError
 from ppb.utils import LoggingMixin
 from sdl2 import (
     AUDIO_S16SYS,
 )
+from . import ext_events
 from sdl2.sdlmixer import (
     # Errors, https://www.libsdl.org/projects/SDL_mixer/docs/SDL_mixer_7.html#SEC7
     Mix_GetError,
@@ -21,7 +28,11 @@ from sdl2.sdlmixer import (
     Mix_OpenAudio,
     Mix_CloseAudio,
     Mix_QuerySpec,
+    Mix_AllocateChannels,
     # Samples https://www.libsdl.org/projects/SDL_mixer/docs/SDL_mixer_16.html#SEC16
+    Mix_LoadWAV,
+    Mix_FreeChunk,
+    Mix_VolumeChunk,
     Mix_LoadMUS,
     Mix_FreeMusic,
     Mix_GetMusicVolume,
@@ -31,7 +42,9 @@ from sdl2.sdlmixer import (
     Mix_PauseMusic,
     # Channels https://www.libsdl.org/projects/SDL_mixer/docs/SDL_mixer_25.html#SEC25
     music_finished,
+    mix_func,
     Mix_HookMusicFinished,
+    Mix_SetPostMix,
     Mix_PlayMusic,
     Mix_HaltMusic,
     # Other
@@ -41,6 +54,32 @@ from sdl2.sdlmixer import (
 
 logger = logging.getLogger(__name__)
 
+FREQUENCY = 44100
+# Chunk sizes in frames. One chunk of buffering is 93, 46, 23 and 12 ms at 44.1 kHz.
+LATENCY_PROFILES = {
+    "compatible": 4096,
+    "balanced": 2048,
+    "low": 1024,
+    "minimal": 512,
+}
+# Steps the chunk size down from the largest profile while no underruns are seen.
+AUTO = "auto"
+# The profile used unless another one is asked for.
+DEFAULT_LATENCY = "balanced"
+
+# Set by the MusicController once the mixer is open for good, cleared while it is not.
+# Music and sounds wait on it in their loading threads instead of polling the mixer.
+mixer_ready = threading.Event()
+# Seconds to wait on the mixer before warning that it may never open.
+MIXER_WAIT_WARNING = 5.0
+
+
+def wait_for_mixer():
+    """Block until the MusicController opened the mixer. Called in loading threads."""
+    if not mixer_ready.wait(MIXER_WAIT_WARNING):
+        logger.warning("Still waiting for the mixer to open, is the MusicController one of the systems?")
+        mixer_ready.wait()
+
 
 def query_spec():
     """
@@ -79,25 +118,18 @@ class Music(Sound):
 
     def _background(self):
         # Called in background thread
-        try:
-            # Try to open the file to see if it exists
-            file = open(self.name)
-        except FileNotFoundError:
+        if not os.path.isfile(self.name):
             if hasattr(self, "file_missing"):
                 logger.warning(
                     "File not found: %r. %s", self.name, self.not_found_message
                 )
                 return self.file_missing()
-            else:
-                raise
-        else:
-            # Because we only give the filename as a parameter, close the file
-            file.close()
-            return self.background_parse(self.name)
+            raise FileNotFoundError(self.name)
+        # SDL reads the file itself, only the filename is passed on.
+        return self.background_parse(self.name)
 
     def background_parse(self, name):
-        while not any(query_spec()):
-            time.sleep(0)
+        wait_for_mixer()
         # Convert str to bytes as this is expected for sdl2
         byte_name = bytes(name, encoding="utf-8")
         return mix_call(Mix_LoadMUS, byte_name, _check_error=lambda rv: not rv)
@@ -122,6 +154,438 @@ class Music(Sound):
         return mix_call(Mix_GetMusicPosition, self.load())
 
 
+class ReadySound(Sound):
+    """
+    A ppb.Sound that waits for the mixer to be ready instead of polling it.
+
+    Setting the volume before the sound is loaded does not block. The volume is
+    applied once the sound is loaded.
+    """
+
+    # Guards the volume between the loading thread and the game.
+    _volume_lock = threading.Lock()
+    _chunk = None
+    _pending_volume = None
+
+    def background_parse(self, data):
+        wait_for_mixer()
+        chunk = super().background_parse(data)
+        with self._volume_lock:
+            self._chunk = chunk
+            if self._pending_volume is not None:
+                mix_call(Mix_VolumeChunk, chunk, int(self._pending_volume * MIX_MAX_VOLUME))
+        return chunk
+
+    @property
+    def volume(self):
+        """
+        The volume setting of this chunk, from 0.0 to 1.0
+        """
+        return mix_call(Mix_VolumeChunk, self.load(), -1) / MIX_MAX_VOLUME
+
+    @volume.setter
+    def volume(self, value):
+        with self._volume_lock:
+            if self._chunk is None:
+                self._pending_volume = value
+            else:
+                mix_call(Mix_VolumeChunk, self._chunk, int(value * MIX_MAX_VOLUME))
+
+
+def decode_sample(name) -> np.ndarray:
+    """
+    Decode a sound file into the format of the open mixer.
+
+    :param name: str
+        The sound file to decode.
+    :return: np.ndarray
+        The int16 samples, one row per frame and one column per channel.
+    """
+    chunk = mix_call(Mix_LoadWAV, name.encode("utf-8"), _check_error=lambda rv: not rv)
+    try:
+        _, _, _, channels = query_spec()
+        length = chunk.contents.alen
+        raw = ctypes.string_at(chunk.contents.abuf, length)
+    finally:
+        Mix_FreeChunk(chunk)
+    return np.frombuffer(raw, dtype=np.int16).reshape(-1, channels.value).copy()
+
+
+class CallbackMonitor:
+    """
+    Times the audio callback to find underruns.
+
+    The callback should run once per chunk. A callback that comes much later than
+    a chunk's worth of time means the device ran dry, an underrun.
+
+    Parameters
+    ----------
+    tolerance: float
+        How many chunks may pass between callbacks before it counts as an underrun.
+    history: int
+        The amount of callback intervals to keep for the statistics.
+
+    Attributes
+    ----------
+    callbacks: int
+        The amount of callbacks timed.
+    underruns: int
+        The amount of late callbacks.
+    """
+
+    def __init__(self, tolerance: float = 1.75, history: int = 512):
+        self.tolerance = tolerance
+        self.callbacks = 0
+        self.underruns = 0
+        self.chunk_time = 0.0
+        self._intervals = deque(maxlen=history)
+        self._last = None
+
+    def reset(self):
+        """Forget every timed callback."""
+        self.callbacks = 0
+        self.underruns = 0
+        self._intervals.clear()
+        self._last = None
+
+    def tick(self, frames: int, frequency: int):
+        """Time a callback. Called in the audio thread."""
+        moment = time.perf_counter()
+        self.callbacks += 1
+        self.chunk_time = frames / frequency
+        if self._last is not None:
+            interval = moment - self._last
+            self._intervals.append(interval)
+            if interval > self.chunk_time * self.tolerance:
+                self.underruns += 1
+        self._last = moment
+
+    @property
+    def stats(self) -> dict:
+        """The callback timing statistics, in milliseconds."""
+        intervals = np.array(self._intervals) * 1000
+        return {
+            "callbacks": self.callbacks,
+            "underruns": self.underruns,
+            "chunk_ms": round(self.chunk_time * 1000, 2),
+            "mean_ms": round(float(intervals.mean()), 2) if len(intervals) else 0.0,
+            "jitter_ms": round(float(intervals.std()), 2) if len(intervals) else 0.0,
+            "max_ms": round(float(intervals.max()), 2) if len(intervals) else 0.0,
+        }
+
+
+class _Voice:
+    __slots__ = ("samples", "start", "position", "volume", "priority", "order", "offset")
+
+    def __init__(self, samples, start, volume, priority, order):
+        self.samples = samples
+        # The music frame to start at, or None to start right away.
+        self.start = start
+        self.position = 0
+        self.volume = volume
+        self.priority = priority
+        # When the voice was queued, older voices are stolen first.
+        self.order = order
+        # Where the voice starts within the chunk being mixed.
+        self.offset = 0
+
+
+class VoiceAllocator:
+    """
+    Hands out a limited amount of voices.
+
+    When every voice is taken, a new voice steals the oldest voice of the lowest
+    priority, as long as that priority is not above its own. Otherwise the new voice
+    is dropped.
+
+    Parameters
+    ----------
+    max_voices: int
+        The amount of voices that may sound at once.
+
+    Attributes
+    ----------
+    voices: List
+        The sounding voices.
+    steals: int
+        The amount of voices cut off to make room for a new one.
+    drops: int
+        The amount of voices that did not get to sound.
+    peak: int
+        The most voices that sounded at once.
+    """
+
+    #: Priorities. Hits by a player win over autoplayed notes, which win over cues.
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
+
+    def __init__(self, max_voices: int = 16):
+        self.max_voices = max_voices
+        self.voices = []
+        self.steals = 0
+        self.drops = 0
+        self.peak = 0
+
+    def __len__(self):
+        return len(self.voices)
+
+    def allocate(self, voice) -> bool:
+        """
+        Give a voice a place to sound.
+
+        :param voice: _Voice
+            The new voice.
+        :return: bool
+            Whether the voice got a place. False if it was dropped.
+        """
+        voices = self.voices
+        if len(voices) >= self.max_voices:
+            if not voices:
+                self.drops += 1
+                return False
+            victim = min(voices, key=lambda other: (other.priority, other.order))
+            if victim.priority > voice.priority:
+                self.drops += 1
+                return False
+            voices.remove(victim)
+            self.steals += 1
+        voices.append(voice)
+        self.peak = max(self.peak, len(voices))
+        return True
+
+    def retain(self, voices):
+        """Keep only the given voices, the others finished."""
+        self.voices = voices
+
+    def clear(self):
+        """Stop every voice."""
+        self.voices = []
+
+    @property
+    def stats(self) -> dict:
+        """The allocator statistics."""
+        return {
+            "voices": len(self.voices),
+            "max_voices": self.max_voices,
+            "peak": self.peak,
+            "steals": self.steals,
+            "drops": self.drops,
+        }
+
+
+class PostMixer:
+    """
+    Mixes decoded samples into the output stream at the sample they are scheduled for.
+
+    Sounds played through ppb start at the next frame. The post mixer instead runs
+    inside the SDL_mixer post-mix callback, after the music of a chunk is mixed, and
+    starts every voice at the offset within the chunk that matches its song time.
+
+    The game thread hands voices over through a deque, whose appends and pops are
+    atomic, so neither side ever waits on a lock. Everything else is only touched by
+    the audio thread.
+
+    Parameters
+    ----------
+    max_voices: int
+        The amount of voices that may sound at once, see :ref:`VoiceAllocator`.
+
+    Attributes
+    ----------
+    frequency: int
+        The sample rate of the mixer. Set when installed.
+    channels: int
+        The amount of output channels. Set when installed.
+    bank: Optional[:ref:`SampleBank`]
+        Where the samples of sound files come from. Set when installed.
+    allocator: :ref:`VoiceAllocator`
+        Decides which voices sound.
+    monitor: :ref:`CallbackMonitor`
+        Times the callbacks.
+    played: int
+        The amount of voices that started sounding.
+    offset: float
+        Seconds into the music of song time 0. Set by the :ref:`Conductor` when a song starts.
+    """
+
+    def __init__(self, max_voices: int = 16):
+        self.offset = 0.0
+        self.frequency = 0
+        self.channels = 0
+        self.bank = None
+        self.allocator = VoiceAllocator(max_voices)
+        self.monitor = CallbackMonitor()
+        self.played = 0
+        self._incoming = deque()
+        self._pending = []
+        self._callback = None
+        self._order = 0
+        # Music time, counted in frames of music mixed since the music started.
+        self._music_frames = 0
+        self._music_playing = False
+        self._music_paused = False
+        self._restart = False
+        self._generation = 0
+        self._mixed_generation = 0
+
+    @property
+    def active(self) -> bool:
+        """Whether the post mixer is installed in the mixer."""
+        return self._callback is not None
+
+    def install(self, bank=None):
+        """
+        Start mixing voices into the output. The mixer must be open.
+
+        :param bank: Optional[:ref:`SampleBank`]
+            Where the samples of sound files come from.
+        """
+        _, frequency, _, channels = query_spec()
+        self.frequency = frequency.value
+        self.channels = channels.value
+        self.bank = bank
+        self.monitor.reset()
+        # Keep a reference to the callback for as long as the mixer may call it.
+        self._callback = mix_func(self._mix)
+        Mix_SetPostMix(self._callback, None)
+
+    def uninstall(self):
+        """Stop mixing voices into the output."""
+        Mix_SetPostMix(mix_func(), None)
+        self._callback = None
+        self._incoming.clear()
+
+    def sample(self, name) -> np.ndarray:
+        """Get the decoded samples of a sound file."""
+        return self.bank.get(name)
+
+    def play(
+        self,
+        samples: np.ndarray,
+        at: Optional[float] = None,
+        volume: float = 1.0,
+        priority: int = VoiceAllocator.NORMAL,
+    ):
+        """
+        Queue a voice. Called from the game thread.
+
+        :param samples: np.ndarray
+            The decoded samples to play.
+        :param at: Optional[float]
+            The song time in seconds to start at. Right away if None or already passed.
+        :param volume: float
+            The volume from 0.0 to 1.0.
+        :param priority: int
+            How important the voice is when voices run out, see :ref:`VoiceAllocator`.
+        """
+        # The music is counted from its start, song time from `offset` seconds into it.
+        music_time = None if at is None else at + self.offset
+        self._incoming.append((self._generation, samples, music_time, volume, priority))
+
+    def clear(self):
+        """Drop every queued and sounding voice, such as when a song starts over."""
+        self._generation += 1
+
+    def music_started(self):
+        """The music started from the beginning, music time is 0 at the next chunk."""
+        self._restart = True
+        self._music_playing = True
+        self._music_paused = False
+
+    def music_stopped(self):
+        self._music_playing = False
+
+    def music_paused(self, paused: bool):
+        self._music_paused = paused
+
+    def _mix(self, _, stream, length):
+        # Called in the audio thread.
+        self.monitor.tick(length // (2 * self.channels), self.frequency)
+        try:
+            self._mix_chunk(stream, length)
+        except Exception:
+            logger.exception("Post mix failed.")
+
+    def _mix_chunk(self, stream, length):
+        if self._restart:
+            self._restart = False
+            self._music_frames = 0
+        chunk_start = self._music_frames
+        timeline = self._music_playing and not self._music_paused
+        allocator = self.allocator
+
+        generation = self._generation
+        if generation != self._mixed_generation:
+            self._mixed_generation = generation
+            allocator.clear()
+            self._pending = []
+        incoming = self._incoming
+        while incoming:
+            voice_generation, samples, at, volume, priority = incoming.popleft()
+            if voice_generation == generation:
+                start = None if at is None else round(at * self.frequency)
+                self._order += 1
+                self._pending.append(_Voice(samples, start, volume, priority, self._order))
+
+        channels = self.channels
+        frames = length // (2 * channels)
+        for voice in allocator.voices:
+            voice.offset = 0
+        starting = []
+        waiting = []
+        for voice in self._pending:
+            if voice.start is None:
+                voice.offset = 0
+                starting.append(voice)
+            elif timeline and voice.start - chunk_start < frames:
+                voice.offset = max(voice.start - chunk_start, 0)
+                starting.append(voice)
+            else:
+                waiting.append(voice)
+        # Start in song order, so stealing takes the voices that sounded longest.
+        starting.sort(key=lambda voice: voice.offset)
+        for voice in starting:
+            if allocator.allocate(voice):
+                self.played += 1
+
+        sounding = []
+        if allocator.voices:
+            output = np.ctypeslib.as_array(
+                ctypes.cast(stream, ctypes.POINTER(ctypes.c_int16)), shape=(frames, channels)
+            )
+            mixed = output.astype(np.float32)
+            for voice in allocator.voices:
+                offset = voice.offset
+                count = min(frames - offset, len(voice.samples) - voice.position)
+                mixed[offset:offset + count] += (
+                    voice.samples[voice.position:voice.position + count] * voice.volume
+                )
+                voice.position += count
+                if voice.position < len(voice.samples):
+                    sounding.append(voice)
+            np.clip(mixed, -32768, 32767, out=mixed)
+            output[:] = mixed
+
+        allocator.retain(sounding)
+        self._pending = waiting
+        if timeline:
+            self._music_frames += frames
+
+    @property
+    def stats(self) -> dict:
+        """The post mixer statistics."""
+        return {
+            "pending": len(self._pending),
+            "played": self.played,
+            **self.allocator.stats,
+            "underruns": self.monitor.underruns,
+        }
+
+
+post_mix = PostMixer()
+
+
 @music_finished
 def _filler_music_finished():
     pass
@@ -130,38 +594,126 @@ def _filler_music_finished():
 class MusicController(SdlSubSystem, LoggingMixin):
     """
     A controller for Music objects. To be added in the systems parameter of ppb.GameEngine.
+
+    The buffer latency of the chosen chunk size is signalled to the scene as an
+    :ref:`AudioLatency` event, so judgement can compensate for it.
+
+    Parameters
+    ----------
+    max_voices: int
+        The amount of note samples that may sound at once.
+    audio_latency: str
+        One of ``LATENCY_PROFILES``, ``"balanced"`` by default. ``"auto"`` steps the chunk
+        size down from the largest profile to ``"low"`` until the callback monitor sees
+        underruns. It blocks startup for half a second or so per size, and listens while
+        the game is not running yet, so it is opt-in.
+
+    Attributes
+    ----------
+    chunk_size: int
+        The chunk size the mixer was opened with, in frames.
+    latency: float
+        The buffer latency in seconds, one chunk.
+    ready_time: float
+        Seconds it took to open the mixer, until ``mixer_ready`` was set.
     """
 
-    def __init__(self, **kwargs):
+    # Seconds to listen for underruns per chunk size in auto mode.
+    PROBE_TIME = 0.25
+
+    def __init__(self, max_voices: int = 32, audio_latency: str = DEFAULT_LATENCY, **kwargs):
         super(MusicController, self).__init__(**kwargs)
+        if audio_latency != AUTO and audio_latency not in LATENCY_PROFILES:
+            raise ValueError(
+                f"Unknown audio latency {audio_latency!r}, expected {AUTO!r} or one of {sorted(LATENCY_PROFILES)}."
+            )
         self._current_music_playing = None
+        self.audio_latency = audio_latency
+        self.chunk_size = None
+        self.latency = 0.0
+        self.ready_time = 0.0
+        post_mix.allocator.max_voices = max_voices
 
-    def __enter__(self):
-        super().__enter__()
+    @staticmethod
+    def _open_audio(chunk_size):
         mix_call(
             Mix_OpenAudio,
-            44100,  # Sample frequency, 44.1 kHz is CD quality
+            FREQUENCY,  # Sample frequency, 44.1 kHz is CD quality
             AUDIO_S16SYS,  # Audio, 16-bit, system byte order. IDK is signed makes a difference
             2,  # Number of output channels, 2=stereo
-            4096,  # Chunk size. TBH, this is a magic knob number.
-            # ^^^^ Smaller is more CPU, larger is less responsive.
-            # A lot of the performance-related recommendations are so dated I'm
-            # not sure how much difference it makes.
+            chunk_size,  # Chunk size. Smaller is more CPU, larger is less responsive.
             _check_error=lambda rv: rv == -1,
         )
+
+    def _probe_chunk_size(self) -> int:
+        """Find the smallest chunk size down to the low profile that plays without underruns."""
+        # Smaller chunks leave too little time for the post mix callback once the game runs.
+        sizes = sorted(
+            (size for size in LATENCY_PROFILES.values() if size >= LATENCY_PROFILES["low"]), reverse=True
+        )
+        chosen = sizes[0]
+        for chunk_size in sizes:
+            self._open_audio(chunk_size)
+            post_mix.install()
+            # Listen for a handful of chunks at least.
+            time.sleep(max(self.PROBE_TIME, 8 * chunk_size / FREQUENCY))
+            monitor = post_mix.monitor
+            clean = monitor.callbacks > 2 and not monitor.underruns
+            logger.debug("Chunk size %s: %s", chunk_size, monitor.stats)
+            post_mix.uninstall()
+            mix_call(Mix_CloseAudio)
+            if not clean:
+                break
+            chosen = chunk_size
+        return chosen
+
+    def __enter__(self):
+        super().__enter__()
+        started = time.perf_counter()
+        mixer_ready.clear()
+        # ppb's SoundController opens the mixer first. Opening it again only counts
+        # another reference, so close it completely to pick the chunk size.
+        references = query_spec()[0]
+        channels = mix_call(Mix_AllocateChannels, -1) if references else 0
+        for _ in range(references):
+            mix_call(Mix_CloseAudio)
+        if self.audio_latency == AUTO:
+            self.chunk_size = self._probe_chunk_size()
+        else:
+            self.chunk_size = LATENCY_PROFILES[self.audio_latency]
+        # One reference for this controller, and the ones the other systems took back.
+        for _ in range(references + 1):
+            self._open_audio(self.chunk_size)
+        if channels:
+            mix_call(Mix_AllocateChannels, channels)
+        self.latency = self.chunk_size / FREQUENCY
+        logger.info(
+            "Audio opened with %s frame chunks, %.1f ms buffer latency.", self.chunk_size, self.latency * 1000
+        )
         mix_call(Mix_Init, MIX_INIT_FLAC | MIX_INIT_MOD | MIX_INIT_MP3 | MIX_INIT_OGG)
+        # Queued music and sounds load from here on, alongside the note samples.
+        mixer_ready.set()
+        self.ready_time = time.perf_counter() - started
+        logger.info("Mixer ready after %.0f ms.", self.ready_time * 1000)
 
         logger.debug("MusicController")
         logger.debug(query_spec())
 
-        self.allocated_channels = 16
-
         # Register callback, keeping reference for later cleanup
         self._finished_callback = music_finished(self._on_music_finished)
         mix_call(Mix_HookMusicFinished, self._finished_callback)
 
+        # Decode every note once, then mix them straight into the output at their song time.
+        from .samples import sample_bank  # avoid circular import
+
+        post_mix.install(bank=sample_bank)
+        sample_bank.load(frequency=post_mix.frequency)
+
     def __exit__(self, *exc):
-        # Unregister callback and release reference
+        mixer_ready.clear()
+        # Unregister callbacks and release references
+        post_mix.uninstall()
+        logger.info("PostMixer %s", post_mix.stats)
         mix_call(Mix_HookMusicFinished, _filler_music_finished)
         self._finished_callback = None
         # Cleanup SDL_mixer
@@ -169,6 +721,9 @@ class MusicController(SdlSubSystem, LoggingMixin):
         mix_call(Mix_Quit)
         super().__exit__(*exc)
 
+    def on_scene_started(self, event, signal):
+        signal(ext_events.AudioLatency(self.latency, self.chunk_size, FREQUENCY))
+
     def on_play_music(self, event, signal):
         sound = event.music
         music = event.music.load()
@@ -180,6 +735,7 @@ class MusicController(SdlSubSystem, LoggingMixin):
             raise
         else:
             self._current_music_playing = sound
+            post_mix.music_started()
 
     def on_stop_music(self, event, signal):
         try:
@@ -188,12 +744,16 @@ class MusicController(SdlSubSystem, LoggingMixin):
             raise
         else:
             self._current_music_playing = None
+            post_mix.music_stopped()
 
     def on_pause_music(self, event, signal):
         if mix_call(Mix_PausedMusic):
             mix_call(Mix_ResumeMusic)
+            post_mix.music_paused(False)
         else:
             mix_call(Mix_PauseMusic)
+            post_mix.music_paused(True)
 
     def _on_music_finished(self):
         self._current_music_playing = None
+        post_mix.music_stopped()
@@ -0,0 +1,296 @@
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional
+
+import ppb
+from ppb.features.animation import Animation, FILE_PATTERN
+
+from .music import ReadySound
+from .scaling import ScaledImage, png_size
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("asset", "references", "size")
+
+    def __init__(self, asset, size):
+        self.asset = asset
+        self.references = 0
+        self.size = size
+
+
+class AssetRegistry:
+    """
+    A registry of shared assets. Hands out one asset per file instead of one per sprite.
+
+    Assets are reference counted. Assets that are no longer referenced stay cached until
+    the registry goes over its budget, at which point the least recently used ones are
+    evicted. Images of files packed into an added :ref:`Atlas` are handed out as regions
+    of its sheets, and images asked for with a size are shrunk by the ``scaler``.
+
+    Parameters
+    ----------
+    budget: Optional[int]
+        The amount of bytes unreferenced assets may take before being evicted. Images
+        count as their decoded pixels (4 bytes each), read from the PNG header or atlas
+        region, other assets as their file size. No limit if None.
+
+    Attributes
+    ----------
+    budget: Optional[int]
+        The amount of bytes unreferenced assets may take before being evicted.
+    hits: int
+        How many lookups were served by an already loaded asset.
+    misses: int
+        How many lookups had to load (decode) a new asset.
+    evictions: int
+        How many assets were evicted to stay within the budget.
+    scaler: Optional[:ref:`ImageScaler`]
+        Shrinks images to the size they are drawn at. Set by the ImageScaler system.
+    """
+
+    def __init__(self, budget: Optional[int] = None):
+        self.budget = budget
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.scaler = None
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._keys = {}
+        # The amount of cached assets of every file, for membership tests.
+        self._paths = {}
+        # Sized image keys the scaler did not shrink. They share the entry of the file itself.
+        self._unscaled = set()
+        self._atlases = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, path):
+        return self._normalize(path) in self._paths
+
+    @staticmethod
+    def _normalize(path) -> str:
+        # "/assets/a.png" and "assets/a.png" are the same file to ppb.
+        return str(path).lstrip("/")
+
+    def _key(self, path, kind, size) -> tuple:
+        key = (kind, self._normalize(path), size)
+        return (kind, key[1], None) if key in self._unscaled else key
+
+    @staticmethod
+    def _asset_size(asset, path) -> int:
+        """Estimate the bytes an asset takes once decoded."""
+        region = getattr(asset, "region", None)
+        if region is not None:
+            return region.width * region.height * 4
+        try:
+            if isinstance(asset, ScaledImage):
+                # Scaled images may not be written yet, their size is known beforehand.
+                return asset.pixels[0] * asset.pixels[1] * 4
+            if isinstance(asset, ppb.Image):
+                pixels = png_size(path)
+                if pixels is not None:
+                    return pixels[0] * pixels[1] * 4
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def get(self, path, kind=ppb.Image, size=None):
+        """
+        Get the asset of a file without taking a reference.
+
+        :param path: str
+            The file of the asset.
+        :param kind: Type[ppb.assetlib.Asset]
+            The asset type to load the file as.
+        :param size: Optional[Tuple[float, float]]
+            The width and height in game units an image is drawn at.
+        :return: ppb.assetlib.Asset
+            The shared asset.
+        """
+        key = self._key(path, kind, size)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry.asset
+
+        asset = None
+        if kind is ppb.Image and key[2] is not None:
+            asset = self.scaler.image(key[1], size) if self.scaler is not None else None
+            if asset is None:
+                # ppb hands out one image per file, so an image that is not shrunk is
+                # filed once, under the file itself, and counted once against the budget.
+                self._unscaled.add(key)
+                return self.get(path, kind)
+        self.misses += 1
+        if kind is ppb.Image and asset is None:
+            asset = next(filter(None, (atlas.image(key[1]) for atlas in self._atlases)), None)
+        if asset is None:
+            asset = kind(key[1])
+        entry = _Entry(asset, self._asset_size(asset, key[1]))
+        self._entries[key] = entry
+        self._keys[id(entry.asset)] = key
+        self._paths[key[1]] = self._paths.get(key[1], 0) + 1
+        self._evict()
+        return entry.asset
+
+    def acquire(self, path, kind=ppb.Image, size=None):
+        """
+        Get the asset of a file and take a reference to it.
+
+        Every acquire should be paired with a :meth:`release`.
+
+        :param path: str
+            The file of the asset.
+        :param kind: Type[ppb.assetlib.Asset]
+            The asset type to load the file as.
+        :param size: Optional[Tuple[float, float]]
+            The width and height in game units an image is drawn at.
+        :return: ppb.assetlib.Asset
+            The shared asset.
+        """
+        asset = self.get(path, kind, size)
+        self._entries[self._keys[id(asset)]].references += 1
+        return asset
+
+    def release(self, asset):
+        """
+        Drop a reference taken with :meth:`acquire`.
+
+        :param asset: ppb.assetlib.Asset
+            The asset to release. None is ignored.
+        """
+        if asset is None:
+            return
+        key = self._keys.get(id(asset))
+        if key is None:
+            return
+        entry = self._entries[key]
+        entry.references = max(entry.references - 1, 0)
+        if not entry.references:
+            self._evict()
+
+    def add_atlas(self, atlas):
+        """
+        Hand out the images of the files packed into an atlas as regions of its sheets.
+
+        Images already handed out are not replaced.
+
+        :param atlas: :ref:`Atlas`
+            The atlas to add.
+        """
+        self._atlases.append(atlas)
+
+    def image(self, path, size=None) -> ppb.Image:
+        """Acquire a shared image, shrunk to `size` game units if the scaler is set."""
+        return self.acquire(path, ppb.Image, size)
+
+    def sound(self, path) -> ReadySound:
+        """Acquire a shared sound. It waits for the mixer instead of polling it."""
+        return self.acquire(path, ReadySound)
+
+    def animation(self, filename, frames_per_second, size=None) -> "SharedAnimation":
+        """Create an animation whose frames are shared images, shrunk to `size` game units."""
+        return SharedAnimation(filename, frames_per_second, registry=self, size=size)
+
+    def references(self, path, kind=ppb.Image, size=None) -> int:
+        """Get the amount of references to the asset of a file."""
+        entry = self._entries.get(self._key(path, kind, size))
+        return entry.references if entry else 0
+
+    @property
+    def size(self) -> int:
+        """The estimated bytes of all cached assets."""
+        return sum(entry.size for entry in self._entries.values())
+
+    def _evict(self):
+        """Evict the least recently used unreferenced assets until within the budget."""
+        if self.budget is None:
+            return
+        unreferenced = sum(
+            entry.size for entry in self._entries.values() if not entry.references
+        )
+        for key in list(self._entries):
+            if unreferenced <= self.budget:
+                break
+            entry = self._entries[key]
+            if entry.references:
+                continue
+            del self._entries[key]
+            del self._keys[id(entry.asset)]
+            self._paths[key[1]] -= 1
+            if not self._paths[key[1]]:
+                del self._paths[key[1]]
+            unreferenced -= entry.size
+            self.evictions += 1
+
+    def clear(self):
+        """Forget every cached asset."""
+        self._entries.clear()
+        self._keys.clear()
+        self._paths.clear()
+        self._unscaled.clear()
+
+    @property
+    def stats(self) -> dict:
+        """The registry statistics."""
+        return {
+            "assets": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def log_stats(self):
+        """Log the registry statistics."""
+        logger.info("AssetRegistry %s", self.stats)
+
+
+class SharedAnimation(Animation):
+    """
+    An Animation that takes its frames from an :ref:`AssetRegistry`.
+
+    Parameters
+    ----------
+    filename: str
+        A path containing a ``{2..4}`` indicating the frame number.
+    frames_per_second: float
+        The number of frames to show each second.
+    registry: :ref:`AssetRegistry`
+        The registry to take the frames from.
+    size: Optional[Tuple[float, float]]
+        The width and height in game units the frames are drawn at.
+    """
+
+    def __init__(self, filename, frames_per_second, registry=None, size=None):
+        self._registry = registry or assets
+        self._size = size
+        super(SharedAnimation, self).__init__(filename, frames_per_second)
+
+    def copy(self):
+        return type(self)(self._filename, self.frames_per_second, registry=self._registry, size=self._size)
+
+    @property
+    def region(self):
+        """The atlas region of the current frame, None if it is not packed."""
+        return getattr(self._frames[self.current_frame], "region", None)
+
+    def _compile_filename(self):
+        match = FILE_PATTERN.search(self._filename)
+        start, end = match.groups()
+        numdigits = min(len(start), len(end))
+        template = FILE_PATTERN.sub("{:0%dd}" % numdigits, self._filename)
+        for frame in self._frames:
+            self._registry.release(frame)
+        self._frames = [
+            self._registry.image(template.format(n), self._size) for n in range(int(start), int(end) + 1)
+        ]
+
+
+# The registry shared by the game.
+assets = AssetRegistry()
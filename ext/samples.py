@@ -0,0 +1,128 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+from ppb.systems.sdl_utils import SdlMixerError
+
+from .music import decode_sample
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_EXTENSIONS = (".wav", ".ogg", ".flac", ".mp3")
+
+
+class SampleBank:
+    """
+    Decoded note samples, ready to be mixed.
+
+    Every sound file of a directory is decoded to PCM in the format of the open mixer
+    once, in parallel, so nothing is decoded while a song plays.
+
+    Parameters
+    ----------
+    directory: str
+        The directory to decode the sound files of.
+    workers: Optional[int]
+        The amount of decoding threads. Picked by the thread pool if None.
+
+    Attributes
+    ----------
+    load_time: float
+        Seconds the last :meth:`load` took.
+    misses: int
+        The amount of samples that had to be decoded on demand after loading.
+    """
+
+    def __init__(self, directory: str = "assets/notes", workers: Optional[int] = None):
+        self.directory = directory
+        self.workers = workers
+        self.load_time = 0.0
+        self.misses = 0
+        self._samples: Dict[str, np.ndarray] = {}
+        self._frequency = 44100
+
+    def __len__(self):
+        return len(self._samples)
+
+    def __contains__(self, name):
+        return self._normalize(name) in self._samples
+
+    @staticmethod
+    def _normalize(name) -> str:
+        # "/assets/a.wav" and "assets/a.wav" are the same file to ppb. Charts name notes
+        # "C#4" while the files are "c#4.wav", so names are matched case-insensitively.
+        return str(name).lstrip("/").lower()
+
+    def load(self, frequency: int = 44100):
+        """
+        Decode every sound file in the directory. The mixer must be open.
+
+        :param frequency: int
+            The sample rate of the mixer. Only used to report the length of the samples.
+        """
+        self._frequency = frequency
+        names = sorted(
+            os.path.join(self.directory, name).replace(os.sep, "/")
+            for name in os.listdir(self.directory)
+            if name.lower().endswith(SAMPLE_EXTENSIONS)
+        )
+        started = time.perf_counter()
+        # Decoding happens in SDL, outside the GIL, so threads decode in parallel.
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for name, samples in zip(names, executor.map(decode_sample, names)):
+                self._samples[self._normalize(name)] = samples
+        self.load_time = time.perf_counter() - started
+        self.log_stats()
+
+    def get(self, name) -> np.ndarray:
+        """
+        Get the samples of a sound file, decoding it if it was not loaded.
+        Files that cannot be decoded are logged and play silence.
+
+        :param name: str
+            The sound file.
+        :return: np.ndarray
+            The int16 samples, one row per frame and one column per channel.
+        """
+        key = self._normalize(name)
+        samples = self._samples.get(key)
+        if samples is None:
+            self.misses += 1
+            try:
+                samples = decode_sample(str(name).lstrip("/"))
+            except SdlMixerError as error:
+                logger.warning("Could not decode %r: %s", name, error)
+                samples = np.zeros((0, 2), dtype=np.int16)
+            self._samples[key] = samples
+        return samples
+
+    def clear(self):
+        """Forget every sample."""
+        self._samples.clear()
+
+    @property
+    def nbytes(self) -> int:
+        """The memory taken by the samples in bytes."""
+        return sum(samples.nbytes for samples in self._samples.values())
+
+    @property
+    def stats(self) -> dict:
+        """The sample bank statistics."""
+        frames = sum(len(samples) for samples in self._samples.values())
+        return {
+            "samples": len(self._samples),
+            "bytes": self.nbytes,
+            "seconds": round(frames / self._frequency, 2),
+            "load_time": round(self.load_time, 3),
+            "misses": self.misses,
+        }
+
+    def log_stats(self):
+        """Log the sample bank statistics."""
+        logger.info("SampleBank %s", self.stats)
+
+
+sample_bank = SampleBank()
@@ -0,0 +1,239 @@
+import ctypes
+import logging
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import ppb
+from ppb.systems import Renderer
+from ppb.systems.renderer import DEFAULT_RESOLUTION
+from ppb.systems.sdl_utils import img_call, sdl_call
+from ppb.systemslib import System
+from sdl2 import (
+    SDL_BLENDMODE_BLEND,
+    SDL_PIXELFORMAT_ARGB8888,
+    SDL_ConvertSurfaceFormat,
+    SDL_CreateRGBSurfaceWithFormat,
+    SDL_FreeSurface,
+    SDL_SetSurfaceBlendMode,
+)
+from sdl2.sdlimage import IMG_Load, IMG_SavePNG
+
+from .atlas import _file_hash
+
+logger = logging.getLogger(__name__)
+
+# The source file and pixel size of every scaled image, by cache file. Set before the image starts loading.
+_sources: Dict[str, Tuple[str, Tuple[int, int]]] = {}
+
+
+def png_size(path) -> Optional[Tuple[int, int]]:
+    """Read the size of a PNG file from its header, without decoding it."""
+    with open(path, "rb") as f:
+        header = f.read(24)
+    if len(header) < 24 or header[:8] != b"\x89PNG\r\n\x1a\n":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+def _area_weights(source: int, target: int) -> np.ndarray:
+    """The share of every source pixel in every target pixel when shrinking a row of pixels."""
+    edges = np.arange(target + 1, dtype=np.float64) * (source / target)
+    pixels = np.arange(source, dtype=np.float64)
+    overlap = (
+        np.minimum(edges[1:, None], pixels[None, :] + 1) - np.maximum(edges[:-1, None], pixels[None, :])
+    ).clip(0.0)
+    return (overlap / overlap.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def _surface_pixels(surface) -> np.ndarray:
+    """A view of the pixels of an ARGB8888 surface, one row per line and 4 bytes per pixel."""
+    contents = surface.contents
+    buffer = ctypes.cast(contents.pixels, ctypes.POINTER(ctypes.c_uint8))
+    rows = np.ctypeslib.as_array(buffer, shape=(contents.h, contents.pitch))
+    return rows[:, :contents.w * 4].reshape(contents.h, contents.w, 4)
+
+
+def scale_image(source, size: Tuple[int, int], output=None):
+    """
+    Shrink an image by averaging the source pixels covered by every target pixel.
+
+    Colors are weighted by their alpha, so transparent pixels do not darken the edges.
+
+    :param source: str
+        The image file to shrink.
+    :param size: Tuple[int, int]
+        The width and height to shrink to.
+    :param output: Optional[str]
+        The PNG file to save the result to.
+    :return: POINTER(SDL_Surface)
+        The shrunk surface. The caller frees it.
+    """
+    loaded = img_call(IMG_Load, str(source).encode("utf-8"), _check_error=lambda rv: not rv)
+    try:
+        converted = sdl_call(
+            SDL_ConvertSurfaceFormat, loaded, SDL_PIXELFORMAT_ARGB8888, 0, _check_error=lambda rv: not rv
+        )
+    finally:
+        SDL_FreeSurface(loaded)
+    try:
+        pixels = _surface_pixels(converted).astype(np.float32)
+    finally:
+        SDL_FreeSurface(converted)
+
+    # ARGB8888 is stored as B, G, R, A bytes.
+    alpha = pixels[..., 3:4]
+    pixels[..., :3] *= alpha / 255
+    height, width = pixels.shape[:2]
+    target_width, target_height = size
+    rows = _area_weights(height, target_height) @ pixels.reshape(height, width * 4)
+    scaled = rows.reshape(target_height, width, 4).transpose(0, 2, 1) @ _area_weights(width, target_width).T
+    scaled = scaled.transpose(0, 2, 1)
+    alpha = scaled[..., 3:4]
+    np.divide(scaled[..., :3] * 255, alpha, out=scaled[..., :3], where=alpha > 0)
+
+    surface = sdl_call(
+        SDL_CreateRGBSurfaceWithFormat, 0, target_width, target_height, 32, SDL_PIXELFORMAT_ARGB8888,
+        _check_error=lambda rv: not rv,
+    )
+    _surface_pixels(surface)[:] = np.rint(scaled).clip(0, 255).astype(np.uint8)
+    sdl_call(SDL_SetSurfaceBlendMode, surface, SDL_BLENDMODE_BLEND, _check_error=lambda rv: rv < 0)
+    if output is not None:
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        # Written aside then moved, so a game started at the same time never reads half a file.
+        partial = f"{output}.{os.getpid()}.tmp"
+        img_call(IMG_SavePNG, surface, partial.encode("utf-8"), _check_error=lambda rv: rv < 0)
+        os.replace(partial, output)
+    return surface
+
+
+class ScaledImage(ppb.Image):
+    """
+    An image shrunk to the size it is drawn at, see :ref:`ImageScaler`.
+
+    Loaded from the scaled cache file it is named after. The first time, the source is
+    shrunk and saved to it instead, in the asset loading thread.
+    """
+
+    @property
+    def source(self) -> str:
+        """The image file this image is shrunk from."""
+        return _sources[self.name][0]
+
+    @property
+    def pixels(self) -> Tuple[int, int]:
+        """The width and height in pixels this image is shrunk to, known before it is loaded."""
+        return _sources[self.name][1]
+
+    def _background(self):
+        # Called in background thread
+        if os.path.isfile(self.name):
+            with open(self.name, "rb") as f:
+                return self.background_parse(f.read())
+        source, size = _sources[self.name]
+        logger.info("Scaling %s to %sx%s.", source, *size)
+        return scale_image(source, size, self.name)
+
+
+class ImageScaler(System):
+    """
+    Shrinks images to the size they are drawn at for the resolution of the game.
+
+    Images larger on disk than on screen are shrunk once and kept in a cache directory
+    per resolution, named after the hash of their source file. Later runs load the small
+    copy, which takes less time to decode and less texture memory. Changing the
+    resolution or the source file makes a new copy. Images drawn at their size or
+    larger are loaded as they are.
+
+    Sets itself as the scaler of the shared :ref:`AssetRegistry`, so sprites asking it
+    for an image with a size get the shrunk image.
+
+    Parameters
+    ----------
+    resolution: Tuple[int, int]
+        The window size in pixels.
+    target_camera_width: float
+        The width of the camera in game units, as given to the renderer.
+    scaled_cache: str
+        The directory to keep the shrunk images in.
+
+    Attributes
+    ----------
+    generated: int
+        How many images had no shrunk copy yet.
+    reused: int
+        How many images were loaded from the cache.
+    """
+
+    def __init__(self, resolution=DEFAULT_RESOLUTION, target_camera_width=25, scaled_cache=".cache/scaled",
+                 **kwargs):
+        super(ImageScaler, self).__init__(**kwargs)
+        self.resolution = tuple(resolution)
+        self.target_camera_width = target_camera_width
+        self.directory = os.path.join(scaled_cache, "{}x{}".format(*self.resolution))
+        self.generated = 0
+        self.reused = 0
+        self._hashes = {}
+        from .registry import assets  # avoid circular import
+
+        assets.scaler = self
+
+    @property
+    def pixel_ratio(self) -> float:
+        """The pixels per game unit, like the main camera of a scene."""
+        return self.resolution[0] / self.target_camera_width
+
+    def drawn_size(self, path, size) -> Optional[Tuple[int, int]]:
+        """
+        Get the pixel size an image would be shrunk to.
+
+        :param path: str
+            The image file.
+        :param size: Tuple[float, float]
+            The width and height of the sprite in game units.
+        :return: Optional[Tuple[int, int]]
+            The size it is drawn at, or None if it is not drawn smaller than its file.
+        """
+        image_size = png_size(path)
+        if image_size is None:
+            return None
+        image_width, image_height = image_size
+        width, height = Renderer.target_resolution(image_width, image_height, *size, self.pixel_ratio)
+        if width >= image_width or height >= image_height or not width or not height:
+            return None
+        return width, height
+
+    def image(self, path, size) -> Optional[ScaledImage]:
+        """
+        Get the shrunk image of a file.
+
+        :param path: str
+            The image file.
+        :param size: Tuple[float, float]
+            The width and height of the sprite in game units.
+        :return: Optional[:ref:`ScaledImage`]
+            The shrunk image, or None if the image is not drawn smaller than its file.
+        """
+        path = str(path).lstrip("/")
+        if not os.path.isfile(path):
+            return None
+        pixels = self.drawn_size(path, size)
+        if pixels is None:
+            return None
+        digest = self._hashes.get(path)
+        if digest is None:
+            digest = self._hashes[path] = _file_hash(path)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name = os.path.join(self.directory, "{}-{}-{}x{}.png".format(stem, digest, *pixels))
+        if os.path.isfile(name):
+            self.reused += 1
+        else:
+            self.generated += 1
+        _sources[name] = (path, pixels)
+        return ScaledImage(name)
+
+    @property
+    def stats(self) -> dict:
+        """The scaler statistics."""
+        return {"resolution": self.resolution, "generated": self.generated, "reused": self.reused}
@@ -1,13 +1,17 @@
 import logging
+import time
 
 import ppb
-from models import Player, FPSScene, Floor, Background, Conductor
-from ext import MusicController
+from ppb.assetlib import AssetLoadingSystem
+from ppb.systems import EventPoller, SoundController, Updater
+from models import Player, LoadingScene, Floor, Background, Conductor
+from ext import ImageScaler, LayerCacheRenderer, MusicController
 
 RES = (1080, 720)
 # RES = (2560, 1440)
 SONG_FILE_LOCATION = "assets/nekozilla.json"
 MUSIC_NAME = "assets/nekozilla.mp3"
+# None to estimate the tempo and first beat from the music, see ext.TempoCache.
 BPM = 128
 
 
@@ -47,10 +51,15 @@ def setup(scene: ppb.Scene):
 
 if __name__ == "__main__":
     ppb.run(
-        setup=setup,
         title="Rhythm",
-        starting_scene=FPSScene,
+        # The game scene is set up and its assets load behind the loading scene.
+        starting_scene=LoadingScene,
+        scene_kwargs={"set_up": setup, "started": time.perf_counter()},
         log_level=logging.INFO,
         resolution=RES,
-        systems=(MusicController,),
+        # Draws sprites from the sheets built by python -m tools atlas, if they were built,
+        # and the static background, floor and beat zones from cached layers.
+        basic_systems=(LayerCacheRenderer, Updater, EventPoller, SoundController, AssetLoadingSystem),
+        # Shrinks the floor and background to RES once, see ext.ImageScaler.
+        systems=(ImageScaler, MusicController),
     )
@@ -1,3 +1,7 @@
+from .collision import CollisionIndex, bounds, colliding, overlaps
+from .query import QueryCache, objects, single
+
+
 def check_in_range(value, min_range, max_range) -> bool:
     return min_range <= value <= max_range
 
@@ -13,27 +17,7 @@ def is_colliding(first_sprite, second_sprite) -> bool:
     :return: bool
         Whether the sprites are colliding.
     """
-    f_top_left_x, f_top_left_y = second_sprite.top_left
-    f_bottom_right_x, f_bottom_right_y = second_sprite.bottom_right
-
-    top_left_x, top_left_y = first_sprite.top_left
-    bottom_right_x, bottom_right_y = first_sprite.bottom_right
-
-    f_y_vals = f_top_left_y, f_bottom_right_y
-    f_x_vals = f_top_left_x, f_bottom_right_x
-
-    x_range = [min(*f_x_vals), max(*f_x_vals)]
-    y_range = [min(*f_y_vals), max(*f_y_vals)]
-
-    x_colliding = False
-    y_colliding = False
-    for x in [top_left_x, bottom_right_x]:
-        if check_in_range(x, *x_range):
-            x_colliding = True
-    for y in [top_left_y, bottom_right_y]:
-        if check_in_range(y, *y_range):
-            y_colliding = True
-    return x_colliding and y_colliding
+    return overlaps(bounds(first_sprite), bounds(second_sprite))
 
 
 from .zone import BeatZone
@@ -42,8 +26,14 @@ from .label import Label
 from .player import Player
 from .fpsscene import FPSScene
 from .note import Note
+from .notepool import NotePool
+from .tempo import TempoMap, TempoChange, TimeSignature
+from .chart import Chart, ChartNote, compile_chart
+from .lanes import LaneStrategy, RandomLanes, RoundRobinLanes, PitchLanes
+from .scheduler import BeatScheduler, Subscription
 from .song import Song
 from .background import Background
 from .conductor import Conductor
 from .beatvisualizer import BeatVisualizer, BeatTrigger
+from .loadingscene import LoadingScene
 from .endscene import EndScene
@@ -1,6 +1,6 @@
 import ppb
 from ppb import RectangleSprite
-from ppb.features.animation import Animation
+from ext import assets
 
 
 class Background(RectangleSprite):
@@ -19,6 +19,9 @@ class Background(RectangleSprite):
         Whether to animate the background.
     """
 
+    # Drawn once into a cached layer, drawn again on the next animation frame.
+    static = True
+
     def __init__(
         self,
         res_width=1080,
@@ -33,6 +36,7 @@ class Background(RectangleSprite):
         self.position = ppb.Vector(0, 0)
         self.image_location = image_location
         self.image = None
+        self._pixel_ratio = None
         if animate:
             self.animate()
         else:
@@ -45,15 +49,22 @@ class Background(RectangleSprite):
         circle = ppb.Circle(255, 255, 255)
         sprite = ppb.RectangleSprite(width=1, height=1, image=circle, position=(0, 0))
         sprite.layer = 1
+        sprite.static = True
         return sprite
 
+    def _drawn_size(self):
+        """The size in game units the background is drawn at, if the images are scaled."""
+        if assets.scaler is None:
+            return None
+        return self.res_width / assets.scaler.pixel_ratio, self.res_height / assets.scaler.pixel_ratio
+
     def animate(self):
         """Animate the background."""
-        self.image = Animation("assets/background/{0..7}.png", 7)
+        self.image = assets.animation("assets/background/{0..7}.png", 7, size=self._drawn_size())
 
     def unanimate(self):
         """Un-animate the background."""
-        self.image = ppb.Image(self.image_location)
+        self.image = assets.image(self.image_location, size=self._drawn_size())
 
     def on_update(self, event, signal):
         # Currently sets the scene's size as the camera's size. Has issue with layers.
@@ -64,5 +75,10 @@ class Background(RectangleSprite):
 
         if not scene.main_camera:
             return
-        self.width = self.res_width / scene.main_camera.pixel_ratio
-        self.height = self.res_height / scene.main_camera.pixel_ratio
+        # Only resized when the camera zooms, so the cached layer stays valid.
+        pixel_ratio = scene.main_camera.pixel_ratio
+        if pixel_ratio == self._pixel_ratio:
+            return
+        self._pixel_ratio = pixel_ratio
+        self.width = self.res_width / pixel_ratio
+        self.height = self.res_height / pixel_ratio
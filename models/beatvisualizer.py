@@ -2,7 +2,7 @@ import ppb
 
 from ppb import Sprite, RectangleSprite, Rectangle, Vector
 from ppb.assetlib import AbstractAsset
-from models import Conductor
+from models import Conductor, objects, single
 
 
 class BeatVisualizer(object):
@@ -144,24 +144,30 @@ class BeatTrigger(RectangleSprite):
         self._start_pos_y = self.position.y
         self.start_pos = Vector(self._start_pos_x, self._start_pos_y)
         # Calculating how fast the triggers should go to stay within beat.
-        # Because this using seconds instead of time, it will go out of sync if
-        # frame rate is not constant.
+        # Moved by the song clock, so they stay in sync when the frame rate is not constant.
         self.bpm = bpm
         self.speed = 2 / (60 / self.bpm)
         self.image = image or Rectangle(255, 255, 255, (1, 2))
         self.layer = layer
         self.paused = True
+        self._last_time = None
 
     def on_update(self, update_event, signal):
-        for conduct in update_event.scene.get(kind=Conductor):
+        time_delta = update_event.time_delta
+        conduct = single(update_event.scene, Conductor)
+        if conduct is not None:
             # Update speed if bpm changes
             if conduct.bpm != self.bpm:
                 self.bpm = conduct.bpm
-                self.speed = 2 / conduct.sec_per_Beat
+                self.speed = 2 / conduct.sec_per_beat
+            now = conduct.clock.now()
+            time_delta = 0 if self._last_time is None else max(now - self._last_time, 0)
+            self._last_time = now
         if not self.paused:
             # Only move when the song starts
-            self.position += self.direction * self.speed * update_event.time_delta
-        for t in update_event.scene.get(kind=BeatTrigger):
+            self.position += self.direction * self.speed * time_delta
+        # The cached tuple of the scene, not collected again for every trigger.
+        for t in objects(update_event.scene, BeatTrigger):
             if (t.position - self.position).length <= self.width and t != self:
                 t.reset()
                 self.reset()
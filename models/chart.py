@@ -0,0 +1,398 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from typing import List, NamedTuple, Optional
+
+from .tempo import TempoMap
+
+
+MAGIC = b"RGCH"
+VERSION = 2
+# A note without a precomputed lane. Lanes are then picked when the song is played.
+NO_LANE = 0xFF
+
+# magic, version, reserved, note count, bpm, string count, string table offset,
+# string table size, note table offset.
+_HEADER = struct.Struct("<4sHHIdIIII")
+_STRING_LENGTH = struct.Struct("<H")
+# The note table holds seconds (f64), beat (f64), note id (u16) and lane (u8) per note.
+# It is stored column by column so every column can be cast without copying.
+# Since version 2 the tempo map follows, 8-aligned: tempo count and signature count,
+# then (beat, bpm) per tempo and (beat, numerator, denominator) per signature.
+_TEMPO_COUNTS = struct.Struct("<II")
+_TEMPO_ROW = struct.Struct("<dd")
+_SIGNATURE_ROW = struct.Struct("<dHH4x")
+
+
+class ChartNote(NamedTuple):
+    """A single note of a chart."""
+
+    beat: float
+    seconds: float
+    lane: int
+    name: str
+
+
+class Chart:
+    """
+    An array-backed note table. Represents the notes of a song sorted by time.
+
+    Use :meth:`load` to read either a compiled chart or a JSON song file.
+
+    Parameters
+    ----------
+    name: str
+        The name of the song.
+    beats: Sequence[float]
+        The beat of every note.
+    seconds: Sequence[float]
+        The time in seconds of every note.
+    note_ids: Sequence[int]
+        The index of every note's name within ``strings``.
+    lanes: Sequence[int]
+        The lane of every note, or ``NO_LANE``.
+    strings: List[str]
+        The string table. Holds the distinct note names.
+    bpm: float
+        The beats per minute the seconds were computed with. 0 if unknown.
+    tempo: Optional[:ref:`TempoMap`]
+        The tempo map the seconds were computed with. A constant ``bpm`` if None.
+
+    Attributes
+    ----------
+    name: str
+        The name of the song.
+    bpm: float
+        The starting beats per minute. 0 if unknown.
+    tempo: Optional[:ref:`TempoMap`]
+        The tempo map of the song. None if unknown.
+    lane_count: int
+        The amount of lanes the precomputed lanes use. 0 if the lanes are not precomputed.
+    """
+
+    def __init__(self, name, beats, seconds, note_ids, lanes, strings, bpm=0.0, buffer=None, tempo=None):
+        self.name: str = name
+        self.beats = beats
+        self.seconds = seconds
+        self.note_ids = note_ids
+        self.lanes = lanes
+        self.strings: List[str] = strings
+        self.tempo: Optional[TempoMap] = tempo or (TempoMap.constant(bpm) if bpm else None)
+        self.bpm = self.tempo.bpm if self.tempo else bpm
+        # Keep the mapped file alive for as long as the columns are in use.
+        self._buffer = buffer
+        self._fingerprint = None
+
+    def __len__(self):
+        return len(self.beats)
+
+    @property
+    def lanes(self):
+        """The lane of every note, or ``NO_LANE``."""
+        return self._lanes
+
+    @lanes.setter
+    def lanes(self, lanes):
+        self._lanes = lanes
+        # Scanned once here rather than every time a layout is looked up.
+        self.lane_count = max(lanes) + 1 if len(lanes) and lanes[0] != NO_LANE else 0
+
+    def __getitem__(self, index) -> ChartNote:
+        return ChartNote(
+            self.beats[index],
+            self.seconds[index],
+            self.lanes[index],
+            self.strings[self.note_ids[index]],
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def note_name(self, index) -> str:
+        """Get the note name of the note at an index."""
+        return self.strings[self.note_ids[index]]
+
+    def index_at(self, seconds) -> int:
+        """Get the index of the first note that plays at or after the given time."""
+        return bisect_left(self.seconds, seconds)
+
+    @property
+    def fingerprint(self) -> str:
+        """A hash of the notes of the chart. Charts with the same notes share it."""
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(_little_endian(self.beats, "d"))
+            digest.update(_little_endian(self.note_ids, "H"))
+            digest.update("\0".join(self.strings).encode("utf-8"))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    @property
+    def is_compiled(self):
+        """Whether the chart is backed by a compiled chart file."""
+        return self._buffer is not None
+
+    @staticmethod
+    def is_compiled_file(file_location) -> bool:
+        """Check whether a file is a compiled chart."""
+        with open(file_location, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+
+    @staticmethod
+    def load(file_location, bpm: Optional[float] = None):
+        """
+        Load a chart.
+
+        Compiled charts are memory-mapped. Anything else is parsed as a JSON song file.
+
+        :param file_location: str
+            The chart or JSON file to load.
+        :param bpm: float
+            The beats per minute used to compute note times of JSON songs without a tempo map.
+        :return: :ref:`Chart`
+            returns the Chart object.
+        """
+        if Chart.is_compiled_file(file_location):
+            return Chart.from_compiled(file_location)
+        return Chart.from_json(file_location, bpm=bpm)
+
+    @staticmethod
+    def from_json(file_location, bpm: Optional[float] = None):
+        """
+        Load a chart from a JSON song file.
+
+        The song may carry a tempo map as "tempo", mapping beats to beats per minute,
+        and "time_signature", mapping beats to [numerator, denominator].
+
+        :param file_location: str
+            The json file to load.
+        :param bpm: float
+            The beats per minute used to compute note times when the song has no tempo map.
+        :return: :ref:`Chart`
+            returns the Chart object.
+        """
+        with open(file_location) as f:
+            song = json.load(f)
+
+        song = song["song"]
+        notes = []
+        for beat_number, notes_to_play in song.get("tiles").items():
+            beat = float(beat_number)
+            for note in notes_to_play:
+                notes.append((beat, note))
+        # sort is stable, so notes on the same beat keep their order.
+        notes.sort(key=lambda entry: entry[0])
+        return Chart.from_notes(song.get("name"), notes, tempo=TempoMap.from_song(song, bpm=bpm))
+
+    @staticmethod
+    def from_notes(name, notes, bpm: Optional[float] = None, lanes=None, tempo: Optional[TempoMap] = None):
+        """
+        Create a chart from (beat, note name) pairs sorted by beat.
+
+        :param name: str
+            The name of the song.
+        :param notes: List[Tuple[float, str]]
+            The notes to add.
+        :param bpm: float
+            The beats per minute used to compute note times.
+        :param lanes: List[int]
+            The lane of every note. Defaults to ``NO_LANE``.
+        :param tempo: Optional[:ref:`TempoMap`]
+            The tempo map used to compute note times. Takes precedence over ``bpm``.
+        :return: :ref:`Chart`
+            returns the Chart object.
+        """
+        if tempo is None and bpm:
+            tempo = TempoMap.constant(bpm)
+        string_ids = {}
+        strings = []
+        beats = array("d")
+        note_ids = array("H")
+        for beat, note in notes:
+            note_id = string_ids.get(note)
+            if note_id is None:
+                note_id = string_ids[note] = len(strings)
+                strings.append(note)
+            beats.append(beat)
+            note_ids.append(note_id)
+        # Every note time in one vectorized pass over the beat column.
+        seconds = array("d")
+        if tempo is not None:
+            seconds.frombytes(tempo.to_seconds(beats).tobytes())
+        else:
+            seconds.frombytes(bytes(8 * len(beats)))
+        lanes = array("B", lanes if lanes is not None else [NO_LANE] * len(beats))
+        return Chart(name, beats, seconds, note_ids, lanes, strings, bpm=bpm or 0.0, tempo=tempo)
+
+    @staticmethod
+    def from_compiled(file_location):
+        """
+        Memory-map a compiled chart. Notes are read from the map on access.
+
+        :param file_location: str
+            The compiled chart to load.
+        :return: :ref:`Chart`
+            returns the Chart object.
+        """
+        with open(file_location, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic,
+            version,
+            _,
+            count,
+            bpm,
+            string_count,
+            strings_offset,
+            strings_size,
+            notes_offset,
+        ) = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{file_location} is not a compiled chart.")
+        if version not in (1, VERSION):
+            raise ValueError(f"{file_location} has unsupported chart version {version}.")
+
+        strings = []
+        offset = strings_offset
+        for _ in range(string_count):
+            (length,) = _STRING_LENGTH.unpack_from(buffer, offset)
+            offset += _STRING_LENGTH.size
+            strings.append(bytes(buffer[offset:offset + length]).decode("utf-8"))
+            offset += length
+
+        view = memoryview(buffer)
+        seconds_end = notes_offset + 8 * count
+        beats_end = seconds_end + 8 * count
+        ids_end = beats_end + 2 * count
+        lanes_end = ids_end + count
+        tempo = None
+        if version >= 2:
+            offset = lanes_end + -lanes_end % 8
+            tempo_count, signature_count = _TEMPO_COUNTS.unpack_from(buffer, offset)
+            offset += _TEMPO_COUNTS.size
+            changes = [
+                _TEMPO_ROW.unpack_from(buffer, offset + idx * _TEMPO_ROW.size) for idx in range(tempo_count)
+            ]
+            offset += tempo_count * _TEMPO_ROW.size
+            signatures = [
+                _SIGNATURE_ROW.unpack_from(buffer, offset + idx * _SIGNATURE_ROW.size)
+                for idx in range(signature_count)
+            ]
+            tempo = TempoMap(changes, signatures) if changes else None
+        return Chart(
+            name=strings[0],
+            seconds=view[notes_offset:seconds_end].cast("d"),
+            beats=view[seconds_end:beats_end].cast("d"),
+            note_ids=view[beats_end:ids_end].cast("H"),
+            lanes=view[ids_end:lanes_end].cast("B"),
+            strings=strings[1:],
+            bpm=bpm,
+            buffer=buffer,
+            tempo=tempo,
+        )
+
+    def save(self, file_location):
+        """
+        Write the chart as a compiled chart.
+
+        The song name is the first entry of the string table.
+
+        :param file_location: str
+            The file to write to.
+        """
+        table = [self.name or ""] + list(self.strings)
+        encoded = [string.encode("utf-8") for string in table]
+        strings_size = sum(_STRING_LENGTH.size + len(string) for string in encoded)
+        strings_offset = _HEADER.size
+        # Align the note table so the float columns can be cast in place.
+        notes_offset = strings_offset + strings_size
+        notes_offset += -notes_offset % 8
+
+        header = _HEADER.pack(
+            MAGIC,
+            VERSION,
+            0,
+            len(self),
+            float(self.bpm or 0),
+            len(table),
+            strings_offset,
+            strings_size,
+            notes_offset,
+        )
+        with open(file_location, "wb") as f:
+            f.write(header)
+            for string in encoded:
+                f.write(_STRING_LENGTH.pack(len(string)))
+                f.write(string)
+            f.write(b"\0" * (notes_offset - strings_offset - strings_size))
+            # The on-disk format is little-endian, like the header.
+            for column, typecode in (
+                (self.seconds, "d"),
+                (self.beats, "d"),
+                (self.note_ids, "H"),
+                (self.lanes, "B"),
+            ):
+                f.write(_little_endian(column, typecode))
+
+            # Seconds, beat, note id and lane take 19 bytes per note.
+            notes_end = notes_offset + 19 * len(self)
+            f.write(b"\0" * (-notes_end % 8))
+            changes = self.tempo.changes if self.tempo else []
+            signatures = self.tempo.signatures if self.tempo else []
+            f.write(_TEMPO_COUNTS.pack(len(changes), len(signatures)))
+            for change in changes:
+                f.write(_TEMPO_ROW.pack(*change))
+            for signature in signatures:
+                f.write(_SIGNATURE_ROW.pack(*signature))
+
+    def close(self):
+        """Release the mapped file of a compiled chart."""
+        if self._buffer is None:
+            return
+        for column in (self.seconds, self.beats, self.note_ids, self.lanes):
+            if isinstance(column, memoryview):
+                column.release()
+        self._buffer.close()
+        self._buffer = None
+
+
+def _little_endian(column, typecode) -> bytes:
+    values = array(typecode, column)
+    if struct.pack("=H", 1) != struct.pack("<H", 1):
+        values.byteswap()
+    return values.tobytes()
+
+
+def compile_chart(
+    file_location, output_location=None, bpm: Optional[float] = None, lane_strategy=None, lane_count=4
+) -> str:
+    """
+    Compile a JSON song file into a compiled chart.
+
+    :param file_location: str
+        The json file to compile.
+    :param output_location: str
+        Where to write the compiled chart. Defaults to the json file with a ``.chart`` extension.
+    :param bpm: float
+        The beats per minute used to precompute note times when the song has no tempo map.
+    :param lane_strategy: Optional[:ref:`LaneStrategy`]
+        Precomputes the lane of every note. Lanes are picked when playing if None.
+    :param lane_count: int
+        The amount of lanes to lay the notes out on.
+    :return: str
+        The location of the compiled chart.
+    """
+    output_location = output_location or os.path.splitext(file_location)[0] + ".chart"
+    chart = Chart.from_json(file_location, bpm=bpm)
+    if lane_strategy is not None:
+        from .lanes import assign_lanes
+
+        chart.lanes = assign_lanes(chart, lane_count, lane_strategy)
+    chart.save(output_location)
+    return output_location
@@ -0,0 +1,176 @@
+from collections import defaultdict
+from math import floor
+from typing import Dict, List, Set, Tuple
+
+Bounds = Tuple[float, float, float, float]
+
+
+def bounds(sprite) -> Bounds:
+    """
+    Get the axis-aligned bounds of a sprite.
+
+    :param sprite: Sprite
+        The sprite to get the bounds of.
+    :return: Tuple[float, float, float, float]
+        The left, bottom, right and top of the sprite.
+    """
+    x, y = sprite.position
+    half_width = sprite.width / 2
+    half_height = sprite.height / 2
+    return x - half_width, y - half_height, x + half_width, y + half_height
+
+
+def overlaps(first: Bounds, second: Bounds) -> bool:
+    """Check if two bounds overlap. Touching edges count as overlapping."""
+    return (
+        first[0] <= second[2]
+        and second[0] <= first[2]
+        and first[1] <= second[3]
+        and second[1] <= first[3]
+    )
+
+
+class CollisionIndex:
+    """
+    A uniform grid of collidable sprites.
+
+    Sprites are binned into every cell their bounds touch. A query only tests the
+    sprites sharing a cell with the queried rectangle, so the cost follows the
+    actual neighbours instead of every pair of sprites.
+
+    Parameters
+    ----------
+    cell_size: float
+        The width and height of a grid cell in game units.
+
+    Attributes
+    ----------
+    queries: int
+        The amount of queries made.
+    tests: int
+        The amount of narrowphase overlap tests made by the queries.
+    """
+
+    def __init__(self, cell_size: float = 4.0):
+        self.cell_size = cell_size
+        self.queries = 0
+        self.tests = 0
+        self._cells: Dict[Tuple[int, int], Set] = defaultdict(set)
+        self._bounds: Dict[object, Bounds] = {}
+        self._sprite_cells: Dict[object, Tuple[Tuple[int, int], ...]] = {}
+
+    def __len__(self):
+        return len(self._bounds)
+
+    def __contains__(self, sprite):
+        return sprite in self._bounds
+
+    def _cells_for(self, rect: Bounds):
+        size = self.cell_size
+        left, bottom = floor(rect[0] / size), floor(rect[1] / size)
+        right, top = floor(rect[2] / size), floor(rect[3] / size)
+        return tuple(
+            (column, row)
+            for column in range(left, right + 1)
+            for row in range(bottom, top + 1)
+        )
+
+    def insert(self, sprite):
+        """Start tracking a sprite."""
+        rect = self._bounds[sprite] = bounds(sprite)
+        cells = self._sprite_cells[sprite] = self._cells_for(rect)
+        for cell in cells:
+            self._cells[cell].add(sprite)
+
+    def remove(self, sprite):
+        """Stop tracking a sprite. Untracked sprites are ignored."""
+        if sprite not in self._bounds:
+            return
+        del self._bounds[sprite]
+        for cell in self._sprite_cells.pop(sprite):
+            sprites = self._cells[cell]
+            sprites.discard(sprite)
+            if not sprites:
+                del self._cells[cell]
+
+    def refresh(self):
+        """
+        Bring the index up to date with the sprite positions.
+
+        Only sprites that moved are looked at again, and only sprites that moved into
+        other cells are re-binned.
+        """
+        for sprite, old_rect in self._bounds.items():
+            rect = bounds(sprite)
+            if rect == old_rect:
+                continue
+            self._bounds[sprite] = rect
+            cells = self._cells_for(rect)
+            old_cells = self._sprite_cells[sprite]
+            if cells == old_cells:
+                continue
+            for cell in old_cells:
+                sprites = self._cells[cell]
+                sprites.discard(sprite)
+                if not sprites:
+                    del self._cells[cell]
+            for cell in cells:
+                self._cells[cell].add(sprite)
+            self._sprite_cells[sprite] = cells
+
+    def query(self, rect: Bounds, kind=None, exclude=None) -> List:
+        """
+        Get the tracked sprites overlapping a rectangle.
+
+        :param rect: Tuple[float, float, float, float]
+            The left, bottom, right and top of the rectangle.
+        :param kind: Type
+            Only return sprites of this type.
+        :param exclude: object
+            A sprite to leave out, usually the one asking.
+        :return: List
+            The overlapping sprites.
+        """
+        self.queries += 1
+        candidates = set()
+        for cell in self._cells_for(rect):
+            sprites = self._cells.get(cell)
+            if sprites:
+                candidates |= sprites
+        found = []
+        for sprite in candidates:
+            if sprite is exclude or (kind is not None and not isinstance(sprite, kind)):
+                continue
+            self.tests += 1
+            if overlaps(rect, self._bounds[sprite]):
+                found.append(sprite)
+        return found
+
+    def query_sprite(self, sprite, kind=None) -> List:
+        """Get the tracked sprites overlapping a sprite at its current position."""
+        return self.query(bounds(sprite), kind=kind, exclude=sprite)
+
+
+def colliding(scene, sprite, kind) -> List:
+    """
+    Get the sprites of a kind colliding with a sprite.
+
+    Uses the scene's collision index when it has one and checks every sprite otherwise.
+
+    :param scene: ppb.Scene
+        The scene to look in.
+    :param sprite: Sprite
+        The sprite to check collision with.
+    :param kind: Type
+        The type of sprites to check collision against.
+    :return: List
+        The colliding sprites.
+    """
+    index = getattr(scene, "collisions", None)
+    if index is not None:
+        return index.query_sprite(sprite, kind=kind)
+    rect = bounds(sprite)
+    return [
+        other for other in scene.get(kind=kind)
+        if other is not sprite and overlaps(rect, bounds(other))
+    ]
@@ -1,8 +1,11 @@
+from typing import Optional
+
 import ppb
 from ppb import keycodes
 import ext.ext_events
 from models import Song
-from ext import Music
+from models.scheduler import BAR, BEAT, BeatScheduler
+from ext import Music, SongClock, assets, post_mix, tempo_cache
 
 
 class Conductor(ppb.Sprite):
@@ -13,12 +16,18 @@ class Conductor(ppb.Sprite):
     ----------
     song_file_location: str
         The song file location that is to be loaded and managed.
+        Either a compiled chart or a json song file.
     music_name: str
         The music filename that is to be loaded and played.
-    bpm: int
-        The beat per minute of the song.
+    bpm: Optional[float]
+        The beat per minute of the song. Estimated from the music, and cached, if None.
+    offset: Optional[float]
+        Seconds into the music of beat 0. Estimated along with the bpm if None, and
+        0 when the bpm is given.
     floor_height: float
         Height to generate beat zones.
+    metronome: bool
+        Whether to play the beat sound on every beat.
 
     Attributes
     ----------
@@ -26,12 +35,23 @@ class Conductor(ppb.Sprite):
         The Song that is currently being managed.
     music: ext.Music
         The Music that is to be played with the song.
+    clock: ext.SongClock
+        The song clock. Samples the music position once per update.
+    scheduler: models.BeatScheduler
+        Dispatches the beats, bars and subdivisions of the song. Beats and bars are
+        also signalled to the scene as :ref:`Beat` and :ref:`Bar` events.
     bpm: int
-        The beat per minute of the song.
+        The beat per minute of the song at the current beat.
     sec_per_beat: float
-        The position within the song that is currently playing.
+        The length of the current beat in seconds.
     last_beat: float
         The position within the song that last time a beat was played.
+    beat_number: int
+        The number of the last beat that was played.
+    latency: float
+        The buffer latency of the audio output in seconds, see :ref:`AudioLatency`.
+    offset: float
+        Seconds into the music of beat 0. The song time is the music position minus it.
     """
 
     PLAY = keycodes.L
@@ -40,42 +60,95 @@ class Conductor(ppb.Sprite):
         self,
         song_file_location,
         music_name="assets/default.wav",
-        bpm=100,
+        bpm: Optional[float] = None,
         floor_height: float = None,
-        autoplay=False
+        autoplay=False,
+        metronome=False,
+        offset: Optional[float] = None,
     ):
         super(Conductor, self).__init__()
         self.image = None
-        self.song = Song.load(song_file_location, floor_height=floor_height, autoplay=autoplay)
+        if bpm is None:
+            estimate = tempo_cache.get(music_name)
+            bpm = estimate.bpm
+            offset = estimate.offset if offset is None else offset
+        self.offset = offset or 0.0
+        self.song = Song.load(
+            song_file_location, floor_height=floor_height, autoplay=autoplay, bpm=bpm
+        )
         self.music = Music(music_name)
         self.music.volume = 0.05
+        self.clock = SongClock(lambda: self.music.music_position - self.offset)
+        self.song.clock = self.clock
         self.bpm = bpm
         self.sec_per_beat = 60 / self.bpm
         self.last_beat = 0
+        self.beat_number = 0
         self.playing = False
-        self._beat = ppb.events.PlaySound(ppb.Sound("assets/beat_1.wav"))
+        self.metronome = metronome
+        self.latency = 0.0
+        self._beat = ppb.events.PlaySound(assets.sound("assets/beat_1.wav"))
         self._beat.sound.volume = 0.05
+        self.scheduler = BeatScheduler()
+        self.scheduler.subscribe(BEAT, self._on_beat)
+        self.scheduler.subscribe(BAR, self._signal_later)
+        # Events to signal to the scene on the next update.
+        self._outgoing = []
 
     def start(self, scene, volume=0.1, tile_speed=1):
         """Start Song object and set up beat variables"""
         self.playing = True
-        self.last_beat = 0
+        # Beat 0 is `offset` seconds into the music.
+        self.clock.reset(-self.offset)
+        post_mix.offset = self.offset
         self.song.play(scene=scene, bpm=self.bpm, volume=volume, tile_speed=tile_speed)
+        self._outgoing = []
+        self.scheduler.reset(self.song.tempo)
+        self._set_beat(0, 0.0)
+
+    def _set_beat(self, beat_number, time):
+        """Move to a beat and take over the tempo of the song at that beat."""
+        tempo = self.song.tempo
+        self.beat_number = beat_number
+        self.last_beat = time
+        self.bpm = tempo.bpm_at(beat_number)
+        self.sec_per_beat = tempo.seconds_at(beat_number + 1) - time
+
+    def _on_beat(self, event):
+        self._set_beat(event.number, event.time)
+        if self.metronome:
+            self._outgoing.append(self._beat)
+        self._signal_later(event)
+
+    def _signal_later(self, event):
+        self._outgoing.append(event)
 
     def get_last_diff_time(self):
         """Return the difference between the last beat and the current time in the playing song"""
-        return self.music.music_position - self.last_beat
+        return self.clock.now() - self.last_beat
 
     def get_next_diff_time(self):
         """Return the difference between the next beat and the current time in the playing song"""
         next_beat = self.last_beat + self.sec_per_beat
-        return next_beat - self.music.music_position
+        return next_beat - self.clock.now()
 
     def on_update(self, event, signal):
-        if self.music.music_position > self.last_beat + self.sec_per_beat:
-            # signal(self._beat)
-            self.last_beat += self.sec_per_beat
-        self.song.current_beat_in_seconds = self.music.music_position
+        if not self.playing:
+            return
+        # The only place the mixer is asked for the position, everything else reads the clock.
+        now = self.clock.sample()
+        # Every beat since the last update is dispatched, even after a slow frame.
+        self.scheduler.tick(now)
+        outgoing, self._outgoing = self._outgoing, []
+        for beat_event in outgoing:
+            signal(beat_event)
+        self.song.current_beat_in_seconds = now
+        self.song.update(event.scene, signal)
+
+    def on_audio_latency(self, event, signal):
+        """Let judgement compensate for the audio output lagging behind the song time."""
+        self.latency = event.latency
+        self.song.judge.latency = event.latency
 
     def on_key_pressed(self, key_event: ppb.events.KeyPressed, signal):
         if key_event.key == self.PLAY:
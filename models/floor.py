@@ -2,6 +2,7 @@ import ppb
 from ppb import keycodes, Vector
 from ppb.sprites import RectangleSprite, RectangleShapeMixin
 from ppb.events import KeyPressed, KeyReleased, PlaySound
+from ext import assets
 
 
 class Floor(RectangleSprite):
@@ -20,6 +21,11 @@ class Floor(RectangleSprite):
         Width of the floor.
     """
 
+    # Tracked by the scene's collision index.
+    collidable = True
+    # Drawn once into a cached layer, see ext.LayerCacheRenderer.
+    static = True
+
     def __init__(
         self,
         position: tuple = None,
@@ -34,5 +40,6 @@ class Floor(RectangleSprite):
         if height:
             self.height = height
         self.position = Vector(*position)
-        self.image = ppb.Image(image_location)
+        # Shrunk to the size it is drawn at, if the game runs at a lower resolution.
+        self.image = assets.image(image_location, size=(self.width, self.height))
         self.layer = 1
@@ -1,23 +1,64 @@
 import ppb
 
 import ext.ext_events
-from . import Label
+from . import Label, CollisionIndex, QueryCache
 from ppb import Scene
 
 
 class FPSScene(Scene):
     reset_duration = 1  # seconds to reset count.
+    fps_refresh = 0.25  # seconds between frame rate label updates.
 
     def __init__(self, *args, **kwargs):
+        # Created first, sprites may be added while the scene is set up.
+        self.collisions = CollisionIndex()
+        self.queries = QueryCache(self)
         super().__init__(*args, **kwargs)
         self.frames = 0
         self.start_time = ppb.get_time()
         self._frame_label = None
+        self._frame_label_time = 0
         self._fps_placement = None
         self.sound_playing = False
         self._mouse_pos_label = None
         self._mouse_placement = None
 
+    def add(self, game_object, tags=()):
+        """Add a game object. Collidable sprites are also added to the collision index."""
+        if getattr(game_object, "collidable", False):
+            self.collisions.insert(game_object)
+        self.queries.invalidate(game_object)
+        return super().add(game_object, tags)
+
+    def remove(self, game_object):
+        """Remove a game object, and from the collision index if it is in there."""
+        self.collisions.remove(game_object)
+        self.queries.invalidate(game_object)
+        return super().remove(game_object)
+
+    def get(self, *, kind=None, tag=None, **kwargs):
+        """Iterate over the game objects by kind or tag. Queries by kind alone are answered by the query cache."""
+        if kind is not None and tag is None:
+            return iter(self.queries.get(kind))
+        return super().get(kind=kind, tag=tag, **kwargs)
+
+    def single(self, kind):
+        """
+        Get the game object of a type the scene only has one of, such as the Conductor.
+
+        :param kind: Type
+            The type of game object.
+        :return: Optional[object]
+            The game object, or None if there is none.
+        """
+        return self.queries.single(kind)
+
+    @Scene.main_camera.setter
+    def main_camera(self, value):
+        # The camera is added to the children directly, bypassing add.
+        Scene.main_camera.fset(self, value)
+        self.queries.invalidate(value)
+
     @property
     def avg_frame_rate(self):
         """Get the average frame rate of the scene after the reset duration."""
@@ -33,26 +74,29 @@ class FPSScene(Scene):
 
     def on_update(self, event, signal):
         """Triggers at the update rate."""
-        if self._frame_label:
-            self.remove(self._frame_label)
+        # The scene is updated before its sprites, so they query an up to date index.
+        self.collisions.refresh()
+        self.queries.next_frame()
 
         fps_x, fps_y = self.main_camera.top_left
         self._fps_placement = fps_x + 2, fps_y - 0.5
-        self._frame_label = Label(f"{self.avg_frame_rate:.2f} FPS", size=50)
+        # The label is kept and only its text and position change.
+        if self._frame_label is None:
+            self._frame_label = Label(f"{self.avg_frame_rate:.2f} FPS", size=50)
+            self.add(self._frame_label)
+        elif ppb.get_time() - self._frame_label_time > self.fps_refresh:
+            self._frame_label_time = ppb.get_time()
+            self._frame_label.update_text(f"{self.avg_frame_rate:.2f} FPS")
         self._frame_label.position = ppb.Vector(self._fps_placement)
-        self.add(self._frame_label)
 
         from . import Player, EndScene
-        for player in self.get(kind=Player):
+        for player in self.queries.get(Player):
             if player.health <= 0:
                 signal(ext.ext_events.StopMusic())
                 signal(ppb.events.ReplaceScene(EndScene()))
 
     def on_mouse_motion(self, mouse_motion: ppb.events.MouseMotion, signal):
         """Updates on mouse movement."""
-        if self._mouse_pos_label:
-            self.remove(self._mouse_pos_label)
-
         if not self._fps_placement:
             return
 
@@ -60,8 +104,10 @@ class FPSScene(Scene):
             self._fps_placement[0] + 0.3,
             self._fps_placement[1] - 0.8,
         )
-        self._mouse_pos_label = Label(
-            f"({mouse_motion.position[0]:.2f}, {mouse_motion.position[1]:.2f})", size=50
-        )
+        text = f"({mouse_motion.position[0]:.2f}, {mouse_motion.position[1]:.2f})"
+        if self._mouse_pos_label is None:
+            self._mouse_pos_label = Label(text, size=50)
+            self.add(self._mouse_pos_label)
+        else:
+            self._mouse_pos_label.update_text(text)
         self._mouse_pos_label.position = ppb.Vector(self._mouse_placement)
-        self.add(self._mouse_pos_label)
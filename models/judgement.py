@@ -0,0 +1,193 @@
+from enum import Enum
+from typing import NamedTuple, Optional
+
+
+class Judgement(Enum):
+    """How well a note was hit, from best to worst."""
+
+    PERFECT = "perfect"
+    GREAT = "great"
+    GOOD = "good"
+    MISS = "miss"
+
+
+class JudgementResult(NamedTuple):
+    """
+    The result of judging a note.
+
+    Attributes
+    ----------
+    judgement: :ref:`Judgement`
+        The tier the hit falls in.
+    error: float
+        The signed hit error in seconds. Negative when early, positive when late.
+    """
+
+    judgement: Judgement
+    error: float
+
+    @property
+    def is_hit(self):
+        return self.judgement is not Judgement.MISS
+
+
+class Judge:
+    """
+    Judges hits by comparing song time, not sprite positions.
+
+    Parameters
+    ----------
+    perfect: float
+        The perfect window in milliseconds on either side of the note.
+    great: float
+        The great window in milliseconds on either side of the note.
+    good: float
+        The good window in milliseconds on either side of the note.
+        Notes that were not hit within it are missed.
+    latency: float
+        Seconds the audio output lags behind the song time. Key presses follow what
+        is heard, so this much is taken off every press before judging it.
+    """
+
+    def __init__(self, perfect: float = 45, great: float = 90, good: float = 135, latency: float = 0.0):
+        if not 0 <= perfect <= great <= good:
+            raise ValueError("Judgement windows must satisfy 0 <= perfect <= great <= good.")
+        self.perfect = perfect
+        self.great = great
+        self.good = good
+        self.latency = latency
+
+    @property
+    def miss_window(self) -> float:
+        """Seconds after a note after which it is missed."""
+        return self.good / 1000
+
+    @property
+    def expire_after(self) -> float:
+        """Seconds of song time after a note after which a press can no longer hit it."""
+        return self.miss_window + self.latency
+
+    def grade(self, error: float) -> Judgement:
+        """
+        Get the tier of a hit error.
+
+        :param error: float
+            The signed hit error in seconds.
+        :return: :ref:`Judgement`
+            The tier the error falls in.
+        """
+        error_ms = abs(error) * 1000
+        if error_ms <= self.perfect:
+            return Judgement.PERFECT
+        if error_ms <= self.great:
+            return Judgement.GREAT
+        if error_ms <= self.good:
+            return Judgement.GOOD
+        return Judgement.MISS
+
+    def judge(self, press_time: float, note_time: float) -> Optional[JudgementResult]:
+        """
+        Judge a press against a note.
+
+        :param press_time: float
+            When the key was pressed, in seconds of the song.
+        :param note_time: float
+            When the note should be played, in seconds of the song.
+        :return: Optional[:ref:`JudgementResult`]
+            The result, or None when the press is too early to count for the note.
+        """
+        error = press_time - self.latency - note_time
+        if error < -self.miss_window:
+            return None
+        return JudgementResult(self.grade(error), error)
+
+    def catch(self, catch_time: float, note_time: float) -> JudgementResult:
+        """
+        Judge a note caught by a player. Catching always counts as a hit, at least good.
+
+        :param catch_time: float
+            When the note was caught, in seconds of the song.
+        :param note_time: float
+            When the note should be played, in seconds of the song.
+        """
+        error = catch_time - note_time
+        judgement = self.grade(error)
+        if judgement is Judgement.MISS:
+            judgement = Judgement.GOOD
+        return JudgementResult(judgement, error)
+
+    def miss(self, now: float, note_time: float) -> JudgementResult:
+        """The result of a note that was never hit."""
+        return JudgementResult(Judgement.MISS, now - note_time)
+
+
+class Score:
+    """
+    A breakdown of judged notes.
+
+    Attributes
+    ----------
+    counts: Dict[:ref:`Judgement`, int]
+        The amount of notes judged per tier.
+    combo: int
+        The amount of notes hit in a row.
+    max_combo: int
+        The longest combo.
+    """
+
+    # How much every tier is worth towards the accuracy.
+    WEIGHTS = {
+        Judgement.PERFECT: 1.0,
+        Judgement.GREAT: 0.75,
+        Judgement.GOOD: 0.5,
+        Judgement.MISS: 0.0,
+    }
+
+    def __init__(self):
+        self.counts = {judgement: 0 for judgement in Judgement}
+        self.combo = 0
+        self.max_combo = 0
+        self._error_total = 0.0
+        self._error_count = 0
+
+    def record(self, result: JudgementResult):
+        """Add a judged note to the score."""
+        self.counts[result.judgement] += 1
+        if result.is_hit:
+            self.combo += 1
+            self.max_combo = max(self.max_combo, self.combo)
+            self._error_total += result.error
+            self._error_count += 1
+        else:
+            self.combo = 0
+
+    def reset(self):
+        """Forget every judged note."""
+        self.__init__()
+
+    @property
+    def hits(self) -> int:
+        """The amount of notes that were not missed."""
+        return self.judged - self.misses
+
+    @property
+    def misses(self) -> int:
+        return self.counts[Judgement.MISS]
+
+    @property
+    def judged(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def accuracy(self) -> float:
+        """The weighted accuracy from 0 to 1. 1 when nothing was judged yet."""
+        if not self.judged:
+            return 1.00
+        return sum(self.WEIGHTS[judgement] * count for judgement, count in self.counts.items()) / self.judged
+
+    @property
+    def mean_error(self) -> float:
+        """The average signed hit error in seconds. Negative means hitting early."""
+        if not self._error_count:
+            return 0.0
+        return self._error_total / self._error_count
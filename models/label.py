@@ -1,16 +1,130 @@
+from collections import OrderedDict
+
 from ppb import Sprite, Text, Font
 
+DEFAULT_FONT = "resources/Roboto-Black.ttf"
+
+# Fonts shared by every label, keyed by (path, size). A Font parses its file on load.
+_fonts = {}
+
+
+def get_font(font_location=DEFAULT_FONT, size=12) -> Font:
+    """Get the shared font of a file at a size, loading it the first time."""
+    key = (font_location, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = Font(font_location, size=size)
+    return font
+
+
+class TextCache:
+    """
+    The most recently rendered texts. Showing a cached text again reuses its image,
+    and with it the texture the renderer made for it.
+
+    Parameters
+    ----------
+    max_size: int
+        The amount of texts to keep.
+
+    Attributes
+    ----------
+    hits: int
+        How many texts were served from the cache.
+    misses: int
+        How many texts had to be rendered.
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._texts: "OrderedDict[tuple, Text]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._texts)
+
+    def get(self, text: str, font: Font, color=(0, 0, 0)) -> Text:
+        """
+        Get the image of a text, rendering it if it is not cached.
+
+        :param text: str
+            The text to render.
+        :param font: ppb.Font
+            The font to render it in.
+        :param color: Tuple[int, int, int]
+            The color to render it in.
+        :return: ppb.Text
+            The rendered text.
+        """
+        key = (text, id(font), tuple(color))
+        image = self._texts.get(key)
+        if image is not None:
+            self.hits += 1
+            self._texts.move_to_end(key)
+            return image
+        self.misses += 1
+        image = self._texts[key] = Text(text, font=font, color=color)
+        while len(self._texts) > self.max_size:
+            self._texts.popitem(last=False)
+        return image
+
+    def clear(self):
+        """Forget every cached text."""
+        self._texts.clear()
+
+    @property
+    def stats(self) -> dict:
+        """The text cache statistics."""
+        return {"texts": len(self._texts), "hits": self.hits, "misses": self.misses}
+
+
+# The text cache shared by every label.
+text_cache = TextCache()
+
 
 class Label(Sprite):
-    def __init__(self, text, font_location="resources/Roboto-Black.ttf", size=12, color=(0, 0, 0)):
+    """
+    A line of text.
+
+    The font is shared between labels and the text is only rendered again when it
+    changes, so a label can be updated every frame. Move it by setting its position.
+
+    Parameters
+    ----------
+    text: str
+        The text to show.
+    font_location: str
+        The font file.
+    size: int
+        The font size in points.
+    color: Tuple[int, int, int]
+        The text color.
+    """
+
+    def __init__(self, text, font_location=DEFAULT_FONT, size=12, color=(0, 0, 0)):
         super(Label, self).__init__()
-        self._font_location = font_location or "resources/Roboto-Black.ttf"
+        self._font_location = font_location or DEFAULT_FONT
         self._size = size
+        self._color = color
         self._text = text
-        self._font = Font(font_location, size=size)
-        self.image = Text(text, font=self._font, color=color)
+        self._font = get_font(self._font_location, size)
+        self.image = text_cache.get(text, self._font, color)
         self.layer = 10
 
+    @property
+    def text(self) -> str:
+        """The text shown."""
+        return self._text
+
     def update_text(self, text):
+        """
+        Show another text. Nothing is rendered if the text did not change.
+
+        :param text: str
+            The text to show.
+        """
+        if text == self._text:
+            return
         self._text = text
-        self.image = Text(text, font=self._font)
+        self.image = text_cache.get(text, self._font, self._color)
@@ -0,0 +1,294 @@
+import re
+from array import array
+from collections import OrderedDict, deque
+from random import Random
+from typing import List, Optional, Sequence
+
+
+_NOTE_PATTERN = re.compile(r"^([A-Ga-g])([#b]*)(\d+)$")
+_SEMITONES = {"c": 0, "d": 2, "e": 4, "f": 5, "g": 7, "a": 9, "b": 11}
+
+
+def pitch_of(note_name: str) -> Optional[int]:
+    """
+    Get the pitch of a note name in semitones, such as 61 for "C#4".
+
+    :param note_name: str
+        The note name.
+    :return: Optional[int]
+        The pitch, or None for blank or unknown notes.
+    """
+    match = _NOTE_PATTERN.match(note_name)
+    if not match:
+        return None
+    letter, accidentals, octave = match.groups()
+    return (
+        12 * (int(octave) + 1)
+        + _SEMITONES[letter.lower()]
+        + accidentals.count("#")
+        - accidentals.count("b")
+    )
+
+
+class LaneStrategy:
+    """
+    Decides which lanes the notes of a chord go to.
+
+    Subclasses override :meth:`preferred_lane`, or :meth:`choose` to pick a whole chord.
+    """
+
+    #: Name used by the compile tool and in the layout cache key.
+    name = ""
+
+    @property
+    def key(self) -> tuple:
+        """Identifies the layouts this strategy produces."""
+        return (self.name,)
+
+    def reset(self):
+        """Called before a chart is laid out."""
+
+    def preferred_lane(self, note_name: str, lane_count: int) -> int:
+        """The lane a note would like to go to."""
+        return 0
+
+    def choose(self, note_names: Sequence[str], lane_count: int) -> List[int]:
+        """
+        Pick distinct lanes for the notes of a chord.
+
+        Every note gets its preferred lane, or the next free lane after it.
+        """
+        taken = 0
+        lanes = []
+        for name in note_names:
+            lane = self.preferred_lane(name, lane_count) % lane_count
+            while taken & (1 << lane):
+                lane = (lane + 1) % lane_count
+            taken |= 1 << lane
+            lanes.append(lane)
+        return lanes
+
+
+class RandomLanes(LaneStrategy):
+    """
+    Spreads notes randomly. The same seed always gives the same layout.
+
+    Parameters
+    ----------
+    seed: Optional[int]
+        The seed of the random generator. Picked at random if None, so layouts cached
+        for this strategy are still told apart from other unseeded ones.
+    """
+
+    name = "random"
+
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else Random().getrandbits(32)
+        self._random = Random(self.seed)
+
+    @property
+    def key(self):
+        return self.name, self.seed
+
+    def reset(self):
+        self._random = Random(self.seed)
+
+    def choose(self, note_names, lane_count):
+        return self._random.sample(range(lane_count), len(note_names))
+
+
+class RoundRobinLanes(LaneStrategy):
+    """Cycles through the lanes from left to right."""
+
+    name = "round-robin"
+
+    def __init__(self):
+        self._next = 0
+
+    def reset(self):
+        self._next = 0
+
+    def preferred_lane(self, note_name, lane_count):
+        lane = self._next
+        self._next = (self._next + 1) % lane_count
+        return lane
+
+
+class PitchLanes(LaneStrategy):
+    """
+    Maps pitches onto lanes, so the same pitch class always falls into the same lane.
+    Blank notes take the first free lane.
+    """
+
+    name = "pitch"
+
+    def preferred_lane(self, note_name, lane_count):
+        pitch = pitch_of(note_name)
+        if pitch is None:
+            return 0
+        return (pitch % 12) * lane_count // 12
+
+
+STRATEGIES = {
+    strategy.name: strategy for strategy in (RandomLanes, RoundRobinLanes, PitchLanes)
+}
+
+
+def assign_lanes(chart, lane_count: int, strategy: LaneStrategy) -> array:
+    """
+    Assign a lane to every note of a chart in a single pass.
+
+    No two notes of the same beat share a lane.
+
+    :param chart: :ref:`Chart`
+        The chart to lay out. Its notes are sorted by beat.
+    :param lane_count: int
+        The amount of lanes.
+    :param strategy: :ref:`LaneStrategy`
+        Decides the lanes of every chord.
+    :return: array
+        The lane of every note.
+    """
+    strategy.reset()
+    beats = chart.beats
+    lanes = array("B", bytes(len(beats)))
+    start = 0
+    while start < len(beats):
+        end = start + 1
+        while end < len(beats) and beats[end] == beats[start]:
+            end += 1
+        if end - start > lane_count:
+            raise ValueError(
+                f"Beat {beats[start]:g} has {end - start} notes, but there are only "
+                f"{lane_count} lanes."
+            )
+        names = [chart.note_name(idx) for idx in range(start, end)]
+        lanes[start:end] = array("B", strategy.choose(names, lane_count))
+        start = end
+    return lanes
+
+
+class LaneLayoutCache:
+    """
+    Remembers computed lane layouts by chart fingerprint, strategy and lane count.
+
+    Parameters
+    ----------
+    size: int
+        The amount of layouts to keep.
+    """
+
+    def __init__(self, size: int = 8):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._layouts: "OrderedDict[tuple, array]" = OrderedDict()
+
+    def get(self, chart, lane_count: int, strategy: Optional[LaneStrategy]) -> Sequence[int]:
+        """
+        Get the lane layout of a chart, computing it if needed.
+
+        Charts that were compiled with lanes use their own lanes when no strategy is given.
+        Other charts are spread randomly, seeded by their fingerprint.
+        """
+        if strategy is None:
+            if chart.lane_count and chart.lane_count <= lane_count:
+                return chart.lanes
+            strategy = RandomLanes(seed=int(chart.fingerprint[:8], 16))
+
+        key = (chart.fingerprint, lane_count, strategy.key)
+        layout = self._layouts.get(key)
+        if layout is not None:
+            self.hits += 1
+            self._layouts.move_to_end(key)
+            return layout
+
+        self.misses += 1
+        layout = self._layouts[key] = assign_lanes(chart, lane_count, strategy)
+        if len(self._layouts) > self.size:
+            self._layouts.popitem(last=False)
+        return layout
+
+
+layout_cache = LaneLayoutCache()
+
+
+class LaneQueue:
+    """
+    The spawned notes of one lane that are waiting to be judged, in the order they
+    reach the beat zone.
+
+    Notes that were judged elsewhere (autoplay, player or floor collisions) are
+    dropped from the head lazily, so every note is popped at most once.
+
+    Attributes
+    ----------
+    expired: int
+        The amount of notes that fell past the judgement window.
+    """
+
+    def __init__(self):
+        self._notes = deque()
+        self.expired = 0
+
+    def __len__(self):
+        return len(self._notes)
+
+    def push(self, note, play_time: float):
+        """
+        Add a spawned note. Notes must be pushed in the order they are played.
+
+        :param note: :ref:`Note`
+            The spawned note.
+        :param play_time: float
+            When the note should be played in seconds.
+        """
+        self._notes.append((play_time, note.spawn_id, note))
+
+    def _drop_judged(self):
+        notes = self._notes
+        while notes:
+            _, spawn_id, note = notes[0]
+            # A judged note left the scene, and may already be reused for another note.
+            if note.scene is not None and note.spawn_id == spawn_id:
+                return
+            notes.popleft()
+
+    def peek(self):
+        """Get the next note to judge without removing it, or None."""
+        self._drop_judged()
+        return self._notes[0][2] if self._notes else None
+
+    def peek_time(self) -> Optional[float]:
+        """Get when the next note to judge should be played, or None."""
+        self._drop_judged()
+        return self._notes[0][0] if self._notes else None
+
+    def pop(self):
+        """Remove and return the next note to judge, or None."""
+        self._drop_judged()
+        return self._notes.popleft()[2] if self._notes else None
+
+    def expire(self, now: float, window: float) -> list:
+        """
+        Remove the notes whose judgement window has passed.
+
+        :param now: float
+            The current position in the song in seconds.
+        :param window: float
+            How many seconds after its play time a note can still be judged.
+        :return: list
+            The expired notes.
+        """
+        expired = []
+        self._drop_judged()
+        notes = self._notes
+        while notes and notes[0][0] + window < now:
+            expired.append(notes.popleft()[2])
+            self._drop_judged()
+        self.expired += len(expired)
+        return expired
+
+    def clear(self):
+        """Forget every note."""
+        self._notes.clear()
@@ -0,0 +1,69 @@
+import logging
+import time
+
+import ppb
+from ppb.features.loadingscene import BaseLoadingScene
+
+from models import Label, FPSScene
+
+logger = logging.getLogger(__name__)
+
+
+class LoadingScene(BaseLoadingScene):
+    """
+    Shows the progress of every queued asset, then replaces itself with the game.
+
+    The next scene is created right away so its music, sounds and images are queued
+    while the loading progress is shown. Once they are all loaded, the time it took
+    from ``started`` to being playable is logged.
+
+    Parameters
+    ----------
+    started: float
+        The ``time.perf_counter()`` to measure the time to playable from.
+        When the scene was created if None.
+    set_up: Callable
+        Called with the next scene to set it up.
+
+    Attributes
+    ----------
+    loaded: int
+        The amount of loaded assets.
+    pending: int
+        The amount of assets still loading.
+    time_to_playable: float
+        Seconds from ``started`` until every asset was loaded. None while loading.
+    """
+
+    next_scene = FPSScene
+
+    def __init__(self, started: float = None, set_up=None, **kwargs):
+        self.started = time.perf_counter() if started is None else started
+        self.loaded = 0
+        self.pending = 0
+        self.time_to_playable = None
+        self._label = None
+        if isinstance(self.next_scene, type):
+            self.next_scene = self.next_scene(set_up=set_up)
+        super(LoadingScene, self).__init__(**kwargs)
+        self.background_color = (255, 255, 255)
+
+    def get_progress_sprites(self):
+        self._label = Label("Loading", size=50)
+        self._label.position = ppb.Vector(0, 0)
+        yield self._label
+
+    def update_progress(self, progress):
+        self._label.update_text(f"Loading {progress:.0%} ({self.loaded}/{self.loaded + self.pending})")
+
+    def on_asset_loaded(self, event, signal):
+        # Counted over every asset queued in the game, not only the ones of this scene.
+        self.loaded = event.total_loaded
+        self.pending = event.total_queued
+        super(LoadingScene, self).on_asset_loaded(event, signal)
+
+    def on_idle(self, event, signal):
+        if self._finished and self.time_to_playable is None:
+            self.time_to_playable = time.perf_counter() - self.started
+            logger.info("Playable after %.2f s, %s assets loaded.", self.time_to_playable, self.loaded)
+        super(LoadingScene, self).on_idle(event, signal)
@@ -1,6 +1,17 @@
 import ppb
-from ppb import Sound, RectangleSprite, Image
-from models import Floor, Player, is_colliding
+from ppb import RectangleSprite
+from ext import VoiceAllocator, assets, post_mix
+
+
+_play_sound_events = {}
+
+
+def _play_sound_event(sound):
+    """Get the PlaySound event shared by every note playing the same sound."""
+    event = _play_sound_events.get(sound.name)
+    if event is None or event.sound is not sound:
+        event = _play_sound_events[sound.name] = ppb.events.PlaySound(sound)
+    return event
 
 
 class Note(RectangleSprite):
@@ -24,80 +35,106 @@ class Note(RectangleSprite):
         The direction the note is heading (usually down).
     play_at: int
         The beat the note will play at.
+    play_time: float
+        The second of the song the note will play at. Set when spawned.
     autoplay: bool
         Whether the tile will autoplay.
+    pool: Optional[:ref:`NotePool`]
+        The pool the note is returned to once it is judged.
 
     """
 
-    def __init__(self, note_type: str, play_at: int, autoplay=False):
+    def __init__(self, note_type: str = "blank", play_at: float = 0, autoplay=False):
         super().__init__()
         # Set up img as another variable and image to None
         # so that we can "trick" the render not to render this Sprite.
+        self.image = None
+        self.scene = None
+        self.position = ppb.Vector(0, 0)
+        self.direction = ppb.Vector(0, -1)
+        self.speed = 0
+        self.layer = 2
+        self.song = None
+        self.pool = None
+        # Set by the spawner. Tells a lane queue whether this sprite still is the note it queued.
+        self.spawn_id = -1
+        self.play_time = 0.0
+        # The NoteField moving this note, see Song.update.
+        self.field = None
+        self.field_slot = -1
+        self._img = None
+        self.sound = None
+        # Whether the sound is already queued in the post mixer.
+        self.sound_queued = False
+        self.assign(note_type, play_at, autoplay=autoplay)
+
+    def assign(self, note_type: str, play_at: float, autoplay=False):
+        """
+        Turn this Note into another note. Used to reuse pooled notes.
+
+        Parameters
+        ----------
+        note_type: str
+            The note to become.
+        play_at: float
+            The beat number to play at.
+        autoplay: bool
+            Whether the tile will autoplay.
+        """
         self.name = note_type
+        previous_img, previous_sound = self._img, self.sound
 
         if self.is_blank:
-            self._img = Image(f"/assets/tiles/{note_type}.png")
+            self._img = assets.image(f"/assets/tiles/{note_type}.png")
             self.sound = None
             self.sound_to_play = None
         else:
-            self._img = Image(f"/assets/tiles/{note_type[0:-1]}.png")
-            self.sound = Sound(f"/assets/notes/{note_type}.wav")
-            self.sound_to_play = ppb.events.PlaySound(self.sound)
+            self._img = assets.image(f"/assets/tiles/{note_type[0:-1]}.png")
+            self.sound = assets.sound(f"/assets/notes/{note_type}.wav")
+            self.sound_to_play = _play_sound_event(self.sound)
+
+        # Release after acquiring so a note that keeps its type never drops the asset.
+        assets.release(previous_img)
+        assets.release(previous_sound)
 
-        self.image = None
-        self.scene = None
-        self.position = ppb.Vector(0, 0)
-        self.direction = ppb.Vector(0, -1)
-        self.speed = 0
         self.play_at = float(play_at) or 0
-        self.layer = 2
-        self.song = None
         self.autoplay = autoplay
+        self.sound_queued = False
 
     @property
     def is_blank(self):
         return 'blank' in self.name
 
-    def on_update(self, event, signal):
-        print(self.song.current_beat)
-        if self.visible:
-            scene = self.scene = event.scene
-            for floor in scene.get(kind=Floor):
-                if self.autoplay:
-                    if self.song.current_beat >= self.play_at:
-                        self.reset()
-                        self.play(signal)
-                else:
-                    for player in scene.get(kind=Player):
-                        if is_colliding(self, floor):
-                            self.reset()
-                            player.misses += 1
-                        if is_colliding(self, player):
-                            self.reset()
-                            self.play(signal)
-                            player.hits += 1
-
-            self.position += self.direction * self.speed * event.time_delta
-
     def reset(self):
-        """Resets the tile to a default position and set it to not be visible."""
+        """
+        Resets the tile to a default position, set it to not be visible,
+        remove it from the scene it was spawned in and return it to its pool.
+        """
         self.image = None
         self.position = ppb.Vector(0, 0)
         self.speed = 0
-
-    def calculate_start_height(self, bpm, speed, target_height):
+        if self.field is not None:
+            self.field.remove(self)
+        if self.scene is not None:
+            self.scene.remove(self)
+            self.scene = None
+        if self.pool is not None:
+            self.pool.release(self)
+
+    def calculate_start_height(self, tempo, speed, target_height, elapsed=0):
         """
         Calculate the start height of the note.
 
-        :param bpm: int
-            Beats per minute
+        :param tempo: :ref:`TempoMap`
+            The tempo map of the song.
         :param speed: int
             Speed of the note.
         :param target_height: float
             The target's height.
+        :param elapsed: float
+            Seconds of the song that already played when the note starts.
         """
-        seconds_per_beat = (60 / bpm)
-        seconds_to_beat = self.play_at * seconds_per_beat
+        seconds_to_beat = tempo.seconds_at(self.play_at) - elapsed
         # Need to add 0.5 to make the song play on beat.
         return speed * seconds_to_beat + target_height + 0.5
 
@@ -119,18 +156,43 @@ class Note(RectangleSprite):
         self.speed = speed
         self.song = song
 
-    def play(self, signal):
+    def play(self, signal, at=None):
         """
         Play's this Note's note...
 
+        Mixed in at the given song time when the post mixer is running,
+        otherwise played with a PlaySound event at the next frame.
+
         Parameters
         ----------
         signal: ppb.events.Signal
             The signal to invoke the PlaySound event.
+        at: Optional[float]
+            The song time in seconds the note was hit at. Right away if None.
         """
-        if not self.is_blank:
+        if self.is_blank or self.sound_queued:
+            return
+        if not self.queue_sound(at):
             signal(self.sound_to_play)
 
+    def queue_sound(self, at=None) -> bool:
+        """
+        Queue the sound of the note in the post mixer, ahead of time if needed.
+        Notes hit by a player win over autoplayed notes when voices run out.
+
+        :param at: Optional[float]
+            The song time in seconds to start the sound at. Right away if None.
+        :return: bool
+            Whether the sound was queued. False if the post mixer is not running.
+        """
+        if self.is_blank or not post_mix.active:
+            return False
+        volume = self.pool.volume if self.pool is not None and self.pool.volume is not None else 1.0
+        priority = VoiceAllocator.NORMAL if self.autoplay else VoiceAllocator.HIGH
+        post_mix.play(post_mix.sample(self.sound.name), at=at, volume=volume, priority=priority)
+        self.sound_queued = True
+        return True
+
     # def on_key_pressed(self, key_event, signal):
     #     if not self.visible:
     #         self.start(position=(5, 5), speed=1)
@@ -0,0 +1,153 @@
+from typing import List
+
+import numpy as np
+import ppb
+
+
+class NoteField:
+    """
+    Moves and collision-tests every active note at once.
+
+    Positions, lanes and states live in NumPy arrays. Every step computes the height
+    of all notes from the song time in one vectorized pass, tests them against the
+    players, and only writes positions back to the sprites inside the camera.
+
+    Parameters
+    ----------
+    capacity: int
+        The amount of notes to reserve room for. Grows when needed.
+    margin: float
+        How far outside the camera sprites still get their position written back.
+
+    Attributes
+    ----------
+    notes: List[:ref:`Note`]
+        The active notes, in slot order.
+    """
+
+    def __init__(self, capacity: int = 64, margin: float = 1.0):
+        self.margin = margin
+        self.notes: List = []
+        self._x = np.zeros(capacity)
+        self._base = np.zeros(capacity)
+        self._speed = np.zeros(capacity)
+        self._play_time = np.zeros(capacity)
+        self._half_width = np.zeros(capacity)
+        self._half_height = np.zeros(capacity)
+        self._autoplay = np.zeros(capacity, dtype=bool)
+        self._y = np.zeros(capacity)
+
+    def __len__(self):
+        return len(self.notes)
+
+    @property
+    def capacity(self):
+        return len(self._x)
+
+    def _grow(self):
+        size = self.capacity * 2 or 1
+        for name in ("_x", "_base", "_speed", "_play_time", "_half_width", "_half_height", "_autoplay", "_y"):
+            column = getattr(self, name)
+            grown = np.zeros(size, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def add(self, note, base_height: float):
+        """
+        Start moving a note.
+
+        :param note: :ref:`Note`
+            The spawned note. Its x position, speed and play time are used.
+        :param base_height: float
+            The height the note is at when its play time is reached.
+        """
+        slot = len(self.notes)
+        if slot == self.capacity:
+            self._grow()
+        self.notes.append(note)
+        note.field = self
+        note.field_slot = slot
+        self._x[slot] = note.position.x
+        self._base[slot] = base_height
+        self._speed[slot] = note.speed
+        self._play_time[slot] = note.play_time
+        self._half_width[slot] = note.width / 2
+        self._half_height[slot] = note.height / 2
+        self._autoplay[slot] = note.autoplay
+        self._y[slot] = note.position.y
+
+    def remove(self, note):
+        """Stop moving a note. The last note takes over its slot."""
+        slot = note.field_slot
+        last = len(self.notes) - 1
+        if slot != last:
+            moved = self.notes[slot] = self.notes[last]
+            moved.field_slot = slot
+            for column in (
+                self._x, self._base, self._speed, self._play_time,
+                self._half_width, self._half_height, self._autoplay, self._y,
+            ):
+                column[slot] = column[last]
+        self.notes.pop()
+        note.field = None
+        note.field_slot = -1
+
+    def clear(self):
+        """Stop moving every note."""
+        for note in self.notes:
+            note.field = None
+            note.field_slot = -1
+        self.notes = []
+
+    def step(self, now: float, players=(), camera=None):
+        """
+        Move every note to its height at the given song time and find the notes to judge.
+
+        :param now: float
+            The current position in the song in seconds.
+        :param players: Iterable[:ref:`Player`]
+            The players that can catch notes.
+        :param camera: Optional[ppb.Camera]
+            Only notes within the camera get their sprite position updated. All if None.
+        :return: Tuple[List[:ref:`Note`], List[:ref:`Note`]]
+            The autoplayed notes that are due and the notes caught by a player.
+        """
+        count = len(self.notes)
+        if not count:
+            return [], []
+
+        play_time = self._play_time[:count]
+        y = self._y[:count]
+        np.multiply(self._speed[:count], play_time - now, out=y)
+        y += self._base[:count]
+
+        x = self._x[:count]
+        autoplay = self._autoplay[:count]
+        due = autoplay & (play_time <= now)
+
+        caught = np.zeros(count, dtype=bool)
+        half_width = self._half_width[:count]
+        half_height = self._half_height[:count]
+        for player in players:
+            px, py = player.position
+            caught |= (
+                (np.abs(x - px) <= half_width + player.width / 2)
+                & (np.abs(y - py) <= half_height + player.height / 2)
+            )
+        caught &= ~autoplay
+
+        if camera is None:
+            visible = range(count)
+        else:
+            visible = np.flatnonzero(
+                (y + half_height >= camera.bottom - self.margin)
+                & (y - half_height <= camera.top + self.margin)
+            )
+        notes = self.notes
+        for slot in visible:
+            notes[slot].position = ppb.Vector(x[slot], y[slot])
+
+        return (
+            [notes[slot] for slot in np.flatnonzero(due)],
+            [notes[slot] for slot in np.flatnonzero(caught)],
+        )
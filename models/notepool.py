@@ -0,0 +1,136 @@
+import logging
+from typing import List
+
+from . import Note
+
+logger = logging.getLogger(__name__)
+
+
+class NotePool:
+    """
+    A pool of reusable Note sprites.
+
+    Notes are handed out when a chart note is spawned and come back when the note is
+    hit or missed (see :meth:`Note.reset`), so playing a song does not keep allocating
+    sprites. The pool grows past its size when it runs dry, which is counted in the
+    statistics so the size can be tuned per chart.
+
+    Parameters
+    ----------
+    size: int
+        The amount of notes to pre-allocate.
+
+    Attributes
+    ----------
+    size: int
+        The amount of notes the pool currently owns.
+    in_use: int
+        The amount of notes that are currently handed out.
+    high_water_mark: int
+        The largest amount of notes that were handed out at once.
+    overflows: int
+        How many times a note had to be allocated because the pool was empty.
+    volume: float
+        The volume applied to the sound of every handed out note.
+    """
+
+    DEFAULT_SIZE = 64
+
+    def __init__(self, size: int = DEFAULT_SIZE):
+        self._free: List[Note] = []
+        self.size = 0
+        self.in_use = 0
+        self.high_water_mark = 0
+        self.overflows = 0
+        self.acquired = 0
+        self.released = 0
+        self.volume = None
+        self._handed_out = set()
+        self.reserve(size)
+
+    def __len__(self):
+        """The amount of notes ready to be handed out."""
+        return len(self._free)
+
+    def reserve(self, size):
+        """Pre-allocate notes until the pool owns at least ``size`` notes."""
+        while self.size < size:
+            self._free.append(Note())
+            self.size += 1
+
+    def acquire(self, note_type: str, play_at: float, autoplay=False) -> Note:
+        """
+        Get a note from the pool.
+
+        Parameters
+        ----------
+        note_type: str
+            The note to create
+        play_at: float
+            The beat number to play at.
+        autoplay: bool
+            Whether the tile will autoplay.
+        """
+        if self._free:
+            note = self._free.pop()
+        else:
+            note = Note()
+            self.size += 1
+            self.overflows += 1
+        note.assign(note_type, play_at, autoplay=autoplay)
+        if self.volume is not None and not note.is_blank:
+            note.sound.volume = self.volume
+        note.pool = self
+        self._handed_out.add(note)
+        self.acquired += 1
+        self.in_use += 1
+        self.high_water_mark = max(self.high_water_mark, self.in_use)
+        return note
+
+    def release(self, note: Note):
+        """Return a note to the pool. Called by :meth:`Note.reset`."""
+        if note.pool is not self:
+            return
+        note.pool = None
+        note.song = None
+        self._handed_out.discard(note)
+        self._free.append(note)
+        self.released += 1
+        self.in_use -= 1
+
+    def release_all(self):
+        """Take back every note that is still handed out, e.g. when a song restarts."""
+        for note in list(self._handed_out):
+            note.reset()
+
+    @property
+    def stats(self) -> dict:
+        """The pool statistics."""
+        return {
+            "size": self.size,
+            "free": len(self._free),
+            "in_use": self.in_use,
+            "high_water_mark": self.high_water_mark,
+            "overflows": self.overflows,
+            "acquired": self.acquired,
+            "released": self.released,
+        }
+
+    def log_stats(self):
+        """Log the pool statistics."""
+        logger.info("NotePool %s", self.stats)
+
+
+_default_pool = None
+
+
+def get_default_pool() -> NotePool:
+    """
+    Get the pool shared between songs.
+
+    Sharing it means restarting a song reuses the notes of the previous one.
+    """
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = NotePool()
+    return _default_pool
@@ -4,8 +4,9 @@ import ppb
 from ppb import keycodes, Sprite, Vector
 from ppb.camera import Camera
 from ppb.events import KeyPressed, KeyReleased
-from ppb.features.animation import Animation
-from . import Floor, Label, is_colliding
+from ext import assets
+from . import Floor, Label, colliding
+from .judgement import Score
 
 
 class Player(Sprite):
@@ -45,6 +46,8 @@ class Player(Sprite):
         The player's headed direction.
     pressed_keys: List[ppb.keycodes.KeyCode]
         A list of key codes that are currently being pressed.
+    score: :ref:`Score`
+        The breakdown of the notes judged for the player.
     """
 
     LEFT = keycodes.A
@@ -58,6 +61,8 @@ class Player(Sprite):
     GRAVITY = 1.8  # Earth Gravity
     MOVEMENT_AMPLITUDE = 1
     ZOOM_AMPLITUDE = 2
+    # Tracked by the scene's collision index.
+    collidable = True
 
     def __init__(
         self,
@@ -85,13 +90,13 @@ class Player(Sprite):
         # self.image = ppb.Image(image_location)
         # self.image = Animation("assets/player/left_walk/{0..8}.png", 8)
         self._folder_name = f"assets/player/{player_type}/"
-        self._left_walk_animation = Animation(
+        self._left_walk_animation = assets.animation(
             self._folder_name + "left_walk/{0..8}.png", 8
         )
-        self._right_walk_animation = Animation(
+        self._right_walk_animation = assets.animation(
             self._folder_name + "right_walk/{0..8}.png", 8
         )
-        self._stand_image = ppb.Image(self._folder_name + "stand_still/0.png")
+        self._stand_image = assets.image(self._folder_name + "stand_still/0.png")
 
         self.image = None
         self.stand_still()
@@ -105,8 +110,7 @@ class Player(Sprite):
         self._several_jumps = several_jumps
         self.layer = 4
         self.max_health = max_health
-        self.hits = 0
-        self.misses = 0
+        self.score = Score()
         self._health_label = None
         self._accuracy_label = None
 
@@ -126,17 +130,20 @@ class Player(Sprite):
     def health(self):
         return self.max_health - self.misses
 
+    @property
+    def hits(self):
+        return self.score.hits
+
+    @property
+    def misses(self):
+        return self.score.misses
+
     @property
     def accuracy(self):
-        total = self.hits + self.misses
-        if total != 0:
-            return self.hits / (self.hits + self.misses)
-        else:
-            return 1.00
+        return self.score.accuracy
 
     def reset(self):
-        self.hits = 0
-        self.misses = 0
+        self.score.reset()
         self.max_health = 10
 
     def walk_left(self):
@@ -156,24 +163,26 @@ class Player(Sprite):
 
     def on_update(self, event, signal):
         scene = self.scene = event.scene
-        # Update the health/accuracy label
-        if self._health_label and self._accuracy_label:
-            scene.remove(self._health_label)
-            scene.remove(self._accuracy_label)
-        self._health_label = Label(f"Health: {self.health}", size=50)
-        self._accuracy_label = Label(f"Accuracy: {round(self.accuracy, 2):.2f}", size=50)
+        # Update the health/accuracy label. They are only rendered again when the text changes.
+        health = f"Health: {self.health}"
+        accuracy = f"Accuracy: {round(self.accuracy, 2):.2f}"
+        if self._health_label is None:
+            self._health_label = Label(health, size=50)
+            self._accuracy_label = Label(accuracy, size=50)
+            scene.add(self._health_label)
+            scene.add(self._accuracy_label)
+        else:
+            self._health_label.update_text(health)
+            self._accuracy_label.update_text(accuracy)
         health_x, health_y = scene.main_camera.top_left
         self._health_label.position = Vector(health_x+2, health_y-2.5)
         self._accuracy_label.position = Vector(health_x+2.9, health_y-3.5)
-        scene.add(self._health_label)
-        scene.add(self._accuracy_label)
 
         self.direction += Vector(0, -self.GRAVITY) * event.time_delta
 
-        for floor in scene.get(kind=Floor):
-            if is_colliding(self, floor):
-                if self.direction[1] <= 0:
-                    self.direction = Vector(self.direction[0], 0)
+        if colliding(scene, self, Floor):
+            if self.direction[1] <= 0:
+                self.direction = Vector(self.direction[0], 0)
 
         self.position += self.direction * self.speed * event.time_delta
 
@@ -267,11 +276,7 @@ class Player(Sprite):
                 if self._several_jumps:
                     self.direction += jump_vec
                 else:
-                    touching_floor = False
-                    for floor in self.scene.get(kind=Floor):
-                        if is_colliding(self, floor):
-                            touching_floor = True
-                    if touching_floor:
+                    if colliding(self.scene, self, Floor):
                         self.direction += jump_vec
 
     def _control_camera_movement(self, key):
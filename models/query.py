@@ -0,0 +1,121 @@
+from typing import Dict, Optional, Tuple, Type
+
+
+class QueryCache:
+    """
+    Keeps the results of queries by type on a scene until they change.
+
+    ppb already files the children of a scene under every class of their type, but
+    every ``scene.get(kind=...)`` copies that set again. The cache keeps the objects
+    of a type as a tuple, returned again until an object of that type is added or
+    removed, so a type asked for by many sprites every frame is only collected once.
+
+    Parameters
+    ----------
+    scene: ppb.Scene
+        The scene whose children are queried. It tells the cache about every object
+        added or removed through :meth:`invalidate`.
+
+    Attributes
+    ----------
+    queries: int
+        The amount of queries made in the last frame.
+    misses: int
+        The amount of queries in the last frame that had to collect their objects.
+    frames: int
+        The amount of frames counted.
+    """
+
+    def __init__(self, scene):
+        self.queries = self.misses = 0
+        self.total_queries = self.total_misses = 0
+        self.frames = 0
+        self._queries = self._misses = 0
+        self._scene = scene
+        self._results: Dict[Type, Tuple] = {}
+
+    def invalidate(self, game_object):
+        """Forget the results of every type an added or removed object belongs to."""
+        for kind in type(game_object).mro():
+            self._results.pop(kind, None)
+
+    def get(self, kind: Type) -> Tuple:
+        """
+        Get the objects of a type.
+
+        :param kind: Type
+            The type of objects, subclasses included.
+        :return: Tuple
+            The objects. The same tuple is returned until the objects of the type change.
+        """
+        self._queries += 1
+        results = self._results.get(kind)
+        if results is None:
+            self._misses += 1
+            results = self._results[kind] = tuple(self._scene.children.get(kind=kind))
+        return results
+
+    def single(self, kind: Type) -> Optional[object]:
+        """
+        Get the object of a type that a scene only has one of, such as the :ref:`Conductor`.
+
+        :param kind: Type
+            The type of object, subclasses included.
+        :return: Optional[object]
+            The object, None if there is none, or any one of them if there are several.
+        """
+        results = self.get(kind)
+        return results[0] if results else None
+
+    def next_frame(self):
+        """Finish counting a frame and start counting the next one."""
+        self.queries, self.misses = self._queries, self._misses
+        self.total_queries += self._queries
+        self.total_misses += self._misses
+        self._queries = self._misses = 0
+        self.frames += 1
+
+    @property
+    def stats(self) -> dict:
+        """The query statistics, of the last frame and on average."""
+        frames = self.frames or 1
+        return {
+            "queries": self.queries,
+            "misses": self.misses,
+            "avg_queries": round(self.total_queries / frames, 1),
+            "avg_misses": round(self.total_misses / frames, 1),
+        }
+
+
+def objects(scene, kind: Type) -> Tuple:
+    """
+    Get the objects of a type in a scene.
+
+    Uses the scene's query cache when it has one and collects them otherwise.
+
+    :param scene: ppb.Scene
+        The scene to look in.
+    :param kind: Type
+        The type of objects, subclasses included.
+    :return: Tuple
+        The objects.
+    """
+    cache = getattr(scene, "queries", None)
+    if isinstance(cache, QueryCache):
+        return cache.get(kind)
+    return tuple(scene.get(kind=kind))
+
+
+def single(scene, kind: Type) -> Optional[object]:
+    """
+    Get the object of a type that a scene only has one of.
+
+    :param scene: ppb.Scene
+        The scene to look in.
+    :param kind: Type
+        The type of object, subclasses included.
+    :return: Optional[object]
+        The object, None if there is none, or any one of them if there are several.
+    """
+    found = objects(scene, kind)
+    return found[0] if found else None
@@ -0,0 +1,174 @@
+import heapq
+from itertools import count
+from math import ceil
+from typing import Callable, List, Optional
+
+from ext.ext_events import Bar, Beat, Subdivision
+
+BEAT = "beat"
+BAR = "bar"
+SUBDIVISION = "subdivision"
+_EVENTS = {BEAT: Beat, BAR: Bar, SUBDIVISION: Subdivision}
+# Events due at the same time go out bar first, then beat, then subdivision.
+_PRIORITY = {BAR: 0, BEAT: 1, SUBDIVISION: 2}
+
+
+class Subscription:
+    """
+    A callback for one kind of song event.
+
+    Parameters
+    ----------
+    kind: str
+        ``"beat"``, ``"bar"`` or ``"subdivision"``.
+    callback: Callable
+        Called with every event, in song order.
+    lookahead: float
+        How many seconds before its time an event is dispatched. The event still
+        carries its exact time, so audio cues can be queued ahead of it.
+    """
+
+    def __init__(self, kind: str, callback: Callable, lookahead: float = 0.0):
+        if kind not in _EVENTS:
+            raise ValueError(f"Unknown event kind {kind!r}, expected one of {sorted(_EVENTS)}.")
+        self.kind = kind
+        self.callback = callback
+        self.lookahead = lookahead
+        self.active = True
+        # The number of the next event to schedule.
+        self._next = 0
+
+
+class BeatScheduler:
+    """
+    Dispatches beat, bar and subdivision events by song time.
+
+    Upcoming events wait in a priority queue keyed by the time they are due. Every
+    :meth:`tick` dispatches all events whose time has passed, in order and with the
+    exact time they were scheduled for, so a slow frame delays events but never drops
+    them.
+
+    Parameters
+    ----------
+    tempo: Optional[:ref:`TempoMap`]
+        The tempo map the events follow. Events are scheduled once it is set.
+    subdivisions: int
+        The amount of subdivision events per beat.
+
+    Attributes
+    ----------
+    dispatched: int
+        The amount of events dispatched.
+    late: float
+        The most an event was dispatched after its due time, in seconds.
+    """
+
+    def __init__(self, tempo=None, subdivisions: int = 2):
+        self.subdivisions = subdivisions
+        self.tempo = tempo
+        self.dispatched = 0
+        self.late = 0.0
+        self._subscriptions: List[Subscription] = []
+        self._queue: List[tuple] = []
+        self._order = count()
+        self._position = 0.0
+
+    def subscribe(self, kind: str, callback: Callable, lookahead: float = 0.0) -> Subscription:
+        """
+        Call a callback for every event of a kind from the current song position on.
+
+        :param kind: str
+            ``"beat"``, ``"bar"`` or ``"subdivision"``.
+        :param callback: Callable
+            Called with a :ref:`Beat`, :ref:`Bar` or :ref:`Subdivision` event.
+        :param lookahead: float
+            How many seconds before its time an event is dispatched.
+        :return: :ref:`Subscription`
+            The subscription, to unsubscribe with.
+        """
+        subscription = Subscription(kind, callback, lookahead)
+        self._subscriptions.append(subscription)
+        if self.tempo is not None:
+            self._start(subscription, self._position)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Stop calling a subscription. Its queued event is skipped when it comes up."""
+        subscription.active = False
+        self._subscriptions.remove(subscription)
+
+    def reset(self, tempo, position: float = 0.0):
+        """
+        Schedule the events of a tempo map from a song position on.
+
+        :param tempo: :ref:`TempoMap`
+            The tempo map the events follow.
+        :param position: float
+            The song position in seconds. Events at or after it are dispatched.
+        """
+        self.tempo = tempo
+        self._position = position
+        self._queue = []
+        self.late = 0.0
+        for subscription in self._subscriptions:
+            self._start(subscription, position)
+
+    def _beat_of(self, kind: str, number: int) -> float:
+        if kind == BEAT:
+            return float(number)
+        if kind == BAR:
+            return self.tempo.bar_start(number)
+        return number / self.subdivisions
+
+    def _start(self, subscription: Subscription, position: float):
+        beat = self.tempo.beat_at(position)
+        kind = subscription.kind
+        if kind == BEAT:
+            number = ceil(beat)
+        elif kind == SUBDIVISION:
+            number = ceil(beat * self.subdivisions)
+        else:
+            bar, offset = self.tempo.bar_at(beat)
+            number = bar + (1 if offset else 0)
+        subscription._next = max(number, 0)
+        self._push(subscription)
+
+    def _push(self, subscription: Subscription):
+        number = subscription._next
+        beat = self._beat_of(subscription.kind, number)
+        time = self.tempo.seconds_at(beat)
+        event = _EVENTS[subscription.kind](number=number, beat=beat, time=time)
+        heapq.heappush(
+            self._queue,
+            (time - subscription.lookahead, _PRIORITY[subscription.kind], next(self._order), event, subscription),
+        )
+
+    def next_due(self) -> Optional[float]:
+        """The song time the next event is due at, or None if nothing is scheduled."""
+        while self._queue and not self._queue[0][-1].active:
+            heapq.heappop(self._queue)
+        return self._queue[0][0] if self._queue else None
+
+    def tick(self, now: float) -> List:
+        """
+        Dispatch every event that is due.
+
+        :param now: float
+            The current song position in seconds.
+        :return: List
+            The dispatched events, in order.
+        """
+        self._position = now
+        dispatched = []
+        queue = self._queue
+        while queue and queue[0][0] <= now:
+            due, _, _, event, subscription = heapq.heappop(queue)
+            if not subscription.active:
+                continue
+            subscription._next += 1
+            self._push(subscription)
+            self.late = max(self.late, now - due)
+            self.dispatched += 1
+            dispatched.append(event)
+            subscription.callback(event)
+        return dispatched
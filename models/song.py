@@ -1,10 +1,14 @@
-import json
-from typing import List
+from typing import List, Optional, Sequence
 
-import ppb
-
-from . import Note, BeatZone
-from random import randint
+from ext import post_mix
+from . import BeatZone
+from .chart import Chart
+from .judgement import Judge, JudgementResult
+from .lanes import LaneQueue, LaneStrategy, layout_cache
+from .notefield import NoteField
+from .notepool import NotePool, get_default_pool
+from .spawner import NoteSpawner
+from .tempo import TempoMap
 
 
 class Song:
@@ -17,36 +21,88 @@ class Song:
     ----------
     name: str
         The name of the song.
-    tiles: List[:ref:`Note`]
-        A list of note (tile) objects.
-    spread: bool
-        Whether the notes should be randomly spread.
-        By default, notes will fall into 4 columns.
+    chart: :ref:`Chart`
+        The notes (tiles) of the song.
     height: int
         The height for beat zones to spawn at.
+    pool: :ref:`NotePool`
+        The pool to take Note sprites from. Defaults to the pool shared between songs.
+    lane_strategy: Optional[:ref:`LaneStrategy`]
+        Decides the column of every note. Compiled charts with lanes keep their lanes
+        and other charts are spread randomly if None.
+    judge: Optional[:ref:`Judge`]
+        Judges the hits. Uses the default judgement windows if None.
 
     Attributes
     ----------
     name: str
         The name of the song.
-    tiles: List[:ref:`Note`]
-        A list of note (tile) objects.
+    chart: :ref:`Chart`
+        The notes (tiles) of the song.
+    tile_lanes: Sequence[int]
+        The lane (column index) of every note in the chart.
+    tile_columns: List[float]
+        The x position of the column of every note in the chart.
+    lane_queues: List[:ref:`LaneQueue`]
+        The spawned notes waiting to be judged, per lane.
+    judge: :ref:`Judge`
+        Judges the hits.
+    field: :ref:`NoteField`
+        Moves the spawned tiles.
+    pool: :ref:`NotePool`
+        The pool Note sprites are taken from.
+    tempo: Optional[:ref:`TempoMap`]
+        Converts between beats and seconds. Set when the song is played.
     """
 
-    def __init__(self, name: str, tiles=None, spread=False, height=None, autoplay=False):
+    def __init__(
+        self,
+        name: str,
+        chart=None,
+        height=None,
+        autoplay=False,
+        pool=None,
+        lane_strategy: Optional[LaneStrategy] = None,
+        judge: Optional[Judge] = None,
+    ):
         self.name: str = name
-        self.tiles: List[Note] = tiles or []
-        self._spread = spread
+        self.chart: Chart = chart or Chart.from_notes(name, [])
+        self.tile_lanes: Sequence[int] = []
+        self.tile_columns: List[float] = []
+        self.pool: NotePool = pool or get_default_pool()
+        self.lane_strategy = lane_strategy
+        self.judge = judge or Judge()
         self.current_beat_in_seconds = 0
+        self.clock = None
         self.x_columns = [-4, -2, 2, 4]
+        self.lane_queues = [LaneQueue() for _ in self.x_columns]
         self.beat_zones = self._create_beat_zones(height=height or -4)
         self._floor_height = height
         self.bpm = -1
+        self.tempo: Optional[TempoMap] = self.chart.tempo
         self._autoplay = autoplay
+        self.spawner = NoteSpawner()
+        self.field = NoteField()
+
+    @property
+    def autoplay(self):
+        """Whether the song tiles autoplay."""
+        return self._autoplay
 
     @property
     def current_beat(self):
-        return (self.bpm / 60) * self.current_beat_in_seconds
+        if self.tempo is None:
+            return 0
+        return self.tempo.beat_at(self.now())
+
+    def now(self) -> float:
+        """
+        The current position of the song in seconds, in between updates as well.
+        The position of the last update if the song has no clock.
+        """
+        if self.clock is None:
+            return self.current_beat_in_seconds
+        return self.clock.now()
 
     def _create_beat_zones(self, height):
         """
@@ -79,77 +135,134 @@ class Song:
                     (column, height + 1),
                     image_location=images[idx],
                     trigger_key=trigger_keys[idx],
-                    glow_image_location=glow_images[idx]
+                    glow_image_location=glow_images[idx],
+                    lane=idx,
                 )
             )
         return zones
 
     @staticmethod
-    def load(file_location, spread=False, floor_height=None, autoplay=False):
+    def load(
+        file_location, floor_height=None, autoplay=False, bpm=None, lane_strategy=None
+    ):
         """
         Load a song
 
         :param file_location:
-            The json file to load.
-        :param spread:
-            Whether the notes should be randomly spread.
-            By default, notes will fall into 4 columns.
+            The compiled chart or json file to load.
+            Files that are not compiled charts are parsed as json.
         :param floor_height: float
             The floor height to start beat zones at.
         :param autoplay: bool
             Whether the song tile should autoplay.
+        :param bpm: int
+            Beats per minute of the song. Used to time the notes of json files.
+        :param lane_strategy: Optional[:ref:`LaneStrategy`]
+            Decides the column of every note.
         :return: :ref:`Song`
             returns the Song object.
         """
-        with open(file_location) as f:
-            song = json.load(f)
-
-        song = song["song"]
-        all_notes = song.get("tiles")
-        tiles = []
-        for beat_number, notes_to_play in all_notes.items():
-            for note in notes_to_play:
-                tiles.append(Note(note, beat_number, autoplay=autoplay))
+        chart = Chart.load(file_location, bpm=bpm)
         return Song(
-            name=song.get("name"), tiles=tiles, spread=spread, height=floor_height, autoplay=autoplay
+            name=chart.name,
+            height=floor_height,
+            autoplay=autoplay,
+            chart=chart,
+            lane_strategy=lane_strategy,
         )
 
-    def play(self, scene, bpm, volume=0.1, tile_speed=1):
-        """Play the song (game) in the scene."""
-        self.bpm = bpm
+    def play(self, scene, bpm, volume=0.1, tile_speed=1, lookahead=NoteSpawner.DEFAULT_LOOKAHEAD):
+        """
+        Play the song (game) in the scene.
+
+        Tiles are not added to the scene here. :meth:`update` takes them from the pool
+        shortly before they fall into the camera.
+
+        Songs with tempo changes follow their own tempo map, other songs play at ``bpm``.
+        """
+        self.tempo = self._tempo_for(bpm)
+        self.bpm = self.tempo.bpm
         self.current_beat_in_seconds = 0
         for beat_zone in self.beat_zones:
             beat_zone.scene = scene
+            beat_zone.song = self
             scene.add(beat_zone)
-        self.arrange_tiles(tile_speed=tile_speed, bpm=bpm)
-        for tile in self.tiles:
-            scene.add(tile)
-            tile.start(tile.position, speed=tile_speed, song=self)
-            if not tile.is_blank:
-                tile.sound_to_play.sound.volume = volume
-
-    def arrange_tiles(self, tile_speed, bpm):
+        self.arrange_tiles()
+        # Recycle notes left over from a previous play.
+        self.pool.release_all()
+        self.field.clear()
+        post_mix.clear()
+        for queue in self.lane_queues:
+            queue.clear()
+        self.pool.volume = volume
+        self.spawner.lookahead = lookahead
+        self.spawner.prepare(
+            self,
+            tempo=self.tempo,
+            speed=tile_speed,
+            target_height=self._floor_height or 0,
+        )
+        self.update(scene)
+
+    def _tempo_for(self, bpm) -> TempoMap:
+        tempo = self.chart.tempo
+        if tempo is not None and (not tempo.is_constant or not bpm):
+            return tempo
+        if not bpm:
+            raise ValueError(f"The tempo of {self.name!r} is unknown, a bpm is needed to play it.")
+        return TempoMap.constant(bpm)
+
+    def update(self, scene, signal=None):
         """
-        Arrange the tiles into columns.
+        Spawn the tiles that are about to fall into the camera, move every spawned tile,
+        play the tiles that were autoplayed or caught by a player and miss the tiles
+        that can no longer be judged.
 
-        :param tile_speed: float
-            The speed the tiles are going.
-        :param bpm: int
-            Beats per minute of the song.
+        :param scene: ppb.Scene
+            The scene the song is played in.
+        :param signal: ppb.events.Signal
+            The signal to play the tile sounds with. Tiles are not played if None.
         """
-        beats_occupied = {}
-        for tile in self.tiles:
-            while True:
-                random_column = randint(0, len(self.x_columns) - 1)
-                column_data = beats_occupied.get(random_column)
-                if column_data and column_data.get(tile.play_at):
+        from . import Player  # avoid circular import
+        now = self.current_beat_in_seconds
+        self.spawner.update(scene, now)
+        due, caught = self.field.step(
+            now, players=list(scene.get(kind=Player)), camera=scene.main_camera
+        )
+        for tile in due:
+            self._play_tile(tile, signal, tile.play_time)
+        for tile in caught:
+            self.record(scene, self.judge.catch(now, tile.play_time))
+            self._play_tile(tile, signal, now)
+        self.expire(scene, now)
+
+    @staticmethod
+    def _play_tile(tile, signal, at=None):
+        if signal is not None:
+            tile.play(signal, at=at)
+        tile.reset()
+
+    def expire(self, scene, now):
+        """Miss the tiles whose judgement window has passed."""
+        for queue in self.lane_queues:
+            for tile in queue.expire(now, self.judge.expire_after):
+                if tile.autoplay:
+                    # Autoplayed tiles play themselves.
                     continue
+                self.record(scene, self.judge.miss(now, tile.play_time))
+                tile.reset()
 
-                beats_occupied[random_column] = {tile.play_at: True}
-                tile.position = ppb.Vector(
-                    self.x_columns[random_column],
-                    tile.calculate_start_height(
-                        bpm=bpm, speed=tile_speed, target_height=self._floor_height or 0
-                    ),
-                )
-                break
+    def record(self, scene, result: JudgementResult):
+        """Add a judged tile to the score of every player."""
+        from . import Player  # avoid circular import
+        for player in scene.get(kind=Player):
+            player.score.record(result)
+
+    def arrange_tiles(self):
+        """
+        Arrange the tiles into columns.
+
+        Layouts are cached per chart, so playing a song again reuses its columns.
+        """
+        self.tile_lanes = layout_cache.get(self.chart, len(self.x_columns), self.lane_strategy)
+        self.tile_columns = [self.x_columns[lane] for lane in self.tile_lanes]
@@ -0,0 +1,124 @@
+from typing import List
+
+import numpy as np
+import ppb
+
+
+class NoteSpawner:
+    """
+    Adds notes to the scene just before they fall into the camera.
+
+    Note sprites are taken from the song's :ref:`NotePool` when they spawn. Notes are
+    kept in an index sorted by spawn time. Every update only looks at the head of that
+    index, so the cost per frame depends on the notes that are about to show up, not on
+    the length of the song.
+
+    Parameters
+    ----------
+    lookahead: float
+        How many seconds before entering the camera a note is added to the scene.
+    fallback_height: float
+        How far above the target notes are added when the scene has no camera.
+
+    Attributes
+    ----------
+    lookahead: float
+        How many seconds before entering the camera a note is added to the scene.
+    spawned: int
+        The amount of notes added to the scene so far.
+    """
+
+    DEFAULT_LOOKAHEAD = 0.5
+    # About the height of the default 1080x720 camera above the floor.
+    DEFAULT_FALLBACK_HEIGHT = 15.0
+
+    def __init__(self, lookahead: float = DEFAULT_LOOKAHEAD,
+                 fallback_height: float = DEFAULT_FALLBACK_HEIGHT):
+        self.lookahead = lookahead
+        self.fallback_height = fallback_height
+        self.spawned = 0
+        self._queue: List[tuple] = []
+        self._cursor = 0
+        self._song = None
+        self._speed = 0
+        self._tempo = None
+        self._target_height = 0
+
+    def __len__(self):
+        """The amount of notes still waiting to be spawned."""
+        return len(self._queue) - self._cursor
+
+    def prepare(self, song, tempo, speed, target_height):
+        """
+        Index the notes of the song's chart by the time they reach the target.
+
+        :param song: :ref:`Song`
+            The song to spawn. Its tile columns decide the x position of every note.
+        :param tempo: :ref:`TempoMap`
+            The tempo map of the song.
+        :param speed: float
+            The speed the tiles are going.
+        :param target_height: float
+            The height the tiles are played at.
+        """
+        self._song = song
+        self._speed = speed
+        self._tempo = tempo
+        self._target_height = target_height
+        self._cursor = 0
+        self.spawned = 0
+        # Every play time in one pass. The stable sort keeps notes on the same beat in order.
+        play_times = tempo.to_seconds(song.chart.beats)
+        order = np.argsort(play_times, kind="stable")
+        self._queue = list(zip(play_times[order].tolist(), order.tolist()))
+
+    def _travel_time(self, scene) -> float:
+        """Seconds a note needs to fall from the top of the camera (or the fallback height) to the target."""
+        if not self._speed:
+            # Notes that do not fall are added when they are due.
+            return 0.0
+        camera = getattr(scene, "main_camera", None)
+        height = camera.top - self._target_height if camera else self.fallback_height
+        return max(height, 0) / self._speed
+
+    def update(self, scene, now):
+        """
+        Spawn every tile that enters the camera within the lookahead window.
+
+        :param scene: ppb.Scene
+            The scene to add the tiles to.
+        :param now: float
+            The current position in the song in seconds.
+        """
+        travel_time = self._travel_time(scene)
+        queue = self._queue
+        while self._cursor < len(queue):
+            play_time, idx = queue[self._cursor]
+            if play_time - now > travel_time + self.lookahead:
+                break
+            self._cursor += 1
+            self.spawn(scene, idx, play_time, now)
+
+    def spawn(self, scene, idx, play_time, now):
+        """Take a note from the pool and add it to the scene at the height that keeps it on beat."""
+        song = self._song
+        chart = song.chart
+        tile = song.pool.acquire(chart.note_name(idx), chart.beats[idx], autoplay=song.autoplay)
+        height = tile.calculate_start_height(
+            tempo=self._tempo, speed=self._speed, target_height=self._target_height, elapsed=now
+        )
+        tile.start(ppb.Vector(song.tile_columns[idx], height), speed=self._speed, song=song)
+        tile.scene = scene
+        tile.spawn_id = self.spawned
+        tile.play_time = play_time
+        scene.add(tile)
+        # The height at the play time, where the field measures from.
+        song.field.add(tile, tile.calculate_start_height(
+            tempo=self._tempo, speed=self._speed, target_height=self._target_height, elapsed=play_time
+        ))
+        song.lane_queues[song.tile_lanes[idx]].push(tile, play_time)
+        if tile.autoplay:
+            # Mixed in at the exact play time instead of the frame the tile is due.
+            tile.queue_sound(at=play_time)
+        self.spawned += 1
+        return tile
@@ -0,0 +1,220 @@
+from bisect import bisect_right
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class TempoChange(NamedTuple):
+    """The tempo from a beat on."""
+
+    beat: float
+    bpm: float
+
+
+class TimeSignature(NamedTuple):
+    """The time signature from a beat on. Beats are counted in quarter notes."""
+
+    beat: float
+    numerator: int
+    denominator: int
+
+    @property
+    def beats_per_bar(self) -> float:
+        return self.numerator * 4 / self.denominator
+
+
+class TempoMap:
+    """
+    Converts between beats and seconds for songs whose tempo changes.
+
+    The time every tempo change starts at is computed once, so converting a beat or a
+    time is a binary search over the changes. Whole columns of beats are converted in
+    a single vectorized pass with :meth:`to_seconds` and :meth:`to_beats`.
+
+    Parameters
+    ----------
+    changes: Iterable[Tuple[float, float]]
+        The (beat, bpm) tempo changes. The first tempo also applies before its beat.
+    signatures: Iterable[Tuple[float, int, int]]
+        The (beat, numerator, denominator) time signature changes. 4/4 if empty.
+
+    Attributes
+    ----------
+    changes: List[:ref:`TempoChange`]
+        The tempo changes sorted by beat, starting at beat 0.
+    signatures: List[:ref:`TimeSignature`]
+        The time signature changes sorted by beat, starting at beat 0.
+    """
+
+    def __init__(self, changes: Iterable[Tuple[float, float]], signatures: Iterable[Tuple[float, int, int]] = ()):
+        changes = sorted((TempoChange(float(beat), float(bpm)) for beat, bpm in changes), key=lambda c: c.beat)
+        if not changes:
+            raise ValueError("A tempo map needs at least one tempo.")
+        for change in changes:
+            if change.bpm <= 0:
+                raise ValueError(f"Tempo at beat {change.beat:g} must be positive, not {change.bpm:g}.")
+        if changes[0].beat > 0:
+            changes.insert(0, TempoChange(0.0, changes[0].bpm))
+        self.changes: List[TempoChange] = changes
+
+        signatures = sorted(
+            (TimeSignature(float(beat), int(numerator), int(denominator)) for beat, numerator, denominator in signatures),
+            key=lambda s: s.beat,
+        )
+        if not signatures or signatures[0].beat > 0:
+            first = signatures[0] if signatures else TimeSignature(0.0, 4, 4)
+            signatures.insert(0, TimeSignature(0.0, first.numerator, first.denominator))
+        self.signatures: List[TimeSignature] = signatures
+
+        # Cumulative index: the beat, time and seconds per beat every change starts at.
+        self._beats = [change.beat for change in changes]
+        self._seconds_per_beat = [60 / change.bpm for change in changes]
+        # Beat 0 is second 0, a first tempo before it counts backwards.
+        self._seconds = [self._beats[0] * self._seconds_per_beat[0]] * len(changes)
+        for idx in range(1, len(changes)):
+            self._seconds[idx] = self._seconds[idx - 1] + (
+                (self._beats[idx] - self._beats[idx - 1]) * self._seconds_per_beat[idx - 1]
+            )
+        self._beats_column = np.array(self._beats)
+        self._seconds_column = np.array(self._seconds)
+        self._spb_column = np.array(self._seconds_per_beat)
+
+        # The bar every time signature starts at. A partial bar before a change counts.
+        self._signature_beats = [signature.beat for signature in signatures]
+        self._signature_bars = [0] * len(signatures)
+        for idx in range(1, len(signatures)):
+            previous = signatures[idx - 1]
+            bars = -(-(signatures[idx].beat - previous.beat) // previous.beats_per_bar)
+            self._signature_bars[idx] = self._signature_bars[idx - 1] + int(bars)
+
+    @staticmethod
+    def constant(bpm: float):
+        """A tempo map that stays at one tempo in 4/4."""
+        return TempoMap([(0.0, bpm)])
+
+    @staticmethod
+    def from_song(song: dict, bpm: Optional[float] = None):
+        """
+        Read the tempo map of a JSON song.
+
+        :param song: dict
+            The "song" object of a JSON song file. Its optional "tempo" maps beats to bpm
+            and its optional "time_signature" maps beats to [numerator, denominator].
+        :param bpm: float
+            The tempo of songs without a "tempo".
+        :return: Optional[:ref:`TempoMap`]
+            The tempo map, or None when neither is known.
+        """
+        tempo = song.get("tempo")
+        if not tempo:
+            if not bpm:
+                return None
+            tempo = {0: bpm}
+        signatures = song.get("time_signature") or {}
+        return TempoMap(
+            ((float(beat), bpm) for beat, bpm in tempo.items()),
+            ((float(beat), numerator, denominator) for beat, (numerator, denominator) in signatures.items()),
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, TempoMap):
+            return NotImplemented
+        return self.changes == other.changes and self.signatures == other.signatures
+
+    def __repr__(self):
+        return f"TempoMap({[tuple(change) for change in self.changes]})"
+
+    @property
+    def is_constant(self) -> bool:
+        """Whether the tempo never changes."""
+        return len(self.changes) == 1
+
+    @property
+    def bpm(self) -> float:
+        """The starting tempo."""
+        return self.changes[0].bpm
+
+    def _change_at(self, beat) -> int:
+        return max(bisect_right(self._beats, beat) - 1, 0)
+
+    def bpm_at(self, beat: float) -> float:
+        """Get the tempo at a beat."""
+        return self.changes[self._change_at(beat)].bpm
+
+    def seconds_per_beat_at(self, beat: float) -> float:
+        """Get the length of a beat in seconds at a beat."""
+        return self._seconds_per_beat[self._change_at(beat)]
+
+    def seconds_at(self, beat: float) -> float:
+        """
+        Convert a beat to seconds.
+
+        :param beat: float
+            The beat to convert.
+        :return: float
+            The time of the beat in seconds.
+        """
+        idx = self._change_at(beat)
+        return self._seconds[idx] + (beat - self._beats[idx]) * self._seconds_per_beat[idx]
+
+    def beat_at(self, seconds: float) -> float:
+        """
+        Convert seconds to a beat.
+
+        :param seconds: float
+            The time to convert.
+        :return: float
+            The beat at that time.
+        """
+        idx = max(bisect_right(self._seconds, seconds) - 1, 0)
+        return self._beats[idx] + (seconds - self._seconds[idx]) / self._seconds_per_beat[idx]
+
+    def to_seconds(self, beats) -> np.ndarray:
+        """
+        Convert many beats to seconds at once.
+
+        :param beats: Sequence[float]
+            The beats to convert. Anything NumPy can read as float64, such as an array.
+        :return: np.ndarray
+            The time of every beat in seconds.
+        """
+        beats = np.asarray(beats, dtype=np.float64)
+        idx = np.maximum(np.searchsorted(self._beats_column, beats, side="right") - 1, 0)
+        return self._seconds_column[idx] + (beats - self._beats_column[idx]) * self._spb_column[idx]
+
+    def to_beats(self, seconds) -> np.ndarray:
+        """
+        Convert many times in seconds to beats at once.
+
+        :param seconds: Sequence[float]
+            The times to convert.
+        :return: np.ndarray
+            The beat at every time.
+        """
+        seconds = np.asarray(seconds, dtype=np.float64)
+        idx = np.maximum(np.searchsorted(self._seconds_column, seconds, side="right") - 1, 0)
+        return self._beats_column[idx] + (seconds - self._seconds_column[idx]) / self._spb_column[idx]
+
+    def signature_at(self, beat: float) -> TimeSignature:
+        """Get the time signature at a beat."""
+        return self.signatures[max(bisect_right(self._signature_beats, beat) - 1, 0)]
+
+    def bar_at(self, beat: float) -> Tuple[int, float]:
+        """
+        Get the bar a beat falls in.
+
+        :param beat: float
+            The beat to look up.
+        :return: Tuple[int, float]
+            The bar number counted from 0, and the beat within that bar.
+        """
+        idx = max(bisect_right(self._signature_beats, beat) - 1, 0)
+        signature = self.signatures[idx]
+        bars, offset = divmod(beat - signature.beat, signature.beats_per_bar)
+        return self._signature_bars[idx] + int(bars), offset
+
+    def bar_start(self, bar: int) -> float:
+        """Get the beat a bar starts at."""
+        idx = max(bisect_right(self._signature_bars, bar) - 1, 0)
+        signature = self.signatures[idx]
+        return signature.beat + (bar - self._signature_bars[idx]) * signature.beats_per_bar
@@ -1,13 +1,13 @@
 from typing import Optional
 
 import ppb
-from ppb import RectangleSprite, Vector, Image
+from ppb import RectangleSprite, Vector
 from ppb.events import KeyPressed
 import ext.ext_events
-from . import is_colliding, check_in_range
+from ext import Cullable, assets
 
 
-class BeatZone(RectangleSprite):
+class BeatZone(Cullable, RectangleSprite):
     """
     Is a beat zone that indicates when a tile can be pressed for a column.
 
@@ -17,20 +17,36 @@ class BeatZone(RectangleSprite):
         Where the beat zone is located.
     image_location: str
         File location of the image.
+    glow_image_location: str
+        File location of the image shown after a hit.
+    trigger_key: ppb.keycodes.KeyCode
+        The key that judges the tiles of this zone.
+    lane: int
+        The lane (column index) of the zone.
+
+    Attributes
+    ----------
+    song: Optional[:ref:`Song`]
+        The song being played. Holds the queue of tiles of this zone's lane.
     """
 
-    ACCEPT_RANGE = 0.25
+    # Drawn once into a cached layer, drawn again when the zone glows.
+    static = True
+    # Stops glowing once back in view, only the glow is updated.
+    cull_updates = True
 
-    def __init__(self, position: tuple, image_location, glow_image_location, trigger_key):
+    def __init__(self, position: tuple, image_location, glow_image_location, trigger_key, lane=0):
         super(BeatZone, self).__init__()
-        self._regular_image = Image(image_location)
-        self._glow_image = Image(glow_image_location)
+        self._regular_image = assets.image(image_location)
+        self._glow_image = assets.image(glow_image_location)
         self.image = self._regular_image
         self.width = 2
         self.height = 1
         self.position = Vector(*position)
         self.layer = 3
         self.scene: Optional[ppb.Scene] = None
+        self.song = None
+        self.lane = lane
         self.__KEY = trigger_key
         self._glowing_since = False
         self._glow_for = 0.25  # how long the zone should glow for.
@@ -56,24 +72,28 @@ class BeatZone(RectangleSprite):
                 self.set_regular_image()
 
     def on_key_pressed(self, key_event: KeyPressed, signal):
-        """When a key is pressed."""
-        if key_event.key == self.__KEY:
-            from . import Player, Conductor, Note  # avoid circular import
-            for player in self.scene.get(kind=Player):
-                # get time diff
-                for conduct in key_event.scene.get(kind=Conductor):
-                    last_time_diff = conduct.get_last_diff_time()
-                    next_time_diff = conduct.get_next_diff_time()
-                    close_to_last_beat = last_time_diff < self.ACCEPT_RANGE
-                    close_to_next_beat = next_time_diff < self.ACCEPT_RANGE
-                    close_to_beat = close_to_last_beat or close_to_next_beat
+        """
+        When a key is pressed. Only the next tile of this zone's lane is judged,
+        by comparing the song time of the press with the time of the tile.
+        """
+        if key_event.key != self.__KEY or self.song is None:
+            return
+
+        song = self.song
+        now = song.now()
+        song.expire(key_event.scene, now)
+        queue = song.lane_queues[self.lane]
+        tile = queue.peek()
+        if tile is None:
+            return
+        result = song.judge.judge(now, tile.play_time)
+        if result is None:
+            # Too early for the next tile.
+            return
 
-                # remove/play tile and SCORE
-                for tile in key_event.scene.get(kind=Note):
-                    if (check_in_range(tile.position.x, self.left, self.right) and
-                            check_in_range(tile.position.y, self.bottom-1, self.top+0.5) and
-                            close_to_beat):
-                        self.set_glow_image()
-                        tile.play(signal)
-                        tile.reset()
-                        player.hits += 1
+        # remove/play tile and SCORE
+        queue.pop()
+        self.set_glow_image()
+        tile.play(signal, at=now)
+        tile.reset()
+        song.record(key_event.scene, result)
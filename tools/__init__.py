@@ -0,0 +1 @@
+"""Command line tools for working with songs and assets. Run with ``python -m tools``."""
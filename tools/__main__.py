@@ -0,0 +1,25 @@
+import argparse
+import logging
+
+from tools import compile_chart, generate_chart, pack_atlas, render_chart
+
+COMMANDS = {
+    "compile": compile_chart,
+    "render": render_chart,
+    "generate": generate_chart,
+    "atlas": pack_atlas,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, command in COMMANDS.items():
+        command.add_arguments(subparsers.add_parser(name, help=command.__doc__))
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    return COMMANDS[args.command].run(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
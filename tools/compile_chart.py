@@ -0,0 +1,40 @@
+"""Compile json song files into memory-mappable charts."""
+import logging
+
+from models.chart import compile_chart
+from models.lanes import STRATEGIES
+
+logger = logging.getLogger(__name__)
+
+
+def add_arguments(parser):
+    parser.add_argument("songs", nargs="+", help="The json song files to compile.")
+    parser.add_argument(
+        "--bpm",
+        type=float,
+        help="Beats per minute used to time the notes of songs without a tempo map.",
+    )
+    parser.add_argument(
+        "--lanes",
+        choices=sorted(STRATEGIES),
+        help="Precompute the lane of every note with this strategy.",
+    )
+    parser.add_argument("--seed", type=int, help="Seed of the random lane strategy.")
+    parser.add_argument(
+        "-o", "--output", help="Output file. Only valid when compiling a single song."
+    )
+
+
+def run(args):
+    if args.output and len(args.songs) > 1:
+        logger.error("--output can only be used with a single song.")
+        return 1
+    for song in args.songs:
+        strategy = None
+        if args.lanes == "random":
+            strategy = STRATEGIES["random"](seed=args.seed)
+        elif args.lanes:
+            strategy = STRATEGIES[args.lanes]()
+        output = compile_chart(song, args.output, bpm=args.bpm, lane_strategy=strategy)
+        logger.info("Compiled %s -> %s", song, output)
+    return 0
@@ -0,0 +1,127 @@
+"""Generate json song files from decoded music by detecting its note onsets."""
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ext.analysis import OnsetDetector, available_notes, note_name, tempo_cache
+from ext.mixdown import PcmReader
+
+logger = logging.getLogger(__name__)
+
+
+def add_arguments(parser):
+    parser.add_argument("music", nargs="+", help="Decoded music to chart, WAV files or raw s16le PCM.")
+    parser.add_argument(
+        "--bpm", type=float, help="Beats per minute of the beat grid. Estimated from the music if not given."
+    )
+    parser.add_argument(
+        "--offset",
+        type=float,
+        help="Seconds into the music of beat 0. Estimated with the bpm if not given, else 0.",
+    )
+    parser.add_argument(
+        "--subdivisions", type=int, default=2, help="Grid positions per beat onsets are snapped to."
+    )
+    parser.add_argument("--frequency", type=int, default=44100, help="Sample rate of raw PCM music.")
+    parser.add_argument("--notes", default="assets/notes", help="The directory of the note samples.")
+    parser.add_argument("--delta", type=float, default=0.07, help="Onset threshold, higher finds fewer.")
+    parser.add_argument("--max-notes", type=int, default=2, help="The most notes per tile.")
+    parser.add_argument("--workers", type=int, help="Processes to chart with. One per CPU if not given.")
+    parser.add_argument(
+        "-o", "--output",
+        help="Output file. Only valid when charting a single file. Defaults to <music>.generated.json.",
+    )
+
+
+def quantize(onsets, bpm, offset=0.0, subdivisions=2, max_notes=2) -> dict:
+    """
+    Snap onsets to a beat grid.
+
+    :param onsets: Iterable[:ref:`Onset`]
+        The onsets, in order.
+    :param bpm: float
+        Beats per minute of the grid.
+    :param offset: float
+        Seconds into the music of beat 0.
+    :param subdivisions: int
+        Grid positions per beat.
+    :param max_notes: int
+        The most notes per grid position. Onsets without a pitch are blank tiles.
+    :return: dict
+        The tiles, mapping a beat to its note names.
+    """
+    tiles = {}
+    for onset in onsets:
+        step = round((onset.time - offset) * bpm / 60 * subdivisions)
+        if step < 0:
+            continue
+        notes = tiles.setdefault(step, [])
+        for pitch in onset.pitches:
+            name = note_name(pitch)
+            if len(notes) < max_notes and name not in notes:
+                notes.append(name)
+    return {
+        f"{step / subdivisions:g}": notes or ["blank"]
+        for step, notes in sorted(tiles.items())
+    }
+
+
+def generate(music, output, bpm=None, offset=None, subdivisions=2, frequency=44100, notes="assets/notes",
+             delta=0.07, max_notes=2) -> dict:
+    """
+    Chart one music file. Runs in a worker process.
+
+    :return: dict
+        The statistics of the generated chart.
+    """
+    started = time.perf_counter()
+    if bpm is None:
+        estimate = tempo_cache.get(music)
+        bpm = estimate.bpm
+        offset = estimate.offset if offset is None else offset
+    offset = offset or 0.0
+    detector = OnsetDetector(delta=delta, notes=available_notes(notes), max_pitches=max_notes)
+    with PcmReader(music, frequency=frequency) as reader:
+        seconds = reader.frames / reader.frequency
+        onsets = list(detector.detect(reader))
+    tiles = quantize(onsets, bpm, offset=offset, subdivisions=subdivisions, max_notes=max_notes)
+    name = os.path.splitext(os.path.basename(music))[0]
+    with open(output, "w") as f:
+        json.dump({"song": {"name": name, "tiles": tiles}}, f, indent=2)
+    elapsed = time.perf_counter() - started
+    return {
+        "bpm": bpm,
+        "offset": offset,
+        "onsets": len(onsets),
+        "tiles": len(tiles),
+        "seconds": round(seconds, 2),
+        "time": round(elapsed, 3),
+        "speed": round(seconds / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def run(args):
+    if args.output and len(args.music) > 1:
+        logger.error("--output can only be used with a single file.")
+        return 1
+    jobs = [
+        (music, args.output or os.path.splitext(music)[0] + ".generated.json")
+        for music in args.music
+    ]
+    options = dict(
+        bpm=args.bpm, offset=args.offset, subdivisions=args.subdivisions, frequency=args.frequency,
+        notes=args.notes, delta=args.delta, max_notes=args.max_notes,
+    )
+    if len(jobs) == 1 or args.workers == 1:
+        results = (generate(music, output, **options) for music, output in jobs)
+        for (music, output), stats in zip(jobs, results):
+            logger.info("Charted %s -> %s %s", music, output, stats)
+        return 0
+    # Every file streams through its own process, so the library is charted in parallel.
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(generate, music, output, **options) for music, output in jobs]
+        for (music, output), future in zip(jobs, futures):
+            logger.info("Charted %s -> %s %s", music, output, future.result())
+    return 0
@@ -0,0 +1,50 @@
+"""Pack the sprite images into atlas sheets the AtlasRenderer draws from."""
+import glob
+import logging
+import os
+import time
+
+from ext.atlas import build_atlas
+
+logger = logging.getLogger(__name__)
+
+# The images of every atlas. Images drawn together are packed together.
+GROUPS = {
+    "sprites": (
+        "assets/arrows/*.png",
+        "assets/tiles/*.png",
+        "assets/player/*/left_walk/*.png",
+        "assets/player/*/right_walk/*.png",
+        "assets/player/*/stand_still/*.png",
+    ),
+    "background": ("assets/background/*.png",),
+}
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        "groups", nargs="*", default=list(GROUPS), help=f"The atlases to build, of {', '.join(GROUPS)}."
+    )
+    parser.add_argument("-o", "--output", default="assets/atlas", help="The directory to write the atlases to.")
+    parser.add_argument("--max-size", type=int, default=2048, help="The largest width and height of a sheet.")
+
+
+def group_files(group) -> list:
+    """The image files of an atlas, sorted."""
+    return sorted({path for pattern in GROUPS[group] for path in glob.glob(pattern)})
+
+
+def run(args):
+    unknown = set(args.groups) - set(GROUPS)
+    if unknown:
+        logger.error("Unknown atlas %s.", ", ".join(sorted(unknown)))
+        return 1
+    for group in args.groups:
+        started = time.perf_counter()
+        index = build_atlas(group, group_files(group), args.output, max_size=args.max_size)
+        logger.info(
+            "Packed %s images into %s in %.2f s -> %s",
+            len(index["regions"]), ", ".join(index["sheets"]), time.perf_counter() - started,
+            os.path.join(args.output, f"{group}.json"),
+        )
+    return 0
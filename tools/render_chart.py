@@ -0,0 +1,70 @@
+"""Render the autoplay mix of songs to WAV files, without a window or an audio device."""
+import logging
+import os
+
+from ext.mixdown import MixdownRenderer, PcmReader, load_note_samples
+from models.chart import Chart
+
+logger = logging.getLogger(__name__)
+
+# Decoded music is looked up next to the song with one of these extensions.
+MUSIC_EXTENSIONS = (".wav", ".pcm", ".raw")
+
+
+def add_arguments(parser):
+    parser.add_argument("songs", nargs="+", help="The json song files or compiled charts to render.")
+    parser.add_argument(
+        "--bpm",
+        type=float,
+        help="Beats per minute used to time the notes of songs without a tempo map.",
+    )
+    parser.add_argument(
+        "--offset", type=float, default=0.0, help="Seconds into the music of beat 0, as given to the Conductor."
+    )
+    parser.add_argument(
+        "--music",
+        help="Decoded music of the song, a WAV file or raw s16le PCM. Only valid with a single song. "
+        f"Otherwise a file next to the song with one of {', '.join(MUSIC_EXTENSIONS)} is used if there is one.",
+    )
+    parser.add_argument("--frequency", type=int, default=44100, help="Sample rate of raw PCM music.")
+    parser.add_argument("--notes", default="assets/notes", help="The directory of the note samples.")
+    parser.add_argument("--volume", type=float, default=1.0, help="Volume of the notes.")
+    parser.add_argument("--music-volume", type=float, default=1.0, help="Volume of the music.")
+    parser.add_argument(
+        "-o", "--output", help="Output file. Only valid when rendering a single song."
+    )
+
+
+def _find_music(song):
+    stem = os.path.splitext(song)[0]
+    for extension in MUSIC_EXTENSIONS:
+        if os.path.isfile(stem + extension):
+            return stem + extension
+    return None
+
+
+def run(args):
+    if (args.output or args.music) and len(args.songs) > 1:
+        logger.error("--output and --music can only be used with a single song.")
+        return 1
+    for song in args.songs:
+        chart = Chart.load(song, bpm=args.bpm)
+        music_location = args.music or _find_music(song)
+        music = PcmReader(music_location, frequency=args.frequency) if music_location else None
+        try:
+            if chart.tempo is None and len(chart):
+                logger.error("%s has no tempo map, pass --bpm to render it.", song)
+                return 1
+            frequency = music.frequency if music is not None else args.frequency
+            samples = load_note_samples(chart.strings, args.notes, frequency=frequency)
+            renderer = MixdownRenderer(
+                chart, samples, frequency=frequency, volume=args.volume, music_volume=args.music_volume,
+                offset=args.offset,
+            )
+            output = args.output or os.path.splitext(song)[0] + ".mix.wav"
+            stats = renderer.render(output, music)
+        finally:
+            if music is not None:
+                music.close()
+        logger.info("Rendered %s%s -> %s %s", song, f" + {music_location}" if music_location else "", output, stats)
+    return 0